@@ -0,0 +1,129 @@
+"""
+Async read path load test.
+
+Seeds synthetic families into a scratch database (SQLite by default, or
+--database-url), then runs the same dashboard load against gunicorn serving
+the WSGI app with sync and gthread workers and the ASGI app (src.asgi) with
+uvicorn workers. Each server gets the same number of worker processes and is
+driven at several client concurrencies, several times the worker count:
+
+    python benchmarks/async_read_path.py --workers 2 --concurrency 2,8,32 \
+        --duration 10 --output async.json
+
+Throughput that keeps rising past the worker count shows requests being
+served concurrently inside a worker. What the event loop overlaps is time
+spent waiting on the database, which a local SQLite file barely has. Use
+--database-url postgresql://... against a networked server, or
+--query-latency-ms to add a simulated round trip to every statement
+(benchmarks/latency_app.py).
+"""
+
+import argparse
+import copy
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.endpoint_latency import git_revision  # noqa: E402
+from benchmarks.worker_models import SECRET_KEY, free_port, run_load, seed, start_gunicorn  # noqa: E402
+
+SERVERS = {
+    'sync': ('sync', 'benchmarks.latency_app:wsgi_app'),
+    'gthread': ('gthread', 'benchmarks.latency_app:wsgi_app'),
+    'uvicorn': ('uvicorn', 'benchmarks.latency_app:asgi_app'),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servers', default='sync,gthread,uvicorn')
+    parser.add_argument('--workers', type=int, default=2, help='worker processes per server')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gthread worker')
+    parser.add_argument('--concurrency', default='2,8,32', help='comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='measured seconds per run')
+    parser.add_argument('--warmup', type=float, default=2.0, help='unmeasured seconds per run')
+    parser.add_argument('--families', type=int, default=8)
+    parser.add_argument('--students', type=int, default=3, help='students per family')
+    parser.add_argument('--assignments', type=int, default=200, help='assignments per student')
+    parser.add_argument('--graded-fraction', type=float, default=0.6, help='share of assignments with a grade')
+    parser.add_argument('--attendance-days', type=int, default=180, help='attendance rows per student')
+    parser.add_argument('--database-url', help='database to seed (default: scratch SQLite file)')
+    parser.add_argument('--query-latency-ms', type=float, default=0.0,
+                        help='simulated database round trip added to every statement')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+    args.connections = 100
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scratch = None
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        scratch = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(scratch.name, 'bench.db')}"
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['SECRET_KEY'] = SECRET_KEY
+
+    from benchmarks.synthetic import PASSWORD
+
+    families = seed(args)
+    env = dict(os.environ, LOG_LEVEL='WARNING', METRICS_ENABLED='false',
+               BENCH_QUERY_LATENCY_MS=str(args.query_latency_ms))
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'settings': {
+            'workers': args.workers, 'threads': args.threads, 'duration': args.duration,
+            'query_latency_ms': args.query_latency_ms,
+        },
+        'servers': {},
+    }
+
+    print(f"{'server':8} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name in args.servers.split(','):
+        worker_class, target = SERVERS[name]
+        if name == 'uvicorn' and importlib.util.find_spec('uvicorn') is None:
+            print(f'{name:8} skipped (uvicorn is not installed)')
+            continue
+        port = free_port()
+        process = start_gunicorn(worker_class, port, args, env, target=target)
+        results = {}
+        try:
+            for level in levels:
+                run_args = copy.copy(args)
+                run_args.concurrency = level
+                result = run_load(port, families, PASSWORD, run_args)
+                results[level] = result
+                print(f"{name:8} {level:7d} {result['requests_per_second']:9.1f} {result['p50_ms']:9.2f} "
+                      f"{result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {result['errors']:7d}")
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+        report['servers'][name] = results
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f'\nWrote {args.output}')
+
+    if scratch is not None:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+"""
+Endpoint latency benchmark.
+
+Seeds synthetic families into a scratch database (SQLite by default, or
+--database-url), then drives every API route through the Flask test client
+and/or a real WSGI server and reports p50/p95/p99 latency, SQL statements per
+request and peak RSS. Use --output to write JSON that can be diffed across
+commits:
+
+    python benchmarks/endpoint_latency.py --families 5 --assignments 300 \
+        --output bench-$(git rev-parse --short HEAD).json
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Write routes are benchmarked with these payloads; anything destructive or
+# without a payload here is reported as skipped rather than exercised.
+WRITE_PAYLOADS = {
+    'user.update_current_user': lambda n, ids: {'timezone': 'UTC'},
+    'student.create_student': lambda n, ids: {
+        'first_name': f'Bench{n}', 'last_name': 'Student',
+        'date_of_birth': '2015-05-05', 'grade_level': '4',
+    },
+    'student.update_student': lambda n, ids: {'notes': f'Benchmark note {n}'},
+    'assignment.create_assignment': lambda n, ids: {
+        'student_id': ids['student_id'], 'subject_id': ids['subject_id'],
+        'title': f'Bench assignment {n}', 'due_date': '2030-01-01',
+    },
+    'assignment.update_assignment': lambda n, ids: {'priority': 'high' if n % 2 else 'normal'},
+    'assignment.grade_assignment': lambda n, ids: {'points_earned': 70 + n % 30},
+    'assignment.update_assignment_grade': lambda n, ids: {'feedback': f'Benchmark feedback {n}'},
+    'subject.create_subject': lambda n, ids: {'name': f'Bench subject {n}'},
+    'subject.update_subject': lambda n, ids: {'description': f'Benchmark description {n}'},
+}
+
+SKIPPED_ENDPOINTS = {
+    'user.register', 'user.login', 'user.logout', 'user.change_password', 'user.delete_user',
+    'student.delete_student', 'assignment.delete_assignment', 'assignment.delete_assignment_grade',
+    'subject.delete_subject', 'static', 'serve',
+    # A Server-Sent Events stream stays open until it expires.
+    'events.stream_events',
+}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in megabytes."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(usage / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def collect_routes(app, ids):
+    """Build (endpoint, method, path, payload factory) for every API route."""
+    routes = []
+    skipped = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if rule.endpoint in SKIPPED_ENDPOINTS or not rule.rule.startswith('/api/'):
+            if rule.rule.startswith('/api/'):
+                skipped.append(rule.endpoint)
+            continue
+        path = rule.rule
+        for argument in rule.arguments:
+            path = path.replace(f'<int:{argument}>', str(ids[argument])).replace(f'<{argument}>', str(ids[argument]))
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            if method == 'GET':
+                routes.append((rule.endpoint, method, path, None))
+            elif rule.endpoint in WRITE_PAYLOADS:
+                routes.append((rule.endpoint, method, path, WRITE_PAYLOADS[rule.endpoint]))
+            else:
+                skipped.append(f'{method} {rule.endpoint}')
+    return routes, sorted(set(skipped))
+
+
+class QueryCounter:
+    """Counts statements executed on an engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+class TestClientDriver:
+    """Sends requests through Flask's in-process test client."""
+
+    name = 'testclient'
+
+    def __init__(self, app, username, password):
+        self.client = app.test_client()
+        response = self.client.post('/api/auth/login', json={'username': username, 'password': password})
+        if response.status_code != 200:
+            raise RuntimeError(f'Login failed: {response.status_code}')
+
+    def request(self, method, path, payload):
+        response = self.client.open(path, method=method, json=payload)
+        response.get_data()
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class WSGIServerDriver:
+    """Sends requests over HTTP to a werkzeug WSGI server on a background thread."""
+
+    name = 'wsgi'
+
+    def __init__(self, app, username, password):
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.server = make_server('127.0.0.1', 0, app, threaded=False, request_handler=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.server.server_port)
+        self.cookie = None
+        status = self.request('POST', '/api/auth/login', {'username': username, 'password': password})
+        if status != 200:
+            raise RuntimeError(f'Login failed: {status}')
+
+    def request(self, method, path, payload):
+        headers = {'Content-Type': 'application/json'}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        body = json.dumps(payload) if payload is not None else None
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+        set_cookie = response.getheader('Set-Cookie')
+        if set_cookie:
+            self.cookie = set_cookie.split(';', 1)[0]
+        return response.status
+
+    def close(self):
+        self.connection.close()
+        self.server.shutdown()
+
+
+def run_driver(driver, routes, ids, counter, requests_per_route, warmup, sequence):
+    results = []
+    for endpoint, method, path, payload_factory in routes:
+        latencies = []
+        queries = []
+        statuses = {}
+        for n in range(warmup + requests_per_route):
+            payload = payload_factory(next(sequence), ids) if payload_factory else None
+            counter.count = 0
+            start = time.perf_counter()
+            status = driver.request(method, path, payload)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if n < warmup:
+                continue
+            latencies.append(elapsed_ms)
+            queries.append(counter.count)
+            statuses[status] = statuses.get(status, 0) + 1
+        results.append({
+            'endpoint': endpoint,
+            'method': method,
+            'path': path,
+            'requests': len(latencies),
+            'statuses': statuses,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'queries_per_request': round(sum(queries) / len(queries), 2),
+            'max_queries': max(queries),
+        })
+    return results
+
+
+def print_table(mode, results, rss):
+    print(f'\n== {mode} (peak RSS {rss} MB) ==')
+    print(f"{'method':6} {'path':52} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+    for row in results:
+        print(f"{row['method']:6} {row['path'][:52]:52} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f} "
+              f"{row['p99_ms']:8.2f} {row['queries_per_request']:8.1f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--families', type=int, default=5)
+    parser.add_argument('--students', type=int, default=3, help='students per family')
+    parser.add_argument('--assignments', type=int, default=200, help='assignments per student')
+    parser.add_argument('--graded-fraction', type=float, default=0.6, help='share of assignments with a grade')
+    parser.add_argument('--submissions', type=int, default=1, help='submissions per submitted assignment')
+    parser.add_argument('--attendance-days', type=int, default=180, help='attendance rows per student')
+    parser.add_argument('--requests', type=int, default=50, help='measured requests per route')
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per route')
+    parser.add_argument('--mode', choices=['testclient', 'wsgi', 'both'], default='both')
+    parser.add_argument('--database-url', help='database to seed (default: scratch SQLite file)')
+    parser.add_argument('--output', help='write JSON results to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scratch = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        scratch = tempfile.TemporaryDirectory()
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch.name, 'bench.db')}"
+
+    from sqlalchemy import event
+    from src.main import create_app
+    from src.models import db, User, Student, Subject, Assignment, AssignmentSchedule, Goal, Grade
+    from src.utils.schedules import horizon, materialize
+    from benchmarks.synthetic import PASSWORD, seed_families
+
+    app = create_app()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed_start = time.perf_counter()
+        usernames = seed_families(
+            families=args.families, students=args.students, assignments=args.assignments,
+            graded_fraction=args.graded_fraction, submissions=args.submissions,
+            attendance_days=args.attendance_days,
+        )
+        seed_seconds = time.perf_counter() - seed_start
+        user = User.query.filter_by(username=usernames[0]).one()
+        student = Student.query.filter_by(user_id=user.id).order_by(Student.id).first()
+        graded = db.session.query(Assignment).join(Grade).filter(
+            Assignment.student_id == student.id
+        ).order_by(Assignment.id).first()
+        ids = {
+            'user_id': user.id,
+            'student_id': student.id,
+            'subject_id': Subject.query.filter_by(user_id=user.id).order_by(Subject.id).first().id,
+            'assignment_id': graded.id if graded else Assignment.query.filter_by(student_id=student.id).first().id,
+        }
+        schedule = AssignmentSchedule(student_id=student.id, subject_id=ids['subject_id'], title='Bench reading',
+                                      rrule='FREQ=WEEKLY', start_date=date.today(),
+                                      materialized_through=date.today() - timedelta(days=1))
+        db.session.add(schedule)
+        db.session.flush()
+        materialize(schedule, horizon())
+        db.session.commit()
+        ids['schedule_id'] = schedule.id
+        ids['goal_id'] = Goal.query.filter_by(student_id=student.id).order_by(Goal.id).first().id
+        ids['day'] = date.today().isoformat()
+        engine = db.engine
+
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+
+    routes, skipped = collect_routes(app, ids)
+    drivers = {'testclient': [TestClientDriver], 'wsgi': [WSGIServerDriver],
+               'both': [TestClientDriver, WSGIServerDriver]}[args.mode]
+
+    # Shared across drivers so payloads with unique fields never collide.
+    sequence = itertools.count()
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'database': engine.dialect.name,
+        'volumes': {
+            'families': args.families, 'students': args.students, 'assignments': args.assignments,
+            'graded_fraction': args.graded_fraction, 'submissions': args.submissions,
+            'attendance_days': args.attendance_days,
+        },
+        'seed_seconds': round(seed_seconds, 2),
+        'skipped': skipped,
+        'modes': {},
+    }
+
+    for driver_class in drivers:
+        driver = driver_class(app, usernames[0], PASSWORD)
+        try:
+            results = run_driver(driver, routes, ids, counter, args.requests, args.warmup, sequence)
+        finally:
+            driver.close()
+        rss = peak_rss_mb()
+        report['modes'][driver.name] = {'peak_rss_mb': rss, 'routes': results}
+        print_table(driver.name, results, rss)
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f'\nWrote {args.output}')
+
+    event.remove(engine, 'before_cursor_execute', counter)
+    if scratch is not None:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+JSON serialization micro-benchmark.
+
+Builds in-memory attendance and assignment lists (10k rows by default, no
+database involved) and times turning them into response bytes along each
+serialization path:
+
+    legacy   hand-written to_dict with per-field isoformat()/float(),
+             encoded by Flask's default stdlib provider
+    stdlib   compiled column serializers, FastJSONProvider without orjson
+    orjson   compiled column serializers, FastJSONProvider with orjson
+    columns  ?format=columns encoding, FastJSONProvider
+
+Reports the best-of-N build (objects to dicts) and encode (dicts to JSON)
+times and the payload size for each:
+
+    python benchmarks/json_serialization.py --rows 10000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from src.models import Assignment, Attendance, Grade, Submission  # noqa: E402
+from src.utils.columnar import encode_columns  # noqa: E402
+from src.utils.json_provider import FastJSONProvider, orjson  # noqa: E402
+
+
+def legacy_attendance(record):
+    """Attendance.to_dict as written before the compiled serializers."""
+    return {
+        'id': record.id,
+        'student_id': record.student_id,
+        'date': record.date.isoformat() if record.date else None,
+        'status': record.status,
+        'status_color': record.get_status_color(),
+        'status_icon': record.get_status_icon(),
+        'hours': float(record.hours) if record.hours else 0.0,
+        'hours_formatted': record.get_hours_formatted(),
+        'notes': record.notes,
+        'is_weekend': record.is_weekend(),
+        'is_today': record.is_today(),
+        'is_future': record.is_future(),
+        'created_at': record.created_at.isoformat() if record.created_at else None,
+        'updated_at': record.updated_at.isoformat() if record.updated_at else None
+    }
+
+
+def legacy_assignment(assignment):
+    """Assignment.to_dict as written before the compiled serializers."""
+    latest_submission = assignment.get_latest_submission()
+    return {
+        'id': assignment.id,
+        'student_id': assignment.student_id,
+        'subject_id': assignment.subject_id,
+        'title': assignment.title,
+        'description': assignment.description,
+        'instructions': assignment.instructions,
+        'due_date': assignment.due_date.isoformat() if assignment.due_date else None,
+        'estimated_duration': assignment.estimated_duration,
+        'points_total': assignment.points_total,
+        'assignment_type': assignment.assignment_type,
+        'difficulty_level': assignment.difficulty_level,
+        'status': assignment.status,
+        'priority': assignment.priority,
+        'tags': assignment.get_tags(),
+        'resources': assignment.get_resources(),
+        'is_overdue': assignment.is_overdue(),
+        'days_until_due': assignment.days_until_due(),
+        'created_at': assignment.created_at.isoformat() if assignment.created_at else None,
+        'updated_at': assignment.updated_at.isoformat() if assignment.updated_at else None,
+        'grade_percentage': assignment.get_grade_percentage(),
+        'grade_letter': assignment.get_grade_letter(),
+        'is_graded': assignment.is_graded(),
+        'submission_count': assignment.get_submission_count(),
+        'latest_submission': latest_submission.to_dict() if latest_submission else None,
+    }
+
+
+def build_attendance(rows):
+    today = date.today()
+    now = datetime.utcnow()
+    statuses = ['present'] * 8 + ['partial', 'absent']
+    return [
+        Attendance(id=i + 1, student_id=1 + i % 3, date=today - timedelta(days=i),
+                   status=statuses[i % len(statuses)], hours=Decimal('5.5') if i % 7 else Decimal('5'),
+                   notes=None, created_at=now, updated_at=now)
+        for i in range(rows)
+    ]
+
+
+def build_assignments(rows):
+    today = date.today()
+    now = datetime.utcnow()
+    statuses = ['assigned', 'in_progress', 'submitted', 'graded']
+    assignments = []
+    for i in range(rows):
+        status = statuses[i % len(statuses)]
+        assignment = Assignment(
+            id=i + 1, student_id=1 + i % 3, subject_id=1 + i % 6, title=f'Assignment {i}',
+            description='Practice set', instructions=None, due_date=today + timedelta(days=i % 60 - 30),
+            estimated_duration=30, points_total=100, assignment_type='homework',
+            difficulty_level='medium', status=status, priority='normal', tags='["math", "review"]',
+            resources=None, created_at=now, updated_at=now
+        )
+        if status in ('submitted', 'graded'):
+            assignment.submissions = [Submission(id=i + 1, assignment_id=i + 1, file_name=f'work{i}.pdf',
+                                                 file_size=2048, mime_type='application/pdf',
+                                                 submitted_at=now, created_at=now, status='submitted')]
+        if status == 'graded':
+            assignment.grade = Grade(id=i + 1, assignment_id=i + 1, points_earned=Decimal('88'),
+                                     percentage=Decimal('88.00'), grade_letter='B+', graded_at=now,
+                                     created_at=now, updated_at=now)
+        assignments.append(assignment)
+    return assignments
+
+
+def best_of(repeat, fn):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure(name, items, build, provider, repeat):
+    build_seconds, data = best_of(repeat, lambda: build(items))
+    encode_seconds, body = best_of(repeat, lambda: provider.dumps(data))
+    return {
+        'path': name,
+        'build_ms': round(build_seconds * 1000, 2),
+        'encode_ms': round(encode_seconds * 1000, 2),
+        'total_ms': round((build_seconds + encode_seconds) * 1000, 2),
+        'bytes': len(body.encode()),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help='rows per list')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement; the best is reported')
+    parser.add_argument('--output', help='write JSON results to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    app = Flask(__name__)
+
+    class StdlibJSONProvider(FastJSONProvider):
+        use_orjson = False
+
+    legacy = DefaultJSONProvider(app)
+    stdlib = StdlibJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    lists = {
+        'attendance': (build_attendance(args.rows), legacy_attendance, Attendance),
+        'assignments': (build_assignments(args.rows), legacy_assignment, Assignment),
+    }
+
+    report = {'rows': args.rows, 'orjson': orjson is not None, 'lists': {}}
+    for label, (items, legacy_to_dict, model) in lists.items():
+        paths = [
+            measure('legacy', items, lambda rows: [legacy_to_dict(row) for row in rows], legacy, args.repeat),
+            measure('stdlib', items, lambda rows: [row.to_dict() for row in rows], stdlib, args.repeat),
+        ]
+        if orjson is not None:
+            paths.append(measure('orjson', items, lambda rows: [row.to_dict() for row in rows], fast, args.repeat))
+        paths.append(measure('columns', items, lambda rows: encode_columns(rows, model.COLUMNS), fast, args.repeat))
+        report['lists'][label] = paths
+
+        baseline = paths[0]['total_ms']
+        print(f'\n== {label}: {args.rows} rows ==')
+        print(f"{'path':8} {'build ms':>10} {'encode ms':>10} {'total ms':>10} {'speedup':>8} {'bytes':>10}")
+        for row in paths:
+            print(f"{row['path']:8} {row['build_ms']:10.2f} {row['encode_ms']:10.2f} {row['total_ms']:10.2f} "
+                  f"{baseline / row['total_ms']:7.1f}x {row['bytes']:10d}")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
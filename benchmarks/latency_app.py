@@ -0,0 +1,61 @@
+"""
+Apps for benchmarks/async_read_path.py with a simulated database round trip.
+
+``BENCH_QUERY_LATENCY_MS`` adds that much wait before every statement, as a
+database across the network would. The sync engine sleeps its thread and the
+async engine awaits ``asyncio.sleep``, just as each would wait on a real
+socket. Serve ``benchmarks.latency_app:wsgi_app`` or
+``benchmarks.latency_app:asgi_app`` with gunicorn.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.util import await_only  # noqa: E402
+
+from src.models import db  # noqa: E402
+
+LATENCY = float(os.getenv('BENCH_QUERY_LATENCY_MS', 0)) / 1000
+
+
+def add_latency(engine, asynchronous=False):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _round_trip(conn, cursor, statement, parameters, context, executemany):
+        if asynchronous:
+            await_only(asyncio.sleep(LATENCY))
+        else:
+            time.sleep(LATENCY)
+
+
+def build_wsgi():
+    from src.main import create_app
+    app = create_app()
+    with app.app_context():
+        add_latency(db.engine)
+    return app
+
+
+def build_asgi():
+    from src.asgi import create_asgi_app
+    app = create_asgi_app()
+    with app.flask_app.app_context():
+        add_latency(db.engine)
+    add_latency(app.engine.sync_engine, asynchronous=True)
+    return app
+
+
+_apps = {}
+
+
+def __getattr__(name):
+    builders = {'wsgi_app': build_wsgi, 'asgi_app': build_asgi}
+    if name not in builders:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    if name not in _apps:
+        _apps[name] = builders[name]()
+    return _apps[name]
@@ -0,0 +1,165 @@
+"""
+Synthetic homeschool families for benchmarks.
+
+Generates families x students x assignments (with a graded fraction and a
+number of submissions each) x attendance days using bulk inserts, so that
+seeding a few hundred thousand rows takes seconds rather than minutes.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from src.models import (
+    db, User, Student, Subject, Assignment, Grade, Submission,
+    Attendance, Goal, Activity
+)
+
+PASSWORD = 'benchmark-password'
+
+STATUSES = ['assigned', 'in_progress', 'submitted', 'graded']
+ATTENDANCE_STATUSES = ['present'] * 8 + ['partial', 'absent']
+SUBJECTS = ['Math', 'Reading', 'Writing', 'Science', 'History', 'Art']
+
+
+def _bulk_insert(model, rows):
+    """Insert plain dictionaries and return the ids in insertion order."""
+    if not rows:
+        return []
+    result = db.session.execute(db.insert(model).returning(model.id), rows)
+    return [row[0] for row in result]
+
+
+def _letter(percentage):
+    grade = Grade(percentage=percentage)
+    return grade.calculate_letter_grade()
+
+
+def seed_families(families=10, students=3, assignments=200, graded_fraction=0.6,
+                  submissions=1, attendance_days=180, random_seed=42):
+    """Seed synthetic families and return their usernames."""
+    rng = random.Random(random_seed)
+    today = date.today()
+    now = datetime.utcnow()
+    password_hash = generate_password_hash(PASSWORD)
+    usernames = []
+
+    for f in range(families):
+        username = f'family{f}'
+        user_id = _bulk_insert(User, [{
+            'username': username,
+            'email': f'{username}@example.com',
+            'password_hash': password_hash,
+            'first_name': 'Parent',
+            'last_name': f'Family{f}',
+            'timezone': 'UTC',
+            'created_at': now,
+            'updated_at': now,
+        }])[0]
+        usernames.append(username)
+
+        subject_ids = _bulk_insert(Subject, [
+            {'user_id': user_id, 'name': name, 'color': '#2196F3', 'active': True, 'created_at': now}
+            for name in SUBJECTS
+        ])
+
+        student_ids = _bulk_insert(Student, [
+            {
+                'user_id': user_id,
+                'first_name': f'Student{s}',
+                'last_name': f'Family{f}',
+                'date_of_birth': date(2012 + s % 6, 1 + s % 12, 1 + s % 28),
+                'grade_level': str(1 + s % 8),
+                'active': True,
+                'created_at': now,
+                'updated_at': now,
+            }
+            for s in range(students)
+        ])
+
+        for student_id in student_ids:
+            assignment_rows = []
+            for a in range(assignments):
+                graded = rng.random() < graded_fraction
+                assignment_rows.append({
+                    'student_id': student_id,
+                    'subject_id': rng.choice(subject_ids),
+                    'title': f'Assignment {a}',
+                    'description': 'Synthetic benchmark assignment',
+                    'due_date': today + timedelta(days=a - int(assignments * 0.8)),
+                    'estimated_duration': rng.choice([15, 30, 45, 60]),
+                    'points_total': 100,
+                    'assignment_type': rng.choice(['homework', 'quiz', 'test', 'project']),
+                    'difficulty_level': 'medium',
+                    'status': 'graded' if graded else rng.choice(STATUSES[:3]),
+                    'priority': 'normal',
+                    'created_at': now,
+                    'updated_at': now,
+                })
+            assignment_ids = _bulk_insert(Assignment, assignment_rows)
+
+            grade_rows = []
+            submission_rows = []
+            for assignment_id, row in zip(assignment_ids, assignment_rows):
+                if row['status'] in ('submitted', 'graded'):
+                    for n in range(submissions):
+                        submission_rows.append({
+                            'assignment_id': assignment_id,
+                            'submitted_at': now - timedelta(hours=n),
+                            'file_name': f'work{n}.pdf',
+                            'file_size': rng.randint(10_000, 2_000_000),
+                            'mime_type': 'application/pdf',
+                            'status': 'submitted',
+                            'created_at': now,
+                        })
+                if row['status'] == 'graded':
+                    points = rng.randint(55, 100)
+                    grade_rows.append({
+                        'assignment_id': assignment_id,
+                        'points_earned': points,
+                        'percentage': points,
+                        'grade_letter': _letter(points),
+                        'feedback': 'Synthetic feedback',
+                        'graded_by': user_id,
+                        'graded_at': now - timedelta(days=rng.randint(0, 300)),
+                        'created_at': now,
+                        'updated_at': now,
+                    })
+            _bulk_insert(Grade, grade_rows)
+            _bulk_insert(Submission, submission_rows)
+
+            _bulk_insert(Attendance, [
+                {
+                    'student_id': student_id,
+                    'date': today - timedelta(days=d),
+                    'status': rng.choice(ATTENDANCE_STATUSES),
+                    'hours': rng.choice([4, 5, 6]),
+                    'created_at': now,
+                    'updated_at': now,
+                }
+                for d in range(attendance_days)
+            ])
+            _bulk_insert(Goal, [{
+                'student_id': student_id,
+                'subject_id': subject_ids[0],
+                'title': 'Finish the reading list',
+                'target_date': today + timedelta(days=90),
+                'status': 'active',
+                'progress_percentage': 40,
+                'created_at': now,
+                'updated_at': now,
+            }])
+            _bulk_insert(Activity, [{
+                'student_id': student_id,
+                'name': 'Soccer',
+                'activity_type': 'sports',
+                'start_date': today - timedelta(days=60),
+                'hours_total': 20,
+                'created_at': now,
+                'updated_at': now,
+            }])
+
+        db.session.commit()
+
+    return usernames
@@ -0,0 +1,245 @@
+"""
+Gunicorn worker model benchmark.
+
+Seeds synthetic families into a scratch database (SQLite by default, or
+--database-url), then starts gunicorn with gunicorn.conf.py once per worker
+class and hammers the dashboard endpoints from concurrent keep-alive clients,
+each logged in as its own family. It reports throughput, p50/p95/p99 latency
+and errors per worker model:
+
+    python benchmarks/worker_models.py --worker-classes sync,gthread,gevent \
+        --workers 2 --concurrency 16 --duration 10 --output workers.json
+
+gevent is skipped when it is not installed.
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.endpoint_latency import git_revision, percentile  # noqa: E402
+
+SECRET_KEY = 'worker-benchmark-secret-key-' + 'x' * 32
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed(args):
+    """Seed the scratch database; return usernames and each family's first student id."""
+    from benchmarks.synthetic import seed_families
+    from src.main import create_app
+    from src.models import db, Student, User
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        usernames = seed_families(
+            families=args.families, students=args.students, assignments=args.assignments,
+            graded_fraction=args.graded_fraction, attendance_days=args.attendance_days,
+        )
+        families = []
+        for username in usernames:
+            user = User.query.filter_by(username=username).one()
+            student = Student.query.filter_by(user_id=user.id).order_by(Student.id).first()
+            families.append((username, student.id))
+        db.session.remove()
+        db.engine.dispose()
+    return families
+
+
+def start_gunicorn(worker_class, port, args, env, target='src.main:app'):
+    env = dict(env, GUNICORN_WORKER_CLASS=worker_class, WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_THREADS=str(args.threads), GUNICORN_CONNECTIONS=str(args.connections),
+               GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_ACCESS_LOG='')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', os.path.join(ROOT, 'gunicorn.conf.py'), target],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn ({worker_class}) exited with {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'gunicorn ({worker_class}) did not become ready')
+
+
+class Client(threading.Thread):
+    """One keep-alive HTTP client cycling through a family's dashboards."""
+
+    def __init__(self, port, username, student_id, password, stop_at):
+        super().__init__(daemon=True)
+        self.port = port
+        self.username = username
+        self.password = password
+        self.paths = ['/api/assignments/dashboard', f'/api/students/{student_id}/dashboard']
+        self.stop_at = stop_at
+        self.latencies = []
+        self.errors = 0
+        self.cookie = None
+
+    def _request(self, connection, method, path, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        set_cookie = response.getheader('Set-Cookie')
+        if set_cookie:
+            self.cookie = set_cookie.split(';', 1)[0]
+        return response.status
+
+    def run(self):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        login = json.dumps({'username': self.username, 'password': self.password})
+        if self._request(connection, 'POST', '/api/auth/login', login) != 200:
+            self.errors += 1
+            return
+        n = 0
+        while time.perf_counter() < self.stop_at:
+            path = self.paths[n % len(self.paths)]
+            n += 1
+            start = time.perf_counter()
+            try:
+                status = self._request(connection, 'GET', path)
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+                continue
+            if status == 200:
+                self.latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                self.errors += 1
+        connection.close()
+
+
+def run_load(port, families, password, args):
+    # Warm every worker's imports and caches before measuring.
+    warmup_stop = time.perf_counter() + args.warmup
+    warmup = [Client(port, *families[i % len(families)], password, warmup_stop) for i in range(args.concurrency)]
+    for client in warmup:
+        client.start()
+    for client in warmup:
+        client.join()
+
+    stop_at = time.perf_counter() + args.duration
+    clients = [Client(port, *families[i % len(families)], password, stop_at) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [ms for client in clients for ms in client.latencies]
+    return {
+        'requests': len(latencies),
+        'errors': sum(client.errors for client in clients),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worker-classes', default='sync,gthread,gevent')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gthread worker')
+    parser.add_argument('--connections', type=int, default=100, help='greenlets per gevent worker')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='measured seconds per worker class')
+    parser.add_argument('--warmup', type=float, default=2.0, help='unmeasured seconds per worker class')
+    parser.add_argument('--families', type=int, default=8)
+    parser.add_argument('--students', type=int, default=3, help='students per family')
+    parser.add_argument('--assignments', type=int, default=200, help='assignments per student')
+    parser.add_argument('--graded-fraction', type=float, default=0.6, help='share of assignments with a grade')
+    parser.add_argument('--attendance-days', type=int, default=180, help='attendance rows per student')
+    parser.add_argument('--database-url', help='database to seed (default: scratch SQLite file)')
+    parser.add_argument('--output', help='write JSON results to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scratch = None
+    if args.database_url:
+        database_url = args.database_url
+    else:
+        scratch = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(scratch.name, 'bench.db')}"
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['SECRET_KEY'] = SECRET_KEY
+
+    from benchmarks.synthetic import PASSWORD
+
+    families = seed(args)
+    env = dict(os.environ, LOG_LEVEL='WARNING', METRICS_ENABLED='false')
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'settings': {
+            'workers': args.workers, 'threads': args.threads, 'connections': args.connections,
+            'concurrency': args.concurrency, 'duration': args.duration,
+        },
+        'worker_classes': {},
+    }
+
+    print(f"{'worker':8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for worker_class in args.worker_classes.split(','):
+        if worker_class == 'gevent' and importlib.util.find_spec('gevent') is None:
+            print(f'{worker_class:8} skipped (gevent is not installed)')
+            continue
+        port = free_port()
+        process = start_gunicorn(worker_class, port, args, env)
+        try:
+            result = run_load(port, families, PASSWORD, args)
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
+        report['worker_classes'][worker_class] = result
+        print(f"{worker_class:8} {result['requests_per_second']:9.1f} {result['p50_ms']:9.2f} "
+              f"{result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {result['errors']:7d}")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f'\nWrote {args.output}')
+
+    if scratch is not None:
+        scratch.cleanup()
+
+
+if __name__ == '__main__':
+    main()
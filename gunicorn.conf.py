@@ -0,0 +1,142 @@
+"""
+Gunicorn configuration for Homeschool Hub.
+
+    gunicorn --config gunicorn.conf.py src.main:app
+
+The worker model comes from the environment:
+
+    GUNICORN_WORKER_CLASS   sync | gthread | gevent | uvicorn (default gthread);
+                            uvicorn serves src.asgi:app, see src/asgi.py
+    WEB_CONCURRENCY         worker processes (default: 2 x CPUs + 1 for sync,
+                            CPUs + 1 otherwise)
+    GUNICORN_THREADS        threads per gthread worker (default 4)
+    GUNICORN_CONNECTIONS    concurrent greenlets per gevent worker (default 100)
+    GUNICORN_PRELOAD        import the app once in the master (default true,
+                            false for gevent, which must patch before import)
+    GUNICORN_MAX_REQUESTS   recycle a worker after this many requests (default 1000;
+                            jittered by GUNICORN_MAX_REQUESTS_JITTER, default 100)
+    GUNICORN_TIMEOUT        seconds before a silent worker is killed (default 60)
+    GUNICORN_GRACEFUL_TIMEOUT  seconds in-flight requests get on SIGTERM (default 30)
+
+gevent workers use the pinned ``gevent`` and ``psycogreen`` packages, so
+psycopg2 yields to other greenlets while waiting on PostgreSQL. In an
+environment without gevent the gthread worker is used instead, with a
+warning in the log at startup. Under gevent, every greenlet in a worker shares that worker's connection pool, so size
+DB_POOL_SIZE/DB_MAX_OVERFLOW for the concurrency you expect to hit the
+database.
+
+Server-Sent Events (``/api/events``) hold a thread per open stream, so sync
+workers accept none and gthread workers at most half their threads unless
+EVENTS_MAX_STREAMS says otherwise. Use gevent workers to serve many dashboards.
+"""
+
+import glob
+import importlib.util
+import multiprocessing
+import os
+
+_cpus = multiprocessing.cpu_count()
+
+# Logged once gunicorn's logger exists, in on_starting
+_startup_warnings = []
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'gevent' and importlib.util.find_spec('gevent') is None:
+    _startup_warnings.append('GUNICORN_WORKER_CLASS=gevent but gevent is not installed '
+                             '(pip install -r requirements.txt); using gthread workers instead')
+    worker_class = 'gthread'
+elif worker_class == 'gevent' and importlib.util.find_spec('psycogreen') is None:
+    _startup_warnings.append('psycogreen is not installed (pip install -r requirements.txt); '
+                             'PostgreSQL queries will block whole gevent workers')
+elif worker_class == 'uvicorn':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:3256')
+workers = int(os.getenv('WEB_CONCURRENCY', 2 * _cpus + 1 if worker_class == 'sync' else _cpus + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.getenv('GUNICORN_CONNECTIONS', 100))
+
+# An open /api/events stream occupies a thread until it ends. Keep sync and
+# gthread workers free for requests; clients over the limit fall back to polling.
+if worker_class == 'sync':
+    os.environ.setdefault('EVENTS_MAX_STREAMS', '0')
+elif worker_class == 'gthread':
+    os.environ.setdefault('EVENTS_MAX_STREAMS', str(threads // 2))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false' if worker_class == 'gevent' else 'true').lower() == 'true'
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Heartbeat files on tmpfs, so a slow overlay filesystem can't get workers killed.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+# Metrics files from a previous run would be summed into this one. The config
+# is read before the app is preloaded, so clear them here rather than in a hook.
+_metrics_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if _metrics_dir:
+    os.makedirs(_metrics_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(_metrics_dir, '*.db')):
+        os.remove(stale)
+
+
+def on_starting(server):
+    for message in _startup_warnings:
+        server.log.warning(message)
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        # The master's pool served only the preload; keep it out of the
+        # workers' summed pool gauges.
+        from src.utils.metrics import clear_pool_gauges
+        clear_pool_gauges()
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            pass
+        else:
+            # Let psycopg2 wait on the gevent hub instead of blocking the worker.
+            patch_psycopg()
+
+    if server.cfg.preload_app:
+        # Connections opened in the master (e.g. by import-time queries) must
+        # not be shared between workers.
+        from src.models import db
+        from src.utils.database import dispose_engines
+        application = server.app.wsgi()
+        dispose_engines(_flask_app(application), db)
+        if hasattr(application, 'engine'):
+            application.engine.sync_engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Say goodbye to the database instead of leaving idle backends behind.
+    from src.models import db
+    from src.utils.database import dispose_engines
+    flask_app = _flask_app(server.app.wsgi())
+    flask_app.extensions['token_revocations'].stop()
+    dispose_engines(flask_app, db, close=True)
+
+
+def _flask_app(application):
+    # src.asgi:app wraps the Flask app.
+    return getattr(application, 'flask_app', application)
+
+
+def child_exit(server, worker):
+    if _metrics_dir:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,197 @@
+"""
+ASGI entry point with an asyncio read path for the hottest GET endpoints.
+
+    uvicorn src.asgi:app --port 3256
+    gunicorn --config gunicorn.conf.py -k uvicorn.workers.UvicornWorker src.asgi:app
+
+Requests for ``ASYNC_ENDPOINTS`` are handled on the event loop. The same
+Flask views run, with the same login, ownership checks, ETags and
+serializers. ``db.session`` is swapped for the sync facade of an
+``AsyncSession`` on an aiosqlite/asyncpg engine, so every query the views
+and models issue awaits the driver in a greenlet instead of blocking a
+thread. One worker process can therefore keep many dashboards waiting on
+the database at once. Python code between queries still runs one request
+at a time per worker.
+
+Everything else (writes, uploads, the SPA) is passed to the WSGI app
+through a2wsgi's thread pool, so behaviour is unchanged.
+
+The async engine uses ``ASYNC_DATABASE_URL`` when set, otherwise the async
+driver for ``DATABASE_URL``. It gets the same pool presets, timeouts and
+SQLite pragmas as the sync engine. Reads on this path always go to the
+primary, not to read replicas.
+"""
+
+import asyncio
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+
+from src.main import create_app
+from src.models import db
+from src.utils.database import database_settings, engine_options, sqlite_settings
+from src.utils.sqlite import install_pragmas
+
+# Read-only views served on the event loop.
+ASYNC_ENDPOINTS = frozenset({
+    'assignment.get_assignments_dashboard',
+    'assignment.get_assignments',
+    'student.get_students',
+    'student.get_student_dashboard',
+    'student.get_student_assignments',
+    'student.get_student_progress',
+    'subject.get_subjects',
+    'subject.get_subject_analytics',
+})
+
+ASYNC_DRIVERS = {'sqlite': 'aiosqlite', 'postgresql': 'asyncpg'}
+
+
+def async_database_url(database_url):
+    """The same database addressed through its asyncio driver."""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f'No asyncio driver for {url.get_backend_name()} databases')
+    return url.set(drivername=f'{url.get_backend_name()}+{driver}').render_as_string(hide_password=False)
+
+
+def _environ(scope, root_path=''):
+    """A WSGI environ for a body-less ASGI HTTP request."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path,
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+class AsyncReadApp:
+    """ASGI app: async read path for ASYNC_ENDPOINTS, WSGI for the rest."""
+
+    def __init__(self, flask_app, async_engine, wsgi_workers=10):
+        self.flask_app = flask_app
+        self.engine = async_engine
+        self.sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+        self.wsgi = WSGIMiddleware(flask_app, workers=wsgi_workers)
+        self.url_map = flask_app.url_map
+
+    def _endpoint(self, scope):
+        if scope['method'] not in ('GET', 'HEAD'):
+            return None
+        try:
+            endpoint, _ = self.url_map.bind('localhost').match(scope['path'], method=scope['method'])
+        except (NotFound, MethodNotAllowed):
+            return None
+        return endpoint if endpoint in ASYNC_ENDPOINTS else None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http' or self._endpoint(scope) is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        environ = _environ(scope, scope.get('root_path', ''))
+        async with self.sessions() as session:
+            status, headers, body = await session.run_sync(self._dispatch, environ)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': body if scope['method'] != 'HEAD' else b''})
+
+    def _dispatch(self, sync_session, environ):
+        """Run the Flask request in this greenlet with ``db.session`` bound to the async session.
+
+        Each greenlet has its own contextvars, so the Flask contexts of
+        concurrent requests do not see each other.
+        """
+        ctx = self.flask_app.request_context(environ)
+        error = None
+        try:
+            ctx.push()
+            db.session.registry.set(sync_session)
+            try:
+                response = self.flask_app.full_dispatch_request()
+            except Exception as exc:
+                error = exc
+                response = self.flask_app.handle_exception(exc)
+            return response.status_code, response.headers.to_wsgi_list(), response.get_data()
+        finally:
+            ctx.pop(error)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_async_read_engine(flask_app):
+    """Async engine for the app's database, configured like the sync one."""
+    url = flask_app.config.get('ASYNC_DATABASE_URL') or async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+    engine = create_async_engine(url, **engine_options(url, database_settings(flask_app.config['ENV_NAME'])))
+    if engine.dialect.name == 'sqlite':
+        install_pragmas(engine.sync_engine, sqlite_settings())
+    return engine
+
+
+def create_asgi_app(test_config=None):
+    """Build the Flask app and wrap it with the async read path."""
+    flask_app = create_app(test_config)
+    flask_app.config.setdefault('ASYNC_DATABASE_URL', os.getenv('ASYNC_DATABASE_URL'))
+    return AsyncReadApp(
+        flask_app, create_async_read_engine(flask_app),
+        wsgi_workers=int(os.getenv('ASGI_WSGI_THREADS', 10)),
+    )
+
+
+_app = None
+
+
+def __getattr__(name):
+    # Built on first access, like src.main:app.
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_asgi_app()
+        return _app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+if __name__ == '__main__':
+    import uvicorn
+    asyncio.run(uvicorn.Server(uvicorn.Config(create_asgi_app(), host='0.0.0.0', port=3256)).serve())
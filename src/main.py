@@ -1,8 +1,9 @@
 import os
 import sys
 import secrets
+from datetime import timedelta
 from dotenv import load_dotenv
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask
 
 # Load environment variables
 load_dotenv()
@@ -17,83 +18,190 @@ from src.routes.user import user_bp
 from src.routes.student import student_bp
 from src.routes.assignment import assignment_bp
 from src.routes.subject import subject_bp
+from src.routes.calendar import calendar_bp
+from src.routes.goal import goal_bp
+from src.routes.changes import changes_bp
+from src.routes.events import events_bp
+from src.utils.sql_instrumentation import init_sql_instrumentation
+from src.utils.metrics import init_metrics, parse_networks
+from src.utils.json_provider import FastJSONProvider
+from src.utils.database import database_settings, engine_options, init_database
+from src.utils.replicas import LAST_WRITE_HEADER, init_replicas, replica_binds
+from src.utils.sqlite import init_sqlite
+from src.utils.response_cache import init_response_cache
+from src.utils.health import init_health
+from src.utils.static_assets import init_static
+from src.utils.auth import init_auth
+from src.utils.purge import init_purge
+from src.utils.schedules import init_schedules
+from src.utils.changes import init_changes
+from src.utils.events import init_events
 
 # Import all models to register them with SQLAlchemy
 from src.models import (
-    User, Student, Subject, Assignment, Grade, 
+    User, Student, Subject, Assignment, Grade,
     Submission, Attendance, AcademicPeriod, Goal, Activity
 )
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-
-# Configuration with environment variable support
-secret_key = os.getenv('SECRET_KEY')
-if not secret_key or len(secret_key) < 32:
-    secret_key = secrets.token_hex(32)
-app.config['SECRET_KEY'] = secret_key
-
-# Database configuration - support both PostgreSQL and SQLite
-database_url = os.getenv('DATABASE_URL')
-if database_url:
-    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-else:
-    # Fallback to SQLite for development
-    db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB
-
-# Enable CORS for configured origins
-allowed_origins = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
-CORS(app, origins=allowed_origins)
-
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(student_bp, url_prefix='/api')
-app.register_blueprint(assignment_bp, url_prefix='/api')
-app.register_blueprint(subject_bp, url_prefix='/api')
-
-# Initialize database
-db.init_app(app)
-migrate = Migrate(app, db)
-
-# Health check endpoint for Docker
-@app.route('/api/health')
-def health_check():
-    try:
-        # Test database connection
-        with app.app_context():
-            db.session.execute(db.text('SELECT 1'))
-        return jsonify({
-            'status': 'healthy',
-            'database': 'connected',
-            'version': '1.0.0'
-        }), 200
-    except Exception as e:
-        return jsonify({
-            'status': 'unhealthy',
-            'database': 'disconnected',
-            'error': str(e)
-        }), 503
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
+migrate = Migrate()
+
+
+def create_app(test_config=None):
+    """Build and configure the Flask application.
+
+    ``test_config`` values override the environment-derived configuration
+    before any extension is initialized.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.json = FastJSONProvider(app)
+
+    # Configuration with environment variable support
+    secret_key = os.getenv('SECRET_KEY')
+    if not secret_key or len(secret_key) < 32:
+        secret_key = secrets.token_hex(32)
+    app.config['SECRET_KEY'] = secret_key
+
+    # Bearer tokens as an alternative to the session cookie (see src/utils/auth.py)
+    jwt_secret_key = os.getenv('JWT_SECRET_KEY')
+    if jwt_secret_key:
+        app.config['JWT_SECRET_KEY'] = jwt_secret_key
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', 15)))
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', 30)))
+    app.config['AUTH_REVOCATION_REFRESH_SECONDS'] = float(os.getenv('AUTH_REVOCATION_REFRESH_SECONDS', 5))
+    app.config['AUTH_REVOCATION_CAPACITY'] = int(os.getenv('AUTH_REVOCATION_CAPACITY', 100000))
+
+    app.config['ENV_NAME'] = os.getenv('FLASK_ENV', 'production')
+
+    # Database configuration - support both PostgreSQL and SQLite
+    database_url = os.getenv('DATABASE_URL')
+    if database_url:
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+        # Fallback to SQLite for development
+        db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+
+    # Read replicas for GET traffic, with read-your-writes stickiness after a write
+    replica_urls = os.getenv('DATABASE_REPLICA_URLS', '')
+    app.config['DATABASE_REPLICA_URLS'] = [url.strip() for url in replica_urls.split(',') if url.strip()]
+    app.config['REPLICA_STICKY_SECONDS'] = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
+    app.config['REPLICA_RETRY_SECONDS'] = float(os.getenv('REPLICA_RETRY_SECONDS', 30))
+
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB
+    app.logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    # Per-request SQL statistics (Server-Timing header, sql_stats log line, N+1 warnings)
+    app.config['SQL_INSTRUMENTATION'] = os.getenv('SQL_INSTRUMENTATION', 'true').lower() == 'true'
+    app.config['SQL_SERVER_TIMING'] = os.getenv('SQL_SERVER_TIMING', 'true').lower() == 'true'
+    app.config['SQL_REPEATED_STATEMENT_THRESHOLD'] = int(os.getenv('SQL_REPEATED_STATEMENT_THRESHOLD', 5))
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN', '')
+    # Loopback only: behind a proxy or load balancer every client arrives from
+    # a private address, so wider ranges must be opted into.
+    app.config['METRICS_ALLOWED_NETWORKS'] = parse_networks(os.getenv(
+        'METRICS_ALLOWED_NETWORKS', '127.0.0.0/8,::1/128'))
+
+    # Per-user cache of read-only responses, invalidated by writes
+    app.config['RESPONSE_CACHE_ENABLED'] = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    app.config['RESPONSE_CACHE_TTL'] = int(os.getenv('RESPONSE_CACHE_TTL', 60))
+    app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    app.config['RESPONSE_CACHE_BACKEND'] = os.getenv('RESPONSE_CACHE_BACKEND', '')
+
+    # Readiness comes from a background prober instead of per-probe queries
+    app.config['HEALTH_PROBE_INTERVAL'] = float(os.getenv('HEALTH_PROBE_INTERVAL', 5))
+    app.config['HEALTH_MAX_POOL_SATURATION'] = float(os.getenv('HEALTH_MAX_POOL_SATURATION', 1.0))
+
+    # Deleted accounts are purged in batches, in the background when large
+    app.config['ACCOUNT_PURGE_BATCH_SIZE'] = int(os.getenv('ACCOUNT_PURGE_BATCH_SIZE', 1000))
+    app.config['ACCOUNT_PURGE_INLINE_ROWS'] = int(os.getenv('ACCOUNT_PURGE_INLINE_ROWS', 2000))
+
+    # Days ahead for which recurring schedules have concrete assignment rows
+    app.config['SCHEDULE_HORIZON_DAYS'] = int(os.getenv('SCHEDULE_HORIZON_DAYS', 14))
+
+    # Month a school year begins in (8 = August), for yearly attendance views
+    app.config['SCHOOL_YEAR_START_MONTH'] = int(os.getenv('SCHOOL_YEAR_START_MONTH', 8))
+
+    # Change log behind /api/changes delta sync
+    app.config['CHANGES_RETENTION_DAYS'] = int(os.getenv('CHANGES_RETENTION_DAYS', 30))
+    app.config['CHANGES_COMPACT_INTERVAL'] = int(os.getenv('CHANGES_COMPACT_INTERVAL', 3600))
+    app.config['CHANGES_PAGE_SIZE'] = int(os.getenv('CHANGES_PAGE_SIZE', 500))
+
+    # Live updates over /api/events; each open stream occupies a worker thread
+    app.config['EVENTS_ENABLED'] = os.getenv('EVENTS_ENABLED', 'true').lower() == 'true'
+    app.config['EVENTS_MAX_STREAMS'] = int(os.getenv('EVENTS_MAX_STREAMS', 100))
+    app.config['EVENTS_STREAM_SECONDS'] = int(os.getenv('EVENTS_STREAM_SECONDS', 300))
+    app.config['EVENTS_HEARTBEAT_SECONDS'] = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+    app.config['EVENTS_QUEUE_SIZE'] = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
+    app.config['EVENTS_CHANNEL'] = os.getenv('EVENTS_CHANNEL', 'homeschool_events')
+    app.config['EVENTS_LISTEN_URL'] = os.getenv('EVENTS_LISTEN_URL')
+
+    # Yearly instructional targets reported by the compliance endpoint
+    app.config['COMPLIANCE_REQUIRED_DAYS'] = int(os.getenv('COMPLIANCE_REQUIRED_DAYS', 180))
+    app.config['COMPLIANCE_REQUIRED_HOURS'] = float(os.getenv('COMPLIANCE_REQUIRED_HOURS', 900))
+
+    if test_config:
+        app.config.update(test_config)
+
+    # Connection pool and timeouts: production/development presets, DB_* overrides
+    db_settings = database_settings(app.config['ENV_NAME'])
+    app.config.setdefault(
+        'SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI'], db_settings)
+    )
+    app.config.setdefault('DB_STATEMENT_TIMEOUT_MS', db_settings['statement_timeout_ms'])
+    app.config.setdefault('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', db_settings['idle_in_transaction_timeout_ms'])
+    app.config.setdefault('DB_PGBOUNCER', db_settings['pgbouncer'])
+    app.config.setdefault('SQLALCHEMY_BINDS', replica_binds(app.config['DATABASE_REPLICA_URLS']))
+
+    # Enable CORS for configured origins
+    allowed_origins = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
+    CORS(app, origins=allowed_origins, expose_headers=[LAST_WRITE_HEADER])
+
+    # Register blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(student_bp, url_prefix='/api')
+    app.register_blueprint(assignment_bp, url_prefix='/api')
+    app.register_blueprint(subject_bp, url_prefix='/api')
+    app.register_blueprint(calendar_bp, url_prefix='/api')
+    app.register_blueprint(goal_bp, url_prefix='/api')
+    app.register_blueprint(changes_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+
+    # Initialize database
+    db.init_app(app)
+    migrate.init_app(app, db)
+    init_database(app, db)
+    init_sqlite(app, db)
+    init_replicas(app, db)
+    init_sql_instrumentation(app)
+    init_metrics(app, db)
+    init_auth(app, db)
+    init_purge(app)
+    init_schedules(app)
+    init_changes(app)
+    init_events(app)
+    init_response_cache(app)
+    init_health(app, db)
+
+    init_static(app)
+
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # ``src.main:app`` (gunicorn, ``flask --app``) builds the application on
+    # first access, so importing create_app alone has no side effects.
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=3256, debug=True)
+    create_app().run(host='0.0.0.0', port=3256, debug=os.getenv('FLASK_DEBUG') == '1')
@@ -8,12 +8,16 @@ from .user import db, User
 from .student import Student
 from .subject import Subject
 from .assignment import Assignment
+from .assignment_schedule import AssignmentSchedule
 from .grade import Grade
 from .submission import Submission
 from .attendance import Attendance
+from .attendance_counter import AttendanceCounter
 from .academic_period import AcademicPeriod
 from .goal import Goal
 from .activity import Activity
+from .revoked_token import RevokedToken
+from .change import Change
 
 __all__ = [
     'db',
@@ -21,11 +25,15 @@ __all__ = [
     'Student', 
     'Subject',
     'Assignment',
+    'AssignmentSchedule',
     'Grade',
     'Submission',
     'Attendance',
+    'AttendanceCounter',
     'AcademicPeriod',
     'Goal',
-    'Activity'
+    'Activity',
+    'RevokedToken',
+    'Change'
 ]
 
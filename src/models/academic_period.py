@@ -1,11 +1,13 @@
 from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
 from datetime import datetime, date
 
 class AcademicPeriod(db.Model):
     __tablename__ = 'academic_periods'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=False)
@@ -51,21 +53,17 @@ class AcademicPeriod(db.Model):
     def __repr__(self):
         return f'<AcademicPeriod {self.name}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'name': self.name,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'period_type': self.period_type,
-            'active': self.active,
-            'is_current': self.is_current(),
-            'is_future': self.is_future(),
-            'is_past': self.is_past(),
-            'duration_days': self.get_duration_days(),
-            'progress_percentage': self.get_progress_percentage(),
-            'remaining_days': self.get_remaining_days(),
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        data['is_current'] = self.is_current()
+        data['is_future'] = self.is_future()
+        data['is_past'] = self.is_past()
+        data['duration_days'] = self.get_duration_days()
+        data['progress_percentage'] = self.get_progress_percentage()
+        data['remaining_days'] = self.get_remaining_days()
+        return fields.filter(data)
 
+
+_serialize_columns = column_serializer(AcademicPeriod, (
+    'id', 'user_id', 'name', 'start_date', 'end_date', 'period_type', 'active', 'created_at',
+))
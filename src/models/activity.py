@@ -1,4 +1,7 @@
 from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
+from src.utils.columnar import Column
 from datetime import datetime, date
 import json
 
@@ -6,7 +9,7 @@ class Activity(db.Model):
     __tablename__ = 'activities'
     
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False, index=True)
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     activity_type = db.Column(db.String(50))  # sports, music, art, volunteer, etc.
@@ -112,30 +115,44 @@ class Activity(db.Model):
                 return f"{hours} hour{'s' if hours != 1 else ''}"
         return "No hours recorded"
 
+    # Compact ?format=columns encoding; status_color, type_icon and
+    # hours_formatted are looked up on the client.
+    COLUMNS = (
+        Column('id'),
+        Column('student_id'),
+        Column('name'),
+        Column('description'),
+        Column('activity_type', enum=('sports', 'music', 'art', 'volunteer', 'academic', 'technology',
+                                      'outdoor', 'social', 'leadership', 'community')),
+        Column('start_date'),
+        Column('end_date'),
+        Column('hours_total'),
+        Column('achievements', get=get_achievements),
+        Column('notes'),
+        Column('status', get=get_status, enum=('completed', 'ongoing', 'upcoming', 'planned')),
+        Column('duration_days', get=get_duration_days),
+        Column('created_at'),
+        Column('updated_at'),
+    )
+
     def __repr__(self):
         return f'<Activity {self.name}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'student_id': self.student_id,
-            'name': self.name,
-            'description': self.description,
-            'activity_type': self.activity_type,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'hours_total': float(self.hours_total) if self.hours_total else None,
-            'hours_formatted': self.get_hours_formatted(),
-            'achievements': self.get_achievements(),
-            'notes': self.notes,
-            'status': self.get_status(),
-            'status_color': self.get_status_color(),
-            'type_icon': self.get_type_icon(),
-            'is_ongoing': self.is_ongoing(),
-            'is_completed': self.is_completed(),
-            'is_future': self.is_future(),
-            'duration_days': self.get_duration_days(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        data['achievements'] = self.get_achievements()
+        data['hours_formatted'] = self.get_hours_formatted()
+        data['status'] = self.get_status()
+        data['status_color'] = self.get_status_color()
+        data['type_icon'] = self.get_type_icon()
+        data['is_ongoing'] = self.is_ongoing()
+        data['is_completed'] = self.is_completed()
+        data['is_future'] = self.is_future()
+        data['duration_days'] = self.get_duration_days()
+        return fields.filter(data)
+
 
+_serialize_columns = column_serializer(Activity, (
+    'id', 'student_id', 'name', 'description', 'activity_type', 'start_date', 'end_date', 'hours_total',
+    'notes', 'created_at', 'updated_at',
+))
@@ -1,4 +1,7 @@
 from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
+from src.utils.columnar import Column
 from datetime import datetime, date
 import json
 
@@ -6,8 +9,10 @@ class Assignment(db.Model):
     __tablename__ = 'assignments'
     
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
-    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id'), index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False, index=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id', ondelete='SET NULL'), index=True)
+    # Set for occurrences created from a recurring AssignmentSchedule
+    schedule_id = db.Column(db.Integer, db.ForeignKey('assignment_schedules.id', ondelete='SET NULL'))
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     instructions = db.Column(db.Text)
@@ -24,8 +29,15 @@ class Assignment(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    grade = db.relationship('Grade', backref='assignment', uselist=False, cascade='all, delete-orphan')
-    submissions = db.relationship('Submission', backref='assignment', lazy=True, cascade='all, delete-orphan')
+    grade = db.relationship('Grade', backref='assignment', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    submissions = db.relationship('Submission', backref='assignment', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+
+    __table_args__ = (
+        # Date-range reads per student (calendar)
+        db.Index('ix_assignments_student_due_date', 'student_id', 'due_date'),
+        # One row per schedule occurrence, however many workers materialize it
+        db.UniqueConstraint('schedule_id', 'due_date', name='unique_schedule_due_date'),
+    )
 
     def set_tags(self, tags_list):
         """Set tags as JSON string."""
@@ -86,34 +98,75 @@ class Assignment(db.Model):
             return max(self.submissions, key=lambda s: s.submitted_at)
         return None
 
+    @staticmethod
+    def load_options(fields=ALL_FIELDS):
+        """Eager-load options for the relationships the requested fields need."""
+        from sqlalchemy.orm import selectinload
+
+        options = []
+        if fields.wants_any('grade_percentage', 'grade_letter', 'is_graded'):
+            options.append(selectinload(Assignment.grade))
+        if fields.wants_any('submission_count', 'latest_submission'):
+            options.append(selectinload(Assignment.submissions))
+        return options
+
+    # Compact ?format=columns encoding; presentation lookups stay on the client.
+    COLUMNS = (
+        Column('id'),
+        Column('student_id'),
+        Column('subject_id'),
+        Column('schedule_id'),
+        Column('title'),
+        Column('description'),
+        Column('instructions'),
+        Column('due_date'),
+        Column('estimated_duration'),
+        Column('points_total'),
+        Column('assignment_type', enum=('homework', 'quiz', 'test', 'project')),
+        Column('difficulty_level', enum=('easy', 'medium', 'hard')),
+        Column('status', enum=('assigned', 'in_progress', 'submitted', 'graded')),
+        Column('priority', enum=('low', 'normal', 'high')),
+        Column('tags', get=get_tags),
+        Column('resources', get=get_resources),
+        Column('is_overdue', get=is_overdue),
+        Column('days_until_due', get=days_until_due),
+        Column('created_at'),
+        Column('updated_at'),
+        Column('grade_percentage', get=get_grade_percentage, computed=True),
+        Column('grade_letter', get=get_grade_letter, computed=True,
+               enum=('A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'D-', 'F')),
+        Column('is_graded', get=is_graded, computed=True),
+        Column('submission_count', get=get_submission_count, computed=True),
+    )
+
     def __repr__(self):
         return f'<Assignment {self.title}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'student_id': self.student_id,
-            'subject_id': self.subject_id,
-            'title': self.title,
-            'description': self.description,
-            'instructions': self.instructions,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'estimated_duration': self.estimated_duration,
-            'points_total': self.points_total,
-            'assignment_type': self.assignment_type,
-            'difficulty_level': self.difficulty_level,
-            'status': self.status,
-            'priority': self.priority,
-            'tags': self.get_tags(),
-            'resources': self.get_resources(),
-            'is_overdue': self.is_overdue(),
-            'days_until_due': self.days_until_due(),
-            'grade_percentage': self.get_grade_percentage(),
-            'grade_letter': self.get_grade_letter(),
-            'is_graded': self.is_graded(),
-            'submission_count': self.get_submission_count(),
-            'latest_submission': self.get_latest_submission().to_dict() if self.get_latest_submission() else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        data['tags'] = self.get_tags()
+        data['resources'] = self.get_resources()
+        data['is_overdue'] = self.is_overdue()
+        data['days_until_due'] = self.days_until_due()
+        
+        # Fields below load the grade and submissions relationships
+        if fields.wants('grade_percentage'):
+            data['grade_percentage'] = self.get_grade_percentage()
+        if fields.wants('grade_letter'):
+            data['grade_letter'] = self.get_grade_letter()
+        if fields.wants('is_graded'):
+            data['is_graded'] = self.is_graded()
+        if fields.wants('submission_count'):
+            data['submission_count'] = self.get_submission_count()
+        if fields.wants('latest_submission'):
+            latest_submission = self.get_latest_submission()
+            data['latest_submission'] = latest_submission.to_dict() if latest_submission else None
+        
+        return fields.filter(data)
+
 
+_serialize_columns = column_serializer(Assignment, (
+    'id', 'student_id', 'subject_id', 'schedule_id', 'title', 'description', 'instructions', 'due_date',
+    'estimated_duration', 'points_total', 'assignment_type', 'difficulty_level', 'status', 'priority',
+    'created_at', 'updated_at',
+))
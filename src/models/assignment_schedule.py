@@ -0,0 +1,109 @@
+from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
+from datetime import datetime, time, timedelta
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, YEARLY, rrule, rrulestr
+
+# Occurrences are days; finer frequencies would only repeat them
+SCHEDULE_FREQUENCIES = (DAILY, WEEKLY, MONTHLY, YEARLY)
+
+
+def parse_rrule(rule, start_date):
+    """The dateutil rrule for an RRULE string starting on start_date; ValueError if unusable."""
+    recurrence = rrulestr(rule.strip(), dtstart=datetime.combine(start_date, time()))
+    if not isinstance(recurrence, rrule):
+        raise ValueError('Only a single RRULE is supported')
+    if recurrence._freq not in SCHEDULE_FREQUENCIES:
+        raise ValueError('FREQ must be DAILY, WEEKLY, MONTHLY or YEARLY')
+    return recurrence
+
+
+class AssignmentSchedule(db.Model):
+    """A recurring assignment: a template plus an RRULE (RFC 5545) recurrence."""
+    __tablename__ = 'assignment_schedules'
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False, index=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id', ondelete='SET NULL'), index=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    instructions = db.Column(db.Text)
+    estimated_duration = db.Column(db.Integer)  # Minutes
+    points_total = db.Column(db.Integer, default=100)
+    assignment_type = db.Column(db.String(50), default='homework')
+    difficulty_level = db.Column(db.String(20), default='medium')
+    priority = db.Column(db.String(20), default='normal')
+    rrule = db.Column(db.String(500), nullable=False)  # e.g. FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR
+    start_date = db.Column(db.Date, nullable=False)
+    active = db.Column(db.Boolean, default=True, index=True)
+    # Last day for which concrete Assignment rows exist
+    materialized_through = db.Column(db.Date)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    assignments = db.relationship('Assignment', backref='schedule', lazy=True, passive_deletes=True)
+
+    def recurrence(self):
+        return parse_rrule(self.rrule, self.start_date)
+
+    def occurrences(self, start, end):
+        """Due dates of the schedule from start to end, inclusive."""
+        start = max(start, self.start_date)
+        if end < start:
+            return []
+        return [moment.date() for moment in self.recurrence().between(
+            datetime.combine(start, time()), datetime.combine(end, time()), inc=True
+        )]
+
+    def pending_occurrences(self, start, end):
+        """Occurrences from start to end that have no Assignment row yet."""
+        if self.materialized_through is not None:
+            start = max(start, self.materialized_through + timedelta(days=1))
+        return self.occurrences(start, end)
+
+    def build_assignment(self, due_date):
+        """The concrete Assignment for one occurrence."""
+        from src.models.assignment import Assignment
+
+        return Assignment(
+            student_id=self.student_id,
+            subject_id=self.subject_id,
+            schedule_id=self.id,
+            title=self.title,
+            description=self.description,
+            instructions=self.instructions,
+            due_date=due_date,
+            estimated_duration=self.estimated_duration,
+            points_total=self.points_total,
+            assignment_type=self.assignment_type,
+            difficulty_level=self.difficulty_level,
+            priority=self.priority,
+        )
+
+    def occurrence_dict(self, due_date):
+        """Slim representation of an occurrence that has no row yet."""
+        return {
+            'id': None,
+            'schedule_id': self.id,
+            'student_id': self.student_id,
+            'subject_id': self.subject_id,
+            'title': self.title,
+            'due_date': due_date,
+            'estimated_duration': self.estimated_duration,
+            'status': 'assigned',
+            'scheduled': True,
+        }
+
+    def __repr__(self):
+        return f'<AssignmentSchedule {self.title}>'
+
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        return fields.filter(data)
+
+
+_serialize_columns = column_serializer(AssignmentSchedule, (
+    'id', 'student_id', 'subject_id', 'title', 'description', 'instructions', 'estimated_duration',
+    'points_total', 'assignment_type', 'difficulty_level', 'priority', 'rrule', 'start_date', 'active',
+    'materialized_through', 'created_at', 'updated_at',
+))
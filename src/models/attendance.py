@@ -1,4 +1,7 @@
 from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
+from src.utils.columnar import Column
 from datetime import datetime, date
 from sqlalchemy import UniqueConstraint
 
@@ -6,7 +9,7 @@ class Attendance(db.Model):
     __tablename__ = 'attendance'
     
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False, index=True)
     date = db.Column(db.Date, nullable=False, index=True)
     status = db.Column(db.String(20), default='present')  # present, absent, partial
     hours = db.Column(db.Numeric(3, 1), default=0.0)
@@ -95,24 +98,35 @@ class Attendance(db.Model):
             'attendance_rate': attendance_rate
         }
 
+    # Compact ?format=columns encoding; status_color, status_icon and
+    # hours_formatted are looked up on the client from status and hours.
+    COLUMNS = (
+        Column('id'),
+        Column('student_id'),
+        Column('date'),
+        Column('status', enum=('present', 'absent', 'partial')),
+        Column('hours'),
+        Column('notes'),
+        Column('created_at'),
+        Column('updated_at'),
+    )
+
     def __repr__(self):
         return f'<Attendance {self.date} - {self.status}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'student_id': self.student_id,
-            'date': self.date.isoformat() if self.date else None,
-            'status': self.status,
-            'status_color': self.get_status_color(),
-            'status_icon': self.get_status_icon(),
-            'hours': float(self.hours) if self.hours else 0.0,
-            'hours_formatted': self.get_hours_formatted(),
-            'notes': self.notes,
-            'is_weekend': self.is_weekend(),
-            'is_today': self.is_today(),
-            'is_future': self.is_future(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        if data['hours'] is None:
+            data['hours'] = 0.0
+        data['status_color'] = self.get_status_color()
+        data['status_icon'] = self.get_status_icon()
+        data['hours_formatted'] = self.get_hours_formatted()
+        data['is_weekend'] = self.is_weekend()
+        data['is_today'] = self.is_today()
+        data['is_future'] = self.is_future()
+        return fields.filter(data)
+
 
+_serialize_columns = column_serializer(Attendance, (
+    'id', 'student_id', 'date', 'status', 'hours', 'notes', 'created_at', 'updated_at',
+))
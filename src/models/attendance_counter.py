@@ -0,0 +1,42 @@
+from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
+from datetime import datetime
+from sqlalchemy import UniqueConstraint
+
+class AttendanceCounter(db.Model):
+    """Running attendance totals of a student for one school year.
+
+    Kept current by src.utils.compliance on every flush that writes attendance.
+    """
+    __tablename__ = 'attendance_counters'
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False)
+    school_year = db.Column(db.Integer, nullable=False)  # Calendar year the school year starts in
+    present_days = db.Column(db.Integer, nullable=False, default=0)
+    partial_days = db.Column(db.Integer, nullable=False, default=0)
+    absent_days = db.Column(db.Integer, nullable=False, default=0)
+    hours = db.Column(db.Numeric(8, 1), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint('student_id', 'school_year', name='unique_student_school_year'),)
+
+    @property
+    def instructional_days(self):
+        """Days with any instruction: present or partial."""
+        return (self.present_days or 0) + (self.partial_days or 0)
+
+    def __repr__(self):
+        return f'<AttendanceCounter {self.student_id} {self.school_year}>'
+
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        data['instructional_days'] = self.instructional_days
+        return fields.filter(data)
+
+
+_serialize_columns = column_serializer(AttendanceCounter, (
+    'id', 'student_id', 'school_year', 'present_days', 'partial_days', 'absent_days', 'hours',
+    'updated_at',
+))
@@ -0,0 +1,25 @@
+from src.models.user import db
+from datetime import datetime
+
+class Change(db.Model):
+    """One entry of a user's append-only change log; its id is the sync cursor."""
+    __tablename__ = 'changes'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    entity = db.Column(db.String(30), nullable=False)  # Table name, e.g. assignments
+    entity_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)  # upsert, delete
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # PostgreSQL transaction id (txid_current()) of the write; None on SQLite
+    xid = db.Column(db.BigInteger)
+
+    __table_args__ = (
+        # Feed reads: a user's changes after a cursor
+        db.Index('ix_changes_user_id_id', 'user_id', 'id'),
+        # Compaction: every change of one row
+        db.Index('ix_changes_user_entity', 'user_id', 'entity', 'entity_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<Change {self.id} {self.operation} {self.entity}:{self.entity_id}>'
@@ -1,22 +1,43 @@
 from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
+from src.utils.columnar import Column
 from datetime import datetime, date
 
+# Progress modes derived from the goal's subject grades
+AUTO_PROGRESS_MODES = ('count', 'average')
+# Graded assignments an average needs before it can complete a goal
+AVERAGE_MIN_GRADED = 3
+
 class Goal(db.Model):
     __tablename__ = 'goals'
     
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id'))
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False, index=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id', ondelete='SET NULL'))
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     target_date = db.Column(db.Date)
     goal_type = db.Column(db.String(50), default='academic')  # academic, behavioral, skill
     status = db.Column(db.String(20), default='active')  # active, completed, paused, cancelled
     progress_percentage = db.Column(db.Integer, default=0)
+    # manual, count (graded assignments in the subject reach target_value)
+    # or average (their average percentage reaches target_value)
+    progress_mode = db.Column(db.String(20), default='manual', nullable=False)
+    target_value = db.Column(db.Numeric(6, 2))
+    # Running totals of the subject's graded assignments, kept by src.utils.goal_progress
+    graded_count = db.Column(db.Integer, default=0, nullable=False)
+    percentage_sum = db.Column(db.Numeric(10, 2), default=0, nullable=False)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Date-range reads per student (calendar); grade events find auto goals by subject
+    __table_args__ = (
+        db.Index('ix_goals_student_target_date', 'student_id', 'target_date'),
+        db.Index('ix_goals_student_subject', 'student_id', 'subject_id'),
+    )
+
     def is_overdue(self):
         """Check if goal is overdue."""
         if not self.target_date or self.status in ['completed', 'cancelled']:
@@ -79,34 +100,88 @@ class Goal(db.Model):
             self.status = 'completed'
         self.updated_at = datetime.utcnow()
 
+    @property
+    def is_automatic(self):
+        return self.progress_mode in AUTO_PROGRESS_MODES
+
+    def grade_average(self):
+        """Average percentage of the subject's graded assignments, or None."""
+        if not self.graded_count:
+            return None
+        return round(float(self.percentage_sum) / self.graded_count, 2)
+
+    def apply_grades(self, count, percentage_sum):
+        """Add graded assignments (negative to remove) and derive progress from the totals."""
+        self.graded_count = (self.graded_count or 0) + count
+        self.percentage_sum = (self.percentage_sum or 0) + percentage_sum
+        self.refresh_progress()
+
+    def refresh_progress(self):
+        """Set progress and status from the running totals of an automatic goal."""
+        if not self.is_automatic or not self.target_value:
+            return
+        target = float(self.target_value)
+        if self.progress_mode == 'count':
+            reached = self.graded_count or 0
+        else:
+            reached = self.grade_average() or 0
+        self.progress_percentage = max(0, min(100, int(100 * reached / target)))
+        self.updated_at = datetime.utcnow()
+
+        # Completion follows the grades both ways; paused and cancelled goals keep their status.
+        done = self.progress_percentage >= 100 and (
+            self.progress_mode != 'average' or (self.graded_count or 0) >= AVERAGE_MIN_GRADED)
+        if done and self.status == 'active':
+            self.status = 'completed'
+        elif not done and self.status == 'completed':
+            self.status = 'active'
+
     def complete_goal(self):
         """Mark goal as completed."""
         self.status = 'completed'
         self.progress_percentage = 100
         self.updated_at = datetime.utcnow()
 
+    # Compact ?format=columns encoding; colors and icons are looked up on the
+    # client from status, goal_type and progress_percentage.
+    COLUMNS = (
+        Column('id'),
+        Column('student_id'),
+        Column('subject_id'),
+        Column('title'),
+        Column('description'),
+        Column('target_date'),
+        Column('goal_type', enum=('academic', 'behavioral', 'skill')),
+        Column('status', enum=('active', 'completed', 'paused', 'cancelled')),
+        Column('progress_percentage'),
+        Column('progress_mode', enum=AUTO_PROGRESS_MODES + ('manual',)),
+        Column('target_value'),
+        Column('graded_count'),
+        Column('grade_average', get=grade_average),
+        Column('notes'),
+        Column('is_overdue', get=is_overdue),
+        Column('days_until_target', get=days_until_target),
+        Column('created_at'),
+        Column('updated_at'),
+    )
+
     def __repr__(self):
         return f'<Goal {self.title}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'student_id': self.student_id,
-            'subject_id': self.subject_id,
-            'title': self.title,
-            'description': self.description,
-            'target_date': self.target_date.isoformat() if self.target_date else None,
-            'goal_type': self.goal_type,
-            'status': self.status,
-            'progress_percentage': self.progress_percentage,
-            'notes': self.notes,
-            'is_overdue': self.is_overdue(),
-            'days_until_target': self.days_until_target(),
-            'status_color': self.get_status_color(),
-            'status_icon': self.get_status_icon(),
-            'type_icon': self.get_type_icon(),
-            'progress_color': self.get_progress_color(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        data['grade_average'] = self.grade_average()
+        data['is_overdue'] = self.is_overdue()
+        data['days_until_target'] = self.days_until_target()
+        data['status_color'] = self.get_status_color()
+        data['status_icon'] = self.get_status_icon()
+        data['type_icon'] = self.get_type_icon()
+        data['progress_color'] = self.get_progress_color()
+        return fields.filter(data)
+
 
+_serialize_columns = column_serializer(Goal, (
+    'id', 'student_id', 'subject_id', 'title', 'description', 'target_date', 'goal_type', 'status',
+    'progress_percentage', 'progress_mode', 'target_value', 'graded_count', 'notes', 'created_at',
+    'updated_at',
+))
@@ -1,4 +1,6 @@
 from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
 from datetime import datetime
 import json
 
@@ -6,13 +8,13 @@ class Grade(db.Model):
     __tablename__ = 'grades'
     
     id = db.Column(db.Integer, primary_key=True)
-    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id'), nullable=False, index=True)
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, index=True)
     points_earned = db.Column(db.Numeric(5, 2))
     percentage = db.Column(db.Numeric(5, 2))
     grade_letter = db.Column(db.String(2))
     feedback = db.Column(db.Text)
     rubric_scores = db.Column(db.Text)  # JSON object for detailed rubric scoring
-    graded_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    graded_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'))
     graded_at = db.Column(db.DateTime, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -102,20 +104,19 @@ class Grade(db.Model):
     def __repr__(self):
         return f'<Grade {self.grade_letter} ({self.percentage}%)>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'assignment_id': self.assignment_id,
-            'points_earned': float(self.points_earned) if self.points_earned else None,
-            'percentage': float(self.percentage) if self.percentage else None,
-            'grade_letter': self.grade_letter,
-            'feedback': self.feedback,
-            'rubric_scores': self.get_rubric_scores(),
-            'graded_by': self.graded_by,
-            'grader_name': f"{self.grader.first_name} {self.grader.last_name}" if self.grader else None,
-            'graded_at': self.graded_at.isoformat() if self.graded_at else None,
-            'grade_color': self.get_grade_color(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        data['rubric_scores'] = self.get_rubric_scores()
+        data['grade_color'] = self.get_grade_color()
+        
+        # Loads the grader relationship
+        if fields.wants('grader_name'):
+            data['grader_name'] = f"{self.grader.first_name} {self.grader.last_name}" if self.grader else None
+        
+        return fields.filter(data)
+
 
+_serialize_columns = column_serializer(Grade, (
+    'id', 'assignment_id', 'points_earned', 'percentage', 'grade_letter', 'feedback', 'graded_by',
+    'graded_at', 'created_at', 'updated_at',
+))
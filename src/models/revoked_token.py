@@ -0,0 +1,17 @@
+from src.models.user import db
+from datetime import datetime
+
+class RevokedToken(db.Model):
+    """A JWT revoked before its expiry; rows are purged once it has expired."""
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    # access, refresh, or user: every token of user_id issued before revoked_at
+    token_type = db.Column(db.String(10), nullable=False)
+    # Not a foreign key: revocations outlive the accounts they belonged to.
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
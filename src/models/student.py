@@ -1,11 +1,13 @@
 from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
 from datetime import datetime
 
 class Student(db.Model):
     __tablename__ = 'students'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     date_of_birth = db.Column(db.Date, nullable=False)
@@ -18,10 +20,10 @@ class Student(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    assignments = db.relationship('Assignment', backref='student', lazy=True, cascade='all, delete-orphan')
-    attendance_records = db.relationship('Attendance', backref='student', lazy=True, cascade='all, delete-orphan')
-    goals = db.relationship('Goal', backref='student', lazy=True, cascade='all, delete-orphan')
-    activities = db.relationship('Activity', backref='student', lazy=True, cascade='all, delete-orphan')
+    assignments = db.relationship('Assignment', backref='student', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    attendance_records = db.relationship('Attendance', backref='student', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    goals = db.relationship('Goal', backref='student', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    activities = db.relationship('Activity', backref='student', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
     def get_age(self):
         """Calculate student's current age."""
@@ -33,66 +35,115 @@ class Student(db.Model):
         """Get student's full name."""
         return f"{self.first_name} {self.last_name}"
 
+    @staticmethod
+    def _gpa(percentages):
+        """Average of the non-null grade percentages."""
+        valid = [percentage for percentage in percentages if percentage is not None]
+        return round(sum(valid) / len(valid), 2) if valid else None
+
+    @staticmethod
+    def _attendance_rate(statuses):
+        """Share of attendance records marked present."""
+        if not statuses:
+            return None
+        present_days = sum(1 for status in statuses if status == 'present')
+        return round((present_days / len(statuses)) * 100, 1)
+
+    @staticmethod
+    def _attendance_window(days):
+        from datetime import date, timedelta
+        end_date = date.today()
+        return end_date - timedelta(days=days), end_date
+
     def get_current_gpa(self):
         """Calculate current GPA based on graded assignments."""
+        preloaded = getattr(self, '_preloaded_stats', {})
+        if 'current_gpa' in preloaded:
+            return preloaded['current_gpa']
+
         from src.models.assignment import Assignment
         from src.models.grade import Grade
         
-        # Get all graded assignments for this student
-        graded_assignments = db.session.query(Assignment, Grade).join(
-            Grade, Assignment.id == Grade.assignment_id
+        # Get all grade percentages for this student
+        percentages = db.session.query(Grade.percentage).join(
+            Assignment, Assignment.id == Grade.assignment_id
         ).filter(Assignment.student_id == self.id).all()
         
-        if not graded_assignments:
-            return None
-            
-        total_percentage = sum(grade.percentage for _, grade in graded_assignments if grade.percentage is not None)
-        count = len([grade for _, grade in graded_assignments if grade.percentage is not None])
-        
-        return round(total_percentage / count, 2) if count > 0 else None
+        return self._gpa([percentage for percentage, in percentages])
 
     def get_attendance_rate(self, days=30):
         """Calculate attendance rate for the last N days."""
+        preloaded = getattr(self, '_preloaded_stats', {})
+        if days == 30 and 'attendance_rate' in preloaded:
+            return preloaded['attendance_rate']
+
         from src.models.attendance import Attendance
-        from datetime import date, timedelta
-        
-        end_date = date.today()
-        start_date = end_date - timedelta(days=days)
         
-        attendance_records = Attendance.query.filter(
+        start_date, end_date = self._attendance_window(days)
+        statuses = db.session.query(Attendance.status).filter(
             Attendance.student_id == self.id,
             Attendance.date >= start_date,
             Attendance.date <= end_date
         ).all()
         
-        if not attendance_records:
-            return None
-            
-        present_days = sum(1 for record in attendance_records if record.status == 'present')
-        total_days = len(attendance_records)
-        
-        return round((present_days / total_days) * 100, 1) if total_days > 0 else None
+        return self._attendance_rate([status for status, in statuses])
+
+    @staticmethod
+    def preload_stats(students, fields=ALL_FIELDS):
+        """Compute the requested per-student statistics for a list in one query each."""
+        from src.models.assignment import Assignment
+        from src.models.attendance import Attendance
+        from src.models.grade import Grade
+
+        if not students:
+            return
+        ids = [student.id for student in students]
+        stats = {student_id: {} for student_id in ids}
+
+        if fields.wants('current_gpa'):
+            percentages = {student_id: [] for student_id in ids}
+            rows = db.session.query(Assignment.student_id, Grade.percentage).join(
+                Grade, Assignment.id == Grade.assignment_id
+            ).filter(Assignment.student_id.in_(ids)).all()
+            for student_id, percentage in rows:
+                percentages[student_id].append(percentage)
+            for student_id, values in percentages.items():
+                stats[student_id]['current_gpa'] = Student._gpa(values)
+
+        if fields.wants('attendance_rate'):
+            start_date, end_date = Student._attendance_window(30)
+            statuses = {student_id: [] for student_id in ids}
+            rows = db.session.query(Attendance.student_id, Attendance.status).filter(
+                Attendance.student_id.in_(ids),
+                Attendance.date >= start_date,
+                Attendance.date <= end_date
+            ).all()
+            for student_id, status in rows:
+                statuses[student_id].append(status)
+            for student_id, values in statuses.items():
+                stats[student_id]['attendance_rate'] = Student._attendance_rate(values)
+
+        for student in students:
+            student._preloaded_stats = stats[student.id]
 
     def __repr__(self):
         return f'<Student {self.get_full_name()}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'full_name': self.get_full_name(),
-            'date_of_birth': self.date_of_birth.isoformat() if self.date_of_birth else None,
-            'age': self.get_age(),
-            'grade_level': self.grade_level,
-            'student_id': self.student_id,
-            'profile_picture': self.profile_picture,
-            'notes': self.notes,
-            'active': self.active,
-            'current_gpa': self.get_current_gpa(),
-            'attendance_rate': self.get_attendance_rate(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        data['full_name'] = self.get_full_name()
+        data['age'] = self.get_age()
+        
+        # Computed from grades and attendance records
+        if fields.wants('current_gpa'):
+            data['current_gpa'] = self.get_current_gpa()
+        if fields.wants('attendance_rate'):
+            data['attendance_rate'] = self.get_attendance_rate()
+        
+        return fields.filter(data)
+
 
+_serialize_columns = column_serializer(Student, (
+    'id', 'user_id', 'first_name', 'last_name', 'date_of_birth', 'grade_level', 'student_id',
+    'profile_picture', 'notes', 'active', 'created_at', 'updated_at',
+))
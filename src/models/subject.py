@@ -1,11 +1,13 @@
 from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
 from datetime import datetime
 
 class Subject(db.Model):
     __tablename__ = 'subjects'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     color = db.Column(db.String(7))  # Hex color code for UI
@@ -13,41 +15,83 @@ class Subject(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
-    assignments = db.relationship('Assignment', backref='subject', lazy=True)
-    goals = db.relationship('Goal', backref='subject', lazy=True)
+    assignments = db.relationship('Assignment', backref='subject', lazy=True, passive_deletes=True)
+    goals = db.relationship('Goal', backref='subject', lazy=True, passive_deletes=True)
+
+    @staticmethod
+    def _average(percentages):
+        """Average of the non-null grade percentages."""
+        valid_grades = [percentage for percentage in percentages if percentage is not None]
+        return round(sum(valid_grades) / len(valid_grades), 2) if valid_grades else None
 
     def get_assignment_count(self):
         """Get total number of assignments for this subject."""
+        preloaded = getattr(self, '_preloaded_stats', {})
+        if 'assignment_count' in preloaded:
+            return preloaded['assignment_count']
         return len(self.assignments)
 
     def get_average_grade(self):
         """Calculate average grade for all assignments in this subject."""
+        preloaded = getattr(self, '_preloaded_stats', {})
+        if 'average_grade' in preloaded:
+            return preloaded['average_grade']
+
         from src.models.grade import Grade
         from src.models.assignment import Assignment
         
-        grades = db.session.query(Grade).join(
+        percentages = db.session.query(Grade.percentage).join(
             Assignment, Grade.assignment_id == Assignment.id
         ).filter(Assignment.subject_id == self.id).all()
         
-        if not grades:
-            return None
-            
-        valid_grades = [grade.percentage for grade in grades if grade.percentage is not None]
-        return round(sum(valid_grades) / len(valid_grades), 2) if valid_grades else None
+        return self._average([percentage for percentage, in percentages])
+
+    @staticmethod
+    def preload_stats(subjects, fields=ALL_FIELDS):
+        """Compute the requested per-subject statistics for a list in one query each."""
+        from src.models.grade import Grade
+        from src.models.assignment import Assignment
+
+        if not subjects:
+            return
+        ids = [subject.id for subject in subjects]
+        stats = {subject_id: {} for subject_id in ids}
+
+        if fields.wants('assignment_count'):
+            counts = dict(db.session.query(Assignment.subject_id, db.func.count(Assignment.id)).filter(
+                Assignment.subject_id.in_(ids)
+            ).group_by(Assignment.subject_id).all())
+            for subject_id in ids:
+                stats[subject_id]['assignment_count'] = counts.get(subject_id, 0)
+
+        if fields.wants('average_grade'):
+            percentages = {subject_id: [] for subject_id in ids}
+            rows = db.session.query(Assignment.subject_id, Grade.percentage).join(
+                Grade, Assignment.id == Grade.assignment_id
+            ).filter(Assignment.subject_id.in_(ids)).all()
+            for subject_id, percentage in rows:
+                percentages[subject_id].append(percentage)
+            for subject_id, values in percentages.items():
+                stats[subject_id]['average_grade'] = Subject._average(values)
+
+        for subject in subjects:
+            subject._preloaded_stats = stats[subject.id]
 
     def __repr__(self):
         return f'<Subject {self.name}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'name': self.name,
-            'description': self.description,
-            'color': self.color,
-            'active': self.active,
-            'assignment_count': self.get_assignment_count(),
-            'average_grade': self.get_average_grade(),
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        
+        # Computed from the subject's assignments and grades
+        if fields.wants('assignment_count'):
+            data['assignment_count'] = self.get_assignment_count()
+        if fields.wants('average_grade'):
+            data['average_grade'] = self.get_average_grade()
+        
+        return fields.filter(data)
+
 
+_serialize_columns = column_serializer(Subject, (
+    'id', 'user_id', 'name', 'description', 'color', 'active', 'created_at',
+))
@@ -1,4 +1,6 @@
 from src.models.user import db
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
 from datetime import datetime
 import os
 
@@ -6,7 +8,7 @@ class Submission(db.Model):
     __tablename__ = 'submissions'
     
     id = db.Column(db.Integer, primary_key=True)
-    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id'), nullable=False, index=True)
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, index=True)
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     file_path = db.Column(db.String(500))
     file_name = db.Column(db.String(255))
@@ -15,6 +17,7 @@ class Submission(db.Model):
     notes = db.Column(db.Text)
     status = db.Column(db.String(20), default='submitted')  # submitted, reviewed, returned
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def get_file_size_formatted(self):
         """Get formatted file size string."""
@@ -79,23 +82,22 @@ class Submission(db.Model):
     def __repr__(self):
         return f'<Submission {self.file_name}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'assignment_id': self.assignment_id,
-            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
-            'file_path': self.file_path,
-            'file_name': self.file_name,
-            'file_size': self.file_size,
-            'file_size_formatted': self.get_file_size_formatted(),
-            'mime_type': self.mime_type,
-            'file_extension': self.get_file_extension(),
-            'file_icon': self.get_file_icon(),
-            'is_image': self.is_image(),
-            'is_document': self.is_document(),
-            'file_exists': self.file_exists(),
-            'notes': self.notes,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        data['file_size_formatted'] = self.get_file_size_formatted()
+        data['file_extension'] = self.get_file_extension()
+        data['file_icon'] = self.get_file_icon()
+        data['is_image'] = self.is_image()
+        data['is_document'] = self.is_document()
+        
+        # Touches the filesystem
+        if fields.wants('file_exists'):
+            data['file_exists'] = self.file_exists()
+        
+        return fields.filter(data)
+
 
+_serialize_columns = column_serializer(Submission, (
+    'id', 'assignment_id', 'submitted_at', 'file_path', 'file_name', 'file_size', 'mime_type', 'notes',
+    'status', 'created_at', 'updated_at',
+))
@@ -1,9 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
+from src.utils.fields import ALL_FIELDS
+from src.utils.serializers import column_serializer
+from src.utils.replicas import RoutingSession
 from datetime import datetime
 import json
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -18,11 +21,17 @@ class User(db.Model):
     preferences = db.Column(db.Text)  # JSON string for user preferences
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set when the account is deleted; the row goes once its data is purged
+    deleted_at = db.Column(db.DateTime, index=True)
+    # When a worker last claimed or advanced the purge of a deleted account
+    purge_started_at = db.Column(db.DateTime)
+    # Tokens issued before this are revoked (password change, deletion)
+    tokens_valid_after = db.Column(db.DateTime)
     
     # Relationships
-    students = db.relationship('Student', backref='parent', lazy=True, cascade='all, delete-orphan')
-    subjects = db.relationship('Subject', backref='user', lazy=True, cascade='all, delete-orphan')
-    academic_periods = db.relationship('AcademicPeriod', backref='user', lazy=True, cascade='all, delete-orphan')
+    students = db.relationship('Student', backref='parent', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    subjects = db.relationship('Subject', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    academic_periods = db.relationship('AcademicPeriod', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
     def set_password(self, password):
         """Hash and set the user's password."""
@@ -45,15 +54,12 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'timezone': self.timezone,
-            'preferences': self.get_preferences(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    def to_dict(self, fields=ALL_FIELDS):
+        data = _serialize_columns(self)
+        data['preferences'] = self.get_preferences()
+        return fields.filter(data)
+
+
+_serialize_columns = column_serializer(User, (
+    'id', 'username', 'email', 'first_name', 'last_name', 'timezone', 'created_at', 'updated_at',
+))
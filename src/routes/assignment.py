@@ -1,16 +1,26 @@
 from flask import Blueprint, jsonify, request
-from src.models import db, Assignment, Grade, Student, Subject, Submission
+from src.models import db, Assignment, AssignmentSchedule, Grade, Student, Subject, Submission
+from src.models.assignment_schedule import parse_rrule
 from src.routes.user import login_required, get_current_user
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from src.utils.request_utils import get_json_data
+from src.utils.conditional import response_version, scope, assignment_scopes
+from src.utils.fields import requested_fields
+from src.utils.columnar import jsonify_list
+from src.utils.response_cache import cached_response
+from src.utils.schedules import horizon, materialize, reset_future
 
 assignment_bp = Blueprint('assignment', __name__)
 
 @assignment_bp.route('/assignments', methods=['GET'])
+@cached_response
 @login_required
 def get_assignments():
     """Get all assignments for the current user's students."""
     current_user = get_current_user()
+    version = response_version(*assignment_scopes(Student.user_id == current_user.id), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
     
     # Get query parameters for filtering
     student_id = request.args.get('student_id', type=int)
@@ -19,7 +29,10 @@ def get_assignments():
     limit = request.args.get('limit', type=int)
     
     # Base query - only assignments for current user's students
-    query = db.session.query(Assignment).join(Student).filter(Student.user_id == current_user.id)
+    fields = requested_fields()
+    query = db.session.query(Assignment).options(*Assignment.load_options(fields)).join(Student).filter(
+        Student.user_id == current_user.id
+    )
     
     # Apply filters
     if student_id:
@@ -36,7 +49,7 @@ def get_assignments():
         query = query.limit(limit)
     
     assignments = query.all()
-    return jsonify([assignment.to_dict() for assignment in assignments])
+    return version.apply(jsonify_list(Assignment, assignments, fields))
 
 @assignment_bp.route('/assignments', methods=['POST'])
 @login_required
@@ -106,8 +119,11 @@ def get_assignment(assignment_id):
         Assignment.id == assignment_id,
         Student.user_id == current_user.id
     ).first_or_404()
+    version = response_version(*assignment_scopes(Assignment.id == assignment_id), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
     
-    return jsonify(assignment.to_dict())
+    return version.apply(jsonify(assignment.to_dict(requested_fields())))
 
 @assignment_bp.route('/assignments/<int:assignment_id>', methods=['PUT'])
 @login_required
@@ -240,10 +256,14 @@ def get_assignment_grade(assignment_id):
         Student.user_id == current_user.id
     ).first_or_404()
     
+    version = response_version(*assignment_scopes(Assignment.id == assignment_id), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
+    
     if not assignment.grade:
         return jsonify({'error': 'Assignment not graded yet'}), 404
     
-    return jsonify(assignment.grade.to_dict())
+    return version.apply(jsonify(assignment.grade.to_dict(requested_fields())))
 
 @assignment_bp.route('/assignments/<int:assignment_id>/grade', methods=['PUT'])
 @login_required
@@ -317,59 +337,207 @@ def get_assignment_submissions(assignment_id):
         Assignment.id == assignment_id,
         Student.user_id == current_user.id
     ).first_or_404()
+    version = response_version(*assignment_scopes(Assignment.id == assignment_id), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
     
     submissions = Submission.query.filter_by(assignment_id=assignment_id).order_by(
         Submission.submitted_at.desc()
     ).all()
     
-    return jsonify([submission.to_dict() for submission in submissions])
+    fields = requested_fields()
+    return version.apply(jsonify([submission.to_dict(fields) for submission in submissions]))
 
 # Dashboard and analytics routes
 @assignment_bp.route('/assignments/dashboard', methods=['GET'])
+@cached_response
 @login_required
 def get_assignments_dashboard():
     """Get assignment dashboard data."""
     current_user = get_current_user()
+    version = response_version(
+        scope(Student, Student.user_id == current_user.id),
+        *assignment_scopes(Student.user_id == current_user.id),
+        scope(AssignmentSchedule, Student.user_id == current_user.id,
+              joins=[(Student, AssignmentSchedule.student_id == Student.id)]),
+        user_id=current_user.id
+    )
+    if version.is_fresh():
+        return version.not_modified()
+    
+    fields = requested_fields()
+    load_options = Assignment.load_options(fields)
     
     # Get assignments that need attention
-    overdue_assignments = db.session.query(Assignment).join(Student).filter(
+    overdue_assignments = db.session.query(Assignment).options(*load_options).join(Student).filter(
         Student.user_id == current_user.id,
         Assignment.due_date < date.today(),
         Assignment.status.in_(['assigned', 'in_progress'])
     ).all()
     
     # Get assignments due soon (next 7 days)
-    from datetime import timedelta
-    due_soon = db.session.query(Assignment).join(Student).filter(
+    due_soon = db.session.query(Assignment).options(*load_options).join(Student).filter(
         Student.user_id == current_user.id,
         Assignment.due_date >= date.today(),
         Assignment.due_date <= date.today() + timedelta(days=7),
         Assignment.status.in_(['assigned', 'in_progress'])
     ).all()
     
+    # Scheduled occurrences in that week not created as rows yet
+    week_end = date.today() + timedelta(days=7)
+    behind = db.session.query(AssignmentSchedule).join(Student).filter(
+        Student.user_id == current_user.id,
+        AssignmentSchedule.active.is_(True),
+        AssignmentSchedule.start_date <= week_end,
+        db.or_(AssignmentSchedule.materialized_through.is_(None),
+               AssignmentSchedule.materialized_through < week_end)
+    ).all()
+    scheduled = sorted(
+        (schedule.occurrence_dict(day) for schedule in behind
+         for day in schedule.pending_occurrences(date.today(), week_end)),
+        key=lambda occurrence: occurrence['due_date']
+    )
+    
     # Get assignments needing grading
-    need_grading = db.session.query(Assignment).join(Student).filter(
+    need_grading = db.session.query(Assignment).options(*load_options).join(Student).filter(
         Student.user_id == current_user.id,
         Assignment.status == 'submitted'
     ).all()
     
     # Get recent activity
-    recent_assignments = db.session.query(Assignment).join(Student).filter(
+    recent_assignments = db.session.query(Assignment).options(*load_options).join(Student).filter(
         Student.user_id == current_user.id
     ).order_by(Assignment.updated_at.desc()).limit(10).all()
     
+    total_assignments = db.session.query(db.func.count(Assignment.id)).join(Student).filter(
+        Student.user_id == current_user.id
+    ).scalar()
+    
     dashboard_data = {
-        'overdue_assignments': [assignment.to_dict() for assignment in overdue_assignments],
-        'due_soon': [assignment.to_dict() for assignment in due_soon],
-        'need_grading': [assignment.to_dict() for assignment in need_grading],
-        'recent_activity': [assignment.to_dict() for assignment in recent_assignments],
+        'overdue_assignments': [assignment.to_dict(fields) for assignment in overdue_assignments],
+        'due_soon': [assignment.to_dict(fields) for assignment in due_soon],
+        'scheduled': scheduled,
+        'need_grading': [assignment.to_dict(fields) for assignment in need_grading],
+        'recent_activity': [assignment.to_dict(fields) for assignment in recent_assignments],
         'stats': {
-            'total_assignments': len(current_user.students[0].assignments) if current_user.students else 0,
+            'total_assignments': total_assignments,
             'overdue_count': len(overdue_assignments),
             'due_soon_count': len(due_soon),
+            'scheduled_count': len(scheduled),
             'need_grading_count': len(need_grading)
         }
     }
     
-    return jsonify(dashboard_data)
+    return version.apply(jsonify(dashboard_data))
+
+
+# Recurring schedule routes
+SCHEDULE_TEMPLATE_FIELDS = ('title', 'description', 'instructions', 'estimated_duration', 'points_total',
+                            'assignment_type', 'difficulty_level', 'priority')
+
+@assignment_bp.route('/assignments/schedules', methods=['GET'])
+@cached_response
+@login_required
+def get_assignment_schedules():
+    """Get recurring assignment schedules for the current user's students."""
+    current_user = get_current_user()
+    query = db.session.query(AssignmentSchedule).join(Student).filter(Student.user_id == current_user.id)
+    student_id = request.args.get('student_id', type=int)
+    if student_id:
+        query = query.filter(AssignmentSchedule.student_id == student_id)
+    fields = requested_fields()
+    return jsonify([schedule.to_dict(fields) for schedule in query.order_by(AssignmentSchedule.id)])
 
+@assignment_bp.route('/assignments/schedules', methods=['POST'])
+@login_required
+def create_assignment_schedule():
+    """Create a recurring assignment schedule and its first window of assignments."""
+    current_user = get_current_user()
+    data, error, status = get_json_data(['student_id', 'title', 'rrule'])
+    if error:
+        return error, status
+    
+    student = Student.query.filter_by(id=data['student_id'], user_id=current_user.id).first()
+    if not student:
+        return jsonify({'error': 'Student not found or access denied'}), 404
+    if data.get('subject_id'):
+        subject = Subject.query.filter_by(id=data['subject_id'], user_id=current_user.id).first()
+        if not subject:
+            return jsonify({'error': 'Subject not found or access denied'}), 404
+    
+    try:
+        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data.get('start_date') else date.today()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    try:
+        parse_rrule(data['rrule'], start_date)
+    except (ValueError, AttributeError) as exc:
+        return jsonify({'error': f'Invalid rrule: {exc}'}), 400
+    
+    schedule = AssignmentSchedule(
+        student_id=student.id,
+        subject_id=data.get('subject_id'),
+        rrule=data['rrule'].strip(),
+        start_date=start_date,
+        # Occurrences before today are not created retroactively
+        materialized_through=max(start_date, date.today()) - timedelta(days=1),
+        **{field: data[field] for field in SCHEDULE_TEMPLATE_FIELDS if data.get(field) is not None}
+    )
+    db.session.add(schedule)
+    db.session.flush()
+    created = materialize(schedule, horizon())
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Schedule created successfully',
+        'schedule': schedule.to_dict(),
+        'assignments_created': created
+    }), 201
+
+@assignment_bp.route('/assignments/schedules/<int:schedule_id>', methods=['PUT'])
+@login_required
+def update_assignment_schedule(schedule_id):
+    """Update a schedule; future untouched occurrences follow the change."""
+    current_user = get_current_user()
+    schedule = db.session.query(AssignmentSchedule).join(Student).filter(
+        AssignmentSchedule.id == schedule_id,
+        Student.user_id == current_user.id
+    ).first_or_404()
+    
+    data, error, status = get_json_data()
+    if error:
+        return error, status
+    
+    if 'rrule' in data:
+        try:
+            parse_rrule(data['rrule'], schedule.start_date)
+        except (ValueError, AttributeError) as exc:
+            return jsonify({'error': f'Invalid rrule: {exc}'}), 400
+        schedule.rrule = data['rrule'].strip()
+    for field in SCHEDULE_TEMPLATE_FIELDS:
+        if field in data:
+            setattr(schedule, field, data[field])
+    if 'active' in data:
+        schedule.active = bool(data['active'])
+    
+    reset_future(schedule)
+    created = materialize(schedule, horizon()) if schedule.active else 0
+    db.session.commit()
+    
+    return jsonify({'schedule': schedule.to_dict(), 'assignments_created': created})
+
+@assignment_bp.route('/assignments/schedules/<int:schedule_id>', methods=['DELETE'])
+@login_required
+def delete_assignment_schedule(schedule_id):
+    """Delete a schedule and its future untouched occurrences; past work is kept."""
+    current_user = get_current_user()
+    schedule = db.session.query(AssignmentSchedule).join(Student).filter(
+        AssignmentSchedule.id == schedule_id,
+        Student.user_id == current_user.id
+    ).first_or_404()
+    
+    reset_future(schedule)
+    db.session.delete(schedule)
+    db.session.commit()
+    
+    return jsonify({'message': 'Schedule deleted successfully'})
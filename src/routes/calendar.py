@@ -0,0 +1,106 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import func, literal, select, union_all
+from src.models import db, Assignment, AssignmentSchedule, Attendance, Goal, Student
+from src.routes.user import login_required, get_current_user
+from datetime import date, datetime, timedelta
+from src.utils.response_cache import cached_response
+from src.utils.schedules import schedules_behind
+
+calendar_bp = Blueprint('calendar', __name__)
+
+# Longest range one request may cover (a six-week month grid fits)
+MAX_CALENDAR_DAYS = 93
+
+def _calendar_range():
+    """(start, end) from the query string, defaulting to the current month."""
+    today = date.today()
+    start = request.args.get('start')
+    end = request.args.get('end')
+    start = datetime.strptime(start, '%Y-%m-%d').date() if start else today.replace(day=1)
+    if end:
+        end = datetime.strptime(end, '%Y-%m-%d').date()
+    else:
+        end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+@calendar_bp.route('/calendar', methods=['GET'])
+@cached_response
+@login_required
+def get_calendar():
+    """Per-day assignment, attendance and goal buckets for a date range."""
+    current_user = get_current_user()
+    try:
+        start, end = _calendar_range()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    if end < start:
+        return jsonify({'error': 'end must not be before start'}), 400
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        return jsonify({'error': f'Range may span at most {MAX_CALENDAR_DAYS} days'}), 400
+
+    students = select(Student.id).where(Student.user_id == current_user.id)
+    student_id = request.args.get('student_id', type=int)
+    if student_id:
+        students = students.where(Student.id == student_id)
+    students = students.scalar_subquery()
+
+    days = {}
+
+    def bucket(day):
+        if day not in days:
+            days[day] = {
+                'date': day.isoformat(),
+                'assignments': {'total': 0, 'by_status': {}, 'estimated_minutes': 0},
+                'attendance': [],
+                'goals': [],
+            }
+        return days[day]
+
+    # Assignments, aggregated per day and status
+    assignment_rows = db.session.execute(
+        select(
+            Assignment.due_date, Assignment.status, func.count(),
+            func.coalesce(func.sum(Assignment.estimated_duration), 0),
+        )
+        .where(Assignment.student_id.in_(students), Assignment.due_date.between(start, end))
+        .group_by(Assignment.due_date, Assignment.status)
+    )
+    for due_date, status, count, minutes in assignment_rows:
+        totals = bucket(due_date)['assignments']
+        totals['total'] += count
+        totals['by_status'][status] = count
+        totals['estimated_minutes'] += int(minutes)
+
+    # Recurring occurrences past their schedule's materialized window
+    for schedule in db.session.execute(
+        schedules_behind(end).where(AssignmentSchedule.student_id.in_(students))
+    ).scalars():
+        for due_date in schedule.pending_occurrences(start, end):
+            totals = bucket(due_date)['assignments']
+            totals['total'] += 1
+            totals['by_status']['assigned'] = totals['by_status'].get('assigned', 0) + 1
+            totals['estimated_minutes'] += schedule.estimated_duration or 0
+
+    # Attendance and goal target dates, one slim row each
+    attendance = select(
+        Attendance.date.label('day'), literal('attendance').label('kind'), Attendance.student_id,
+        Attendance.id.label('item_id'), literal(None).label('title'), Attendance.status,
+    ).where(Attendance.student_id.in_(students), Attendance.date.between(start, end))
+    goals = select(
+        Goal.target_date.label('day'), literal('goal').label('kind'), Goal.student_id,
+        Goal.id.label('item_id'), Goal.title, Goal.status,
+    ).where(Goal.student_id.in_(students), Goal.target_date.between(start, end))
+    for day, kind, row_student_id, item_id, title, status in db.session.execute(union_all(attendance, goals)):
+        if isinstance(day, str):
+            # SQLite returns dates from a compound SELECT untyped
+            day = date.fromisoformat(day)
+        if kind == 'attendance':
+            bucket(day)['attendance'].append({'student_id': row_student_id, 'status': status})
+        else:
+            bucket(day)['goals'].append({'id': item_id, 'student_id': row_student_id, 'title': title, 'status': status})
+
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': [days[day] for day in sorted(days)],
+    })
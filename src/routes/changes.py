@@ -0,0 +1,92 @@
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from src.models import db, Assignment, Change, Grade, Student
+from src.routes.user import login_required, get_current_user
+from src.utils.changes import make_cursor, parse_cursor, snapshot_xmin, tracked_models
+from src.utils.fields import requested_fields
+import time
+
+changes_bp = Blueprint('changes', __name__)
+
+def _load_rows(model, ids, fields):
+    """Current rows of model with the given ids, loaded for serialization."""
+    query = model.query.filter(model.id.in_(ids))
+    if model is Assignment:
+        query = query.options(*Assignment.load_options(fields))
+    elif model is Grade and fields.wants('grader_name'):
+        query = query.options(selectinload(Grade.grader))
+    rows = query.all()
+    if model is Student:
+        Student.preload_stats(rows, fields)
+    return rows
+
+@changes_bp.route('/changes', methods=['GET'])
+@login_required
+def get_changes():
+    """Rows changed since a cursor, compacted to their latest state (see src.utils.changes)."""
+    current_user = get_current_user()
+    since = request.args.get('since')
+    # Taken before reading changes: every transaction older than this has committed
+    xmin = snapshot_xmin(db.session.connection())
+    if not since:
+        # Start of a sync: take a cursor, then load the collections.
+        latest = db.session.execute(
+            select(func.max(Change.id)).where(Change.user_id == current_user.id)
+        ).scalar()
+        cursor = make_cursor(latest or 0, xmin=xmin)
+        return jsonify({'cursor': cursor, 'has_more': False, 'upserted': {}, 'deleted': {}})
+    try:
+        since_id, issued, since_xmin = parse_cursor(since)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    if time.time() - issued > current_app.config['CHANGES_RETENTION_DAYS'] * 86400:
+        return jsonify({'error': 'Cursor expired, reload all data and start a new sync'}), 410
+
+    page_size = current_app.config['CHANGES_PAGE_SIZE']
+    page_size = max(1, min(request.args.get('limit', page_size, type=int), page_size))
+    # Latest change of each row changed after the cursor, oldest first
+    latest = db.session.execute(
+        select(func.max(Change.id))
+        .where(Change.user_id == current_user.id, Change.id > since_id)
+        .group_by(Change.entity, Change.entity_id)
+        .order_by(func.max(Change.id))
+        .limit(page_size + 1)
+    ).scalars().all()
+    has_more = len(latest) > page_size
+    latest = latest[:page_size]
+    page_end = latest[-1] if latest else since_id
+    if since_xmin is not None:
+        # Changes below the cursor whose transactions were still in flight when it was issued
+        latest += db.session.execute(
+            select(func.max(Change.id))
+            .where(Change.user_id == current_user.id, Change.id <= since_id, Change.xid >= since_xmin)
+            .group_by(Change.entity, Change.entity_id)
+        ).scalars().all()
+    changes = db.session.execute(
+        select(Change.id, Change.entity, Change.entity_id, Change.operation)
+        .where(Change.id.in_(latest))
+        .order_by(Change.id)
+    ).all() if latest else []
+    # A row changed both below and after the cursor keeps only its latest change
+    newest = {(change.entity, change.entity_id): change for change in changes}
+    changes = sorted(newest.values(), key=lambda change: change.id)
+
+    models = tracked_models()
+    fields = requested_fields()
+    upserts, deleted = {}, {}
+    for change in changes:
+        target = upserts if change.operation == 'upsert' else deleted
+        target.setdefault(change.entity, []).append(change.entity_id)
+
+    upserted = {}
+    for entity, ids in upserts.items():
+        rows = _load_rows(models[entity], ids, fields)
+        upserted[entity] = [row.to_dict(fields) for row in rows]
+        # Removed since, by a cascade that left no tombstone
+        gone = set(ids) - {row.id for row in rows}
+        if gone:
+            deleted.setdefault(entity, []).extend(sorted(gone))
+
+    cursor = make_cursor(page_end, xmin=xmin)
+    return jsonify({'cursor': cursor, 'has_more': has_more, 'upserted': upserted, 'deleted': deleted})
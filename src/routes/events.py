@@ -0,0 +1,47 @@
+from flask import Blueprint, Response, current_app, jsonify
+from src.routes.user import login_required, get_current_user
+import json
+import time
+
+events_bp = Blueprint('events', __name__)
+
+def _stream(subscription, lifetime, heartbeat):
+    """SSE frames for a subscription until its lifetime is up."""
+    # Reconnect soon after the stream ends; the dashboard catches up via /api/changes.
+    yield 'retry: 3000\n\n'
+    deadline = time.monotonic() + lifetime
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        item = subscription.get(timeout=min(heartbeat, remaining))
+        if item is None:
+            yield ': keep-alive\n\n'
+            continue
+        data = {key: value for key, value in item.items() if key != 'type'}
+        yield f"event: {item['type']}\ndata: {json.dumps(data)}\n\n"
+
+@events_bp.route('/events', methods=['GET'])
+@login_required
+def stream_events():
+    """Server-Sent Events for the current user's data (see src.utils.events)."""
+    broker = current_app.extensions.get('events')
+    if broker is None:
+        return jsonify({'error': 'Live updates are disabled'}), 404
+    subscription = broker.subscribe(get_current_user().id)
+    if subscription is None:
+        response = jsonify({'error': 'Too many live connections, poll instead'})
+        response.headers['Retry-After'] = str(current_app.config['EVENTS_STREAM_SECONDS'])
+        return response, 503
+
+    # Not wrapped in stream_with_context: the request's database session is
+    # released when the view returns instead of being held for the stream.
+    stream = _stream(subscription, current_app.config['EVENTS_STREAM_SECONDS'],
+                     current_app.config['EVENTS_HEARTBEAT_SECONDS'])
+    response = Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    # Runs when the server closes the stream, including after a client disconnect
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+    return response
@@ -0,0 +1,166 @@
+from flask import Blueprint, jsonify, request
+from src.models import db, Goal, Student, Subject
+from src.models.goal import AUTO_PROGRESS_MODES
+from src.routes.user import login_required, get_current_user
+from datetime import datetime
+from src.utils.request_utils import get_json_data
+from src.utils.conditional import response_version, scope
+from src.utils.fields import requested_fields
+from src.utils.columnar import jsonify_list
+from src.utils.response_cache import cached_response
+from src.utils.goal_progress import seed_goal
+
+goal_bp = Blueprint('goal', __name__)
+
+GOAL_TYPES = ('academic', 'behavioral', 'skill')
+GOAL_STATUSES = ('active', 'completed', 'paused', 'cancelled')
+PROGRESS_MODES = ('manual',) + AUTO_PROGRESS_MODES
+
+def _owned_goal(goal_id, user_id):
+    return Goal.query.join(Student, Goal.student_id == Student.id).filter(
+        Goal.id == goal_id, Student.user_id == user_id
+    ).first_or_404()
+
+def _apply_goal_fields(goal, data, user_id):
+    """Copy writable fields from data onto goal; an error response or None."""
+    if data.get('subject_id'):
+        if not Subject.query.filter_by(id=data['subject_id'], user_id=user_id).first():
+            return jsonify({'error': 'Subject not found or access denied'}), 404
+    if 'subject_id' in data:
+        goal.subject_id = data['subject_id'] or None
+    for name in ('title', 'description', 'notes'):
+        if name in data:
+            setattr(goal, name, data[name])
+    if 'target_date' in data:
+        try:
+            goal.target_date = (datetime.strptime(data['target_date'], '%Y-%m-%d').date()
+                                if data['target_date'] else None)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    if 'goal_type' in data:
+        if data['goal_type'] not in GOAL_TYPES:
+            return jsonify({'error': f"goal_type must be one of: {', '.join(GOAL_TYPES)}"}), 400
+        goal.goal_type = data['goal_type']
+    if 'status' in data:
+        if data['status'] not in GOAL_STATUSES:
+            return jsonify({'error': f"status must be one of: {', '.join(GOAL_STATUSES)}"}), 400
+        goal.status = data['status']
+
+    if 'progress_mode' in data:
+        if data['progress_mode'] not in PROGRESS_MODES:
+            return jsonify({'error': f"progress_mode must be one of: {', '.join(PROGRESS_MODES)}"}), 400
+        goal.progress_mode = data['progress_mode']
+    if 'target_value' in data:
+        try:
+            goal.target_value = float(data['target_value']) if data['target_value'] is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'target_value must be a number'}), 400
+    if goal.progress_mode in AUTO_PROGRESS_MODES:
+        if not goal.subject_id:
+            return jsonify({'error': 'Automatic progress needs a subject_id'}), 400
+        if not goal.target_value or goal.target_value <= 0:
+            return jsonify({'error': 'Automatic progress needs a positive target_value'}), 400
+        if goal.progress_mode == 'average' and goal.target_value > 100:
+            return jsonify({'error': 'An average target is a percentage of at most 100'}), 400
+        if 'progress_percentage' in data:
+            return jsonify({'error': 'Progress of an automatic goal follows its grades'}), 400
+    elif 'progress_percentage' in data:
+        try:
+            goal.update_progress(int(data['progress_percentage']))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'progress_percentage must be a number'}), 400
+    return None
+
+@goal_bp.route('/goals', methods=['GET'])
+@cached_response
+@login_required
+def get_goals():
+    """Get goals of the current user's students."""
+    current_user = get_current_user()
+    owned = (Student.user_id == current_user.id,)
+    version = response_version(
+        scope(Goal, *owned, joins=[(Student, Goal.student_id == Student.id)]), user_id=current_user.id
+    )
+    if version.is_fresh():
+        return version.not_modified()
+
+    query = Goal.query.join(Student, Goal.student_id == Student.id).filter(*owned)
+    student_id = request.args.get('student_id', type=int)
+    if student_id:
+        query = query.filter(Goal.student_id == student_id)
+    if request.args.get('status'):
+        query = query.filter(Goal.status == request.args['status'])
+    if request.args.get('subject_id', type=int):
+        query = query.filter(Goal.subject_id == request.args.get('subject_id', type=int))
+
+    goals = query.order_by(Goal.target_date.is_(None), Goal.target_date, Goal.id).all()
+    return version.apply(jsonify_list(Goal, goals, requested_fields()))
+
+@goal_bp.route('/goals', methods=['POST'])
+@login_required
+def create_goal():
+    """Create a goal, optionally with progress derived from subject grades."""
+    current_user = get_current_user()
+    data, error, status = get_json_data(['student_id', 'title'])
+    if error:
+        return error, status
+
+    student = Student.query.filter_by(id=data['student_id'], user_id=current_user.id).first()
+    if not student:
+        return jsonify({'error': 'Student not found or access denied'}), 404
+
+    goal = Goal(student_id=student.id, goal_type='academic', status='active', progress_mode='manual',
+                progress_percentage=0, graded_count=0, percentage_sum=0)
+    error = _apply_goal_fields(goal, data, current_user.id)
+    if error:
+        return error
+    if goal.is_automatic:
+        seed_goal(goal)
+
+    db.session.add(goal)
+    db.session.commit()
+
+    return jsonify({
+        'message': 'Goal created successfully',
+        'goal': goal.to_dict()
+    }), 201
+
+@goal_bp.route('/goals/<int:goal_id>', methods=['GET'])
+@login_required
+def get_goal(goal_id):
+    """Get specific goal by ID."""
+    current_user = get_current_user()
+    goal = _owned_goal(goal_id, current_user.id)
+    return jsonify(goal.to_dict(requested_fields()))
+
+@goal_bp.route('/goals/<int:goal_id>', methods=['PUT'])
+@login_required
+def update_goal(goal_id):
+    """Update a goal; changing its progress rule recounts existing grades once."""
+    current_user = get_current_user()
+    goal = _owned_goal(goal_id, current_user.id)
+    data, error, status = get_json_data()
+    if error:
+        return error, status
+
+    with db.session.no_autoflush:
+        rule = (goal.progress_mode, goal.subject_id, goal.target_value)
+        error = _apply_goal_fields(goal, data, current_user.id)
+        if error:
+            db.session.rollback()
+            return error
+        if (goal.progress_mode, goal.subject_id, goal.target_value) != rule:
+            seed_goal(goal)
+    db.session.commit()
+
+    return jsonify(goal.to_dict())
+
+@goal_bp.route('/goals/<int:goal_id>', methods=['DELETE'])
+@login_required
+def delete_goal(goal_id):
+    """Delete a goal."""
+    current_user = get_current_user()
+    goal = _owned_goal(goal_id, current_user.id)
+    db.session.delete(goal)
+    db.session.commit()
+    return jsonify({'message': 'Goal deleted successfully'})
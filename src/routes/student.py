@@ -1,18 +1,40 @@
-from flask import Blueprint, jsonify, request
-from src.models import db, Student
+import base64
+from flask import Blueprint, current_app, jsonify, request
+from src.models import db, Student, Assignment, Attendance, AttendanceCounter, Goal, Activity
 from src.routes.user import login_required, get_current_user
-from datetime import datetime
+from datetime import date, datetime
+from sqlalchemy.exc import IntegrityError
 from src.utils.request_utils import get_json_data
+from src.utils.conditional import response_version, scope, assignment_scopes
+from src.utils.fields import requested_fields
+from src.utils.database import ANALYTICS_STATEMENT_TIMEOUT_MS, statement_timeout
+from src.utils.columnar import jsonify_list
+from src.utils.response_cache import cached_response
+from src.utils.attendance_bits import STATUS_CODES, pack_attendance, school_year, school_year_of
+from src.utils.compliance import compliance_report
 
 student_bp = Blueprint('student', __name__)
 
 @student_bp.route('/students', methods=['GET'])
+@cached_response
 @login_required
 def get_students():
     """Get all students for the current user."""
     current_user = get_current_user()
+    owned = Student.user_id == current_user.id
+    version = response_version(
+        scope(Student, owned),
+        *assignment_scopes(owned),
+        scope(Attendance, owned, joins=[(Student, Attendance.student_id == Student.id)]),
+        user_id=current_user.id
+    )
+    if version.is_fresh():
+        return version.not_modified()
+
+    fields = requested_fields()
     students = Student.query.filter_by(user_id=current_user.id, active=True).all()
-    return jsonify([student.to_dict() for student in students])
+    Student.preload_stats(students, fields)
+    return version.apply(jsonify([student.to_dict(fields) for student in students]))
 
 @student_bp.route('/students', methods=['POST'])
 @login_required
@@ -61,7 +83,15 @@ def get_student(student_id):
     """Get specific student by ID."""
     current_user = get_current_user()
     student = Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
-    return jsonify(student.to_dict())
+    version = response_version(
+        scope(Student, Student.id == student_id),
+        *assignment_scopes(Assignment.student_id == student_id),
+        scope(Attendance, Attendance.student_id == student_id),
+        user_id=current_user.id
+    )
+    if version.is_fresh():
+        return version.not_modified()
+    return version.apply(jsonify(student.to_dict(requested_fields())))
 
 @student_bp.route('/students/<int:student_id>', methods=['PUT'])
 @login_required
@@ -119,51 +149,69 @@ def delete_student(student_id):
     return jsonify({'message': 'Student deactivated successfully'})
 
 @student_bp.route('/students/<int:student_id>/dashboard', methods=['GET'])
+@cached_response
 @login_required
 def get_student_dashboard(student_id):
     """Get dashboard data for a specific student."""
     current_user = get_current_user()
     student = Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    version = response_version(
+        scope(Student, Student.id == student_id),
+        *assignment_scopes(Assignment.student_id == student_id),
+        scope(Attendance, Attendance.student_id == student_id),
+        scope(Goal, Goal.student_id == student_id),
+        user_id=current_user.id
+    )
+    if version.is_fresh():
+        return version.not_modified()
+    
+    fields = requested_fields()
+    Student.preload_stats([student], fields)
     
     # Get recent assignments
-    from src.models import Assignment
-    recent_assignments = Assignment.query.filter_by(student_id=student_id).order_by(
+    recent_assignments = Assignment.query.options(*Assignment.load_options(fields)).filter_by(
+        student_id=student_id
+    ).order_by(
         Assignment.due_date.desc()
     ).limit(5).all()
     
     # Get attendance summary for last 30 days
-    from src.models.attendance import Attendance
     attendance_summary = Attendance.get_attendance_summary(student_id)
     
     # Get current goals
-    from src.models import Goal
     active_goals = Goal.query.filter_by(student_id=student_id, status='active').all()
     
     dashboard_data = {
-        'student': student.to_dict(),
-        'recent_assignments': [assignment.to_dict() for assignment in recent_assignments],
+        'student': student.to_dict(fields),
+        'recent_assignments': [assignment.to_dict(fields) for assignment in recent_assignments],
         'attendance_summary': attendance_summary,
-        'active_goals': [goal.to_dict() for goal in active_goals],
-        'current_gpa': student.get_current_gpa(),
-        'attendance_rate': student.get_attendance_rate()
+        'active_goals': [goal.to_dict(fields) for goal in active_goals]
     }
+    if fields.wants('current_gpa'):
+        dashboard_data['current_gpa'] = student.get_current_gpa()
+    if fields.wants('attendance_rate'):
+        dashboard_data['attendance_rate'] = student.get_attendance_rate()
     
-    return jsonify(dashboard_data)
+    return version.apply(jsonify(dashboard_data))
 
 @student_bp.route('/students/<int:student_id>/assignments', methods=['GET'])
+@cached_response
 @login_required
 def get_student_assignments(student_id):
     """Get all assignments for a specific student."""
     current_user = get_current_user()
     student = Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    version = response_version(*assignment_scopes(Assignment.student_id == student_id), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
     
     # Get query parameters for filtering
     status = request.args.get('status')
     subject_id = request.args.get('subject_id')
     limit = request.args.get('limit', type=int)
     
-    from src.models import Assignment
-    query = Assignment.query.filter_by(student_id=student_id)
+    fields = requested_fields()
+    query = Assignment.query.options(*Assignment.load_options(fields)).filter_by(student_id=student_id)
     
     if status:
         query = query.filter_by(status=status)
@@ -176,7 +224,160 @@ def get_student_assignments(student_id):
         query = query.limit(limit)
     
     assignments = query.all()
-    return jsonify([assignment.to_dict() for assignment in assignments])
+    return version.apply(jsonify_list(Assignment, assignments, fields))
+
+@student_bp.route('/students/<int:student_id>/attendance', methods=['GET'])
+@login_required
+def get_student_attendance(student_id):
+    """Get attendance records for a specific student."""
+    current_user = get_current_user()
+    student = Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    version = response_version(scope(Attendance, Attendance.student_id == student_id), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
+    
+    query = Attendance.query.filter_by(student_id=student_id)
+    
+    # Optional date range (YYYY-MM-DD)
+    try:
+        if request.args.get('start_date'):
+            query = query.filter(Attendance.date >= datetime.strptime(request.args['start_date'], '%Y-%m-%d').date())
+        if request.args.get('end_date'):
+            query = query.filter(Attendance.date <= datetime.strptime(request.args['end_date'], '%Y-%m-%d').date())
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    records = query.order_by(Attendance.date.desc()).all()
+    return version.apply(jsonify_list(Attendance, records, requested_fields()))
+
+@student_bp.route('/students/<int:student_id>/attendance/year', methods=['GET'])
+@cached_response
+@login_required
+def get_student_attendance_year(student_id):
+    """A school year of attendance packed for a heatmap (see src.utils.attendance_bits)."""
+    current_user = get_current_user()
+    student = Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    start, end = school_year(request.args.get('year', type=int))
+    in_year = (Attendance.student_id == student_id, Attendance.date.between(start, end))
+    version = response_version(scope(Attendance, *in_year), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
+
+    days = (end - start).days + 1
+    rows = db.session.execute(
+        db.select(Attendance.date, Attendance.status, Attendance.hours).where(*in_year)
+    )
+    statuses, hours = pack_attendance(rows, start, days)
+    return version.apply(jsonify({
+        'student_id': student.id,
+        'start': start.isoformat(),
+        'days': days,
+        'codes': [None, *STATUS_CODES],
+        'statuses': base64.b64encode(statuses).decode('ascii'),
+        'hours': base64.b64encode(hours).decode('ascii'),
+    }))
+
+@student_bp.route('/students/<int:student_id>/attendance/<day>', methods=['PUT'])
+@login_required
+def record_attendance(student_id, day):
+    """Create or replace a student's attendance for one day (YYYY-MM-DD)."""
+    current_user = get_current_user()
+    Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    try:
+        day = datetime.strptime(day, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    data, error, status = get_json_data()
+    if error:
+        return error, status
+
+    attendance_status = data.get('status', 'present')
+    if attendance_status not in STATUS_CODES:
+        return jsonify({'error': f"status must be one of: {', '.join(STATUS_CODES)}"}), 400
+    try:
+        hours = float(data.get('hours') or 0)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'hours must be a number'}), 400
+    if not 0 <= hours <= 24:
+        return jsonify({'error': 'hours must be between 0 and 24'}), 400
+
+    record = Attendance.query.filter_by(student_id=student_id, date=day).first()
+    created = record is None
+    if created:
+        record = Attendance(student_id=student_id, date=day)
+        db.session.add(record)
+    record.status = attendance_status
+    record.hours = hours
+    if 'notes' in data:
+        record.notes = data['notes']
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Attendance for this day was recorded concurrently, retry'}), 409
+
+    return jsonify(record.to_dict()), 201 if created else 200
+
+@student_bp.route('/students/<int:student_id>/attendance/<day>', methods=['DELETE'])
+@login_required
+def delete_attendance(student_id, day):
+    """Remove a student's attendance for one day (YYYY-MM-DD)."""
+    current_user = get_current_user()
+    Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    try:
+        day = datetime.strptime(day, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    record = Attendance.query.filter_by(student_id=student_id, date=day).first_or_404()
+    db.session.delete(record)
+    db.session.commit()
+    return jsonify({'message': 'Attendance deleted successfully'})
+
+@student_bp.route('/students/<int:student_id>/compliance', methods=['GET'])
+@cached_response
+@login_required
+def get_student_compliance(student_id):
+    """Progress toward the yearly instructional day and hour targets."""
+    current_user = get_current_user()
+    Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    year = request.args.get('year', type=int) or school_year_of(date.today())
+    required_days = request.args.get('required_days', type=int) or current_app.config['COMPLIANCE_REQUIRED_DAYS']
+    required_hours = request.args.get('required_hours', type=float) or current_app.config['COMPLIANCE_REQUIRED_HOURS']
+
+    counter = AttendanceCounter.query.filter_by(student_id=student_id, school_year=year).first()
+    report = compliance_report(counter, required_days, required_hours, year)
+    report['student_id'] = student_id
+    return jsonify(report)
+
+@student_bp.route('/students/<int:student_id>/goals', methods=['GET'])
+@login_required
+def get_student_goals(student_id):
+    """Get goals for a specific student."""
+    current_user = get_current_user()
+    student = Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    version = response_version(scope(Goal, Goal.student_id == student_id), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
+    
+    query = Goal.query.filter_by(student_id=student_id)
+    if request.args.get('status'):
+        query = query.filter_by(status=request.args['status'])
+    
+    goals = query.order_by(Goal.target_date).all()
+    return version.apply(jsonify_list(Goal, goals, requested_fields()))
+
+@student_bp.route('/students/<int:student_id>/activities', methods=['GET'])
+@login_required
+def get_student_activities(student_id):
+    """Get extracurricular activities for a specific student."""
+    current_user = get_current_user()
+    student = Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    version = response_version(scope(Activity, Activity.student_id == student_id), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
+    
+    activities = Activity.query.filter_by(student_id=student_id).order_by(Activity.start_date.desc()).all()
+    return version.apply(jsonify_list(Activity, activities, requested_fields()))
 
 @student_bp.route('/students/<int:student_id>/grades', methods=['GET'])
 @login_required
@@ -184,8 +385,11 @@ def get_student_grades(student_id):
     """Get all grades for a specific student."""
     current_user = get_current_user()
     student = Student.query.filter_by(id=student_id, user_id=current_user.id).first_or_404()
+    version = response_version(*assignment_scopes(Assignment.student_id == student_id), user_id=current_user.id)
+    if version.is_fresh():
+        return version.not_modified()
     
-    from src.models import Assignment, Grade
+    from src.models import Grade
     
     # Get all graded assignments for this student
     graded_assignments = db.session.query(Assignment, Grade).join(
@@ -194,9 +398,10 @@ def get_student_grades(student_id):
         Grade.graded_at.desc()
     ).all()
     
+    fields = requested_fields()
     grades_data = []
     for assignment, grade in graded_assignments:
-        grade_dict = grade.to_dict()
+        grade_dict = grade.to_dict(fields)
         grade_dict['assignment'] = {
             'id': assignment.id,
             'title': assignment.title,
@@ -206,9 +411,11 @@ def get_student_grades(student_id):
         }
         grades_data.append(grade_dict)
     
-    return jsonify(grades_data)
+    return version.apply(jsonify(grades_data))
 
 @student_bp.route('/students/<int:student_id>/progress', methods=['GET'])
+@cached_response
+@statement_timeout(ANALYTICS_STATEMENT_TIMEOUT_MS)
 @login_required
 def get_student_progress(student_id):
     """Get progress analytics for a specific student."""
@@ -234,7 +441,7 @@ def get_student_progress(student_id):
     ).filter(Assignment.student_id == student_id).group_by(Subject.id).all()
     
     progress_data = {
-        'student': student.to_dict(),
+        'student': student.to_dict(requested_fields()),
         'grade_trends': [
             {
                 'date': grade.graded_at.isoformat() if grade.graded_at else None,
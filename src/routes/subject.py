@@ -1,17 +1,26 @@
 from flask import Blueprint, jsonify, request
-from src.models import db, Subject
+from sqlalchemy import select
+from src.models import db, Assignment, Goal, Subject
 from src.routes.user import login_required, get_current_user
+from src.utils.changes import record_changes
 from src.utils.request_utils import get_json_data
+from src.utils.fields import requested_fields
+from src.utils.database import ANALYTICS_STATEMENT_TIMEOUT_MS, statement_timeout
+from src.utils.columnar import jsonify_list
+from src.utils.response_cache import cached_response
 
 subject_bp = Blueprint('subject', __name__)
 
 @subject_bp.route('/subjects', methods=['GET'])
+@cached_response
 @login_required
 def get_subjects():
     """Get all subjects for the current user."""
     current_user = get_current_user()
+    fields = requested_fields()
     subjects = Subject.query.filter_by(user_id=current_user.id, active=True).all()
-    return jsonify([subject.to_dict() for subject in subjects])
+    Subject.preload_stats(subjects, fields)
+    return jsonify([subject.to_dict(fields) for subject in subjects])
 
 @subject_bp.route('/subjects', methods=['POST'])
 @login_required
@@ -52,7 +61,7 @@ def get_subject(subject_id):
     """Get specific subject by ID."""
     current_user = get_current_user()
     subject = Subject.query.filter_by(id=subject_id, user_id=current_user.id).first_or_404()
-    return jsonify(subject.to_dict())
+    return jsonify(subject.to_dict(requested_fields()))
 
 @subject_bp.route('/subjects/<int:subject_id>', methods=['PUT'])
 @login_required
@@ -101,7 +110,12 @@ def delete_subject(subject_id):
         db.session.commit()
         return jsonify({'message': 'Subject deactivated successfully (has existing assignments)'})
     else:
-        # Hard delete if no assignments
+        # Hard delete if no assignments. The database's ON DELETE SET NULL
+        # clears subject_id on the rest, unseen by the change log's flush listener.
+        connection = db.session.connection()
+        for model in (Assignment, Goal):
+            ids = db.session.execute(select(model.id).where(model.subject_id == subject.id)).scalars().all()
+            record_changes(connection, current_user.id, model.__tablename__, ids, 'upsert')
         db.session.delete(subject)
         db.session.commit()
         return jsonify({'message': 'Subject deleted successfully'})
@@ -119,7 +133,8 @@ def get_subject_assignments(subject_id):
     limit = request.args.get('limit', type=int)
     
     from src.models import Assignment, Student
-    query = Assignment.query.join(Student).filter(
+    fields = requested_fields()
+    query = Assignment.query.options(*Assignment.load_options(fields)).join(Student).filter(
         Assignment.subject_id == subject_id,
         Student.user_id == current_user.id
     )
@@ -135,9 +150,11 @@ def get_subject_assignments(subject_id):
         query = query.limit(limit)
     
     assignments = query.all()
-    return jsonify([assignment.to_dict() for assignment in assignments])
+    return jsonify_list(Assignment, assignments, fields)
 
 @subject_bp.route('/subjects/<int:subject_id>/analytics', methods=['GET'])
+@cached_response
+@statement_timeout(ANALYTICS_STATEMENT_TIMEOUT_MS)
 @login_required
 def get_subject_analytics(subject_id):
     """Get analytics for a specific subject."""
@@ -182,7 +199,7 @@ def get_subject_analytics(subject_id):
         status_distribution[status] = status_distribution.get(status, 0) + 1
     
     analytics_data = {
-        'subject': subject.to_dict(),
+        'subject': subject.to_dict(requested_fields()),
         'total_assignments': total_assignments,
         'graded_assignments': graded_assignments,
         'average_grade': round(average_grade, 2) if average_grade else 0,
@@ -1,24 +1,46 @@
-from flask import Blueprint, jsonify, session
+from flask import Blueprint, jsonify, request, session
+from flask_jwt_extended import decode_token, get_jwt, jwt_required
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 from src.models import db, User
 from functools import wraps
+from src.utils.auth import (
+    authenticate, current_user, issue_tokens, issued_before_cutoff, revoke_token, revoke_user_tokens,
+)
+from src.utils.purge import delete_account
 from src.utils.request_utils import get_json_data
+from src.utils.fields import requested_fields
 
 user_bp = Blueprint('user', __name__)
 
 def login_required(f):
-    """Decorator to require login for protected routes."""
+    """Decorator to require a session or a bearer access token."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            return jsonify({'error': 'Authentication required'}), 401
+        user, claims, error = authenticate()
+        if user is None:
+            return jsonify({'error': error}), 401
         return f(*args, **kwargs)
     return decorated_function
 
 def get_current_user():
-    """Get the current logged-in user."""
-    if 'user_id' in session:
-        return User.query.get(session['user_id'])
-    return None
+    """Get the current logged-in user; attributes beyond id and timezone load lazily."""
+    return current_user()
+
+def find_user_by_credentials(data):
+    """The user matching a username or email and password, or None."""
+    user = User.query.filter(
+        (User.username == data['username']) | (User.email == data['username']),
+        User.deleted_at.is_(None)
+    ).first()
+    if not user or not user.check_password(data['password']):
+        return None
+    return user
+
+def start_session(user):
+    """Log the user in with the session cookie."""
+    session['user_id'] = user.id
+    session['timezone'] = user.timezone
 
 @user_bp.route('/auth/register', methods=['POST'])
 def register():
@@ -53,7 +75,7 @@ def register():
     db.session.commit()
     
     # Log in the user
-    session['user_id'] = user.id
+    start_session(user)
     
     return jsonify({
         'message': 'User registered successfully',
@@ -67,27 +89,66 @@ def login():
     if error:
         return error, status
     
-    # Find user by username or email
-    user = User.query.filter(
-        (User.username == data['username']) | (User.email == data['username'])
-    ).first()
-    
-    if not user or not user.check_password(data['password']):
+    user = find_user_by_credentials(data)
+    if user is None:
         return jsonify({'error': 'Invalid credentials'}), 401
     
     # Log in the user
-    session['user_id'] = user.id
+    start_session(user)
     
     return jsonify({
         'message': 'Login successful',
         'user': user.to_dict()
     })
 
+@user_bp.route('/auth/token', methods=['POST'])
+def issue_token():
+    """Exchange credentials for an access and refresh token."""
+    data, error, status = get_json_data(['username', 'password'])
+    if error:
+        return error, status
+    
+    user = find_user_by_credentials(data)
+    if user is None:
+        return jsonify({'error': 'Invalid credentials'}), 401
+    
+    return jsonify(dict(issue_tokens(user), user=user.to_dict()))
+
+@user_bp.route('/auth/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_token():
+    """Rotate a refresh token into a new token pair."""
+    claims = get_jwt()
+    user = db.session.get(User, int(claims['sub']))
+    if user is None or user.deleted_at is not None:
+        return jsonify({'error': 'Authentication required'}), 401
+    if issued_before_cutoff(claims, user):
+        return jsonify({'error': 'Token has been revoked'}), 401
+    
+    # Each refresh token is used once
+    revoke_token(claims)
+    tokens = issue_tokens(user)
+    db.session.commit()
+    return jsonify(tokens)
+
 @user_bp.route('/auth/logout', methods=['POST'])
 @login_required
 def logout():
-    """Logout user."""
+    """Logout user, revoking the bearer token and an optional refresh token."""
+    user, claims, _ = authenticate()
+    if claims is not None:
+        revoke_token(claims)
+        refresh = (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh:
+            try:
+                refresh_claims = decode_token(refresh)
+            except (JWTExtendedException, PyJWTError):
+                refresh_claims = None
+            if refresh_claims and refresh_claims['sub'] == claims['sub']:
+                revoke_token(refresh_claims)
+        db.session.commit()
     session.pop('user_id', None)
+    session.pop('timezone', None)
     return jsonify({'message': 'Logout successful'})
 
 @user_bp.route('/auth/me', methods=['GET'])
@@ -95,13 +156,13 @@ def logout():
 def get_current_user_info():
     """Get current user information."""
     user = get_current_user()
-    return jsonify(user.to_dict())
+    return jsonify(user.to_dict(requested_fields()))
 
 @user_bp.route('/auth/me', methods=['PUT'])
 @login_required
 def update_current_user():
     """Update current user information."""
-    user = get_current_user()
+    user = get_current_user().record
     data, error, status = get_json_data()
     if error:
         return error, status
@@ -119,6 +180,8 @@ def update_current_user():
         user.email = data['email']
     if 'timezone' in data:
         user.timezone = data['timezone']
+        if session.get('user_id') == user.id:
+            session['timezone'] = user.timezone
     if 'preferences' in data:
         user.set_preferences(data['preferences'])
     
@@ -129,7 +192,7 @@ def update_current_user():
 @login_required
 def change_password():
     """Change user password."""
-    user = get_current_user()
+    user = get_current_user().record
     data, error, status = get_json_data(['current_password', 'new_password'])
     if error:
         return error, status
@@ -141,17 +204,23 @@ def change_password():
         return jsonify({'error': 'New password must be at least 6 characters long'}), 400
     
     user.set_password(data['new_password'])
+    # Tokens issued with the old password stop working; a token caller gets new ones
+    revoke_user_tokens(user)
+    result = {'message': 'Password changed successfully'}
+    if authenticate()[1] is not None:
+        result['tokens'] = issue_tokens(user)
     db.session.commit()
     
-    return jsonify({'message': 'Password changed successfully'})
+    return jsonify(result)
 
 # Admin routes (for development/testing)
 @user_bp.route('/users', methods=['GET'])
 @login_required
 def get_users():
     """Get all users (admin only)."""
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    users = User.query.filter(User.deleted_at.is_(None)).all()
+    fields = requested_fields()
+    return jsonify([user.to_dict(fields) for user in users])
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 @login_required
@@ -164,7 +233,7 @@ def get_user(user_id):
         return jsonify({'error': 'Access denied'}), 403
     
     user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    return jsonify(user.to_dict(requested_fields()))
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 @login_required
@@ -176,11 +245,18 @@ def delete_user(user_id):
     if current_user.id != user_id:
         return jsonify({'error': 'Access denied'}), 403
     
-    user = User.query.get_or_404(user_id)
-    db.session.delete(user)
-    db.session.commit()
+    user = User.query.filter_by(id=user_id, deleted_at=None).first_or_404()
+    
+    # Revoke the token used; delete_account commits it
+    _, claims, _ = authenticate()
+    if claims is not None:
+        revoke_token(claims)
+    scheduled = delete_account(user)
     
     # Clear session
     session.pop('user_id', None)
+    session.pop('timezone', None)
     
+    if scheduled:
+        return jsonify({'message': 'Account deleted successfully', 'purge': 'scheduled'}), 202
     return jsonify({'message': 'Account deleted successfully'})
@@ -0,0 +1,62 @@
+"""
+Packed attendance for a whole school year.
+
+A heatmap only needs each day's status and hours, so a year is sent as two
+byte strings instead of a few hundred ``Attendance.to_dict()`` objects:
+
+``statuses``
+    Two bits per day, four days per byte, the first day in the lowest bits
+    of the first byte. ``0`` means no record; ``1`` to ``3`` index
+    ``STATUS_CODES`` (present, absent, partial). Other statuses read as 0.
+
+``hours``
+    One byte per day, in tenths of an hour (``55`` is 5.5 hours), capped at
+    25.5.
+
+Day ``i`` of either array is ``start + i`` days. A 365-day year is 92 + 365
+bytes, roughly 600 bytes of JSON once base64 encoded.
+"""
+
+from datetime import date, timedelta
+
+from flask import current_app
+
+# Two-bit codes; 0 is "no record"
+STATUS_CODES = ('present', 'absent', 'partial')
+
+MAX_HOUR_TENTHS = 255
+
+
+def school_year_of(day):
+    """The calendar year in which the school year containing day starts."""
+    return day.year if day.month >= current_app.config['SCHOOL_YEAR_START_MONTH'] else day.year - 1
+
+
+def school_year(year=None, today=None):
+    """(start, end) of the school year beginning in year, by default the current one."""
+    start_month = current_app.config['SCHOOL_YEAR_START_MONTH']
+    if year is None:
+        year = school_year_of(today or date.today())
+    start = date(year, start_month, 1)
+    return start, date(year + 1, start_month, 1) - timedelta(days=1)
+
+
+def pack_attendance(rows, start, days):
+    """(statuses, hours) byte strings for (date, status, hours) rows over days days from start."""
+    codes = {status: code for code, status in enumerate(STATUS_CODES, start=1)}
+    statuses = bytearray((days + 3) // 4)
+    hours = bytearray(days)
+    for day, status, day_hours in rows:
+        index = (day - start).days
+        if not 0 <= index < days:
+            continue
+        statuses[index // 4] |= codes.get(status, 0) << (index % 4) * 2
+        if day_hours:
+            hours[index] = min(int(round(float(day_hours) * 10)), MAX_HOUR_TENTHS)
+    return bytes(statuses), bytes(hours)
+
+
+def unpack_statuses(statuses, days):
+    """The status (or None) of each day; the inverse of pack_attendance for tests and tools."""
+    names = (None,) + STATUS_CODES
+    return [names[statuses[index // 4] >> (index % 4) * 2 & 3] for index in range(days)]
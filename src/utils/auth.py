@@ -0,0 +1,323 @@
+"""
+Request authentication: session cookies or JWT bearer tokens.
+
+Browsers keep using the session cookie set by ``/api/auth/login``. API
+clients and horizontally scaled deployments can instead exchange
+credentials at ``/api/auth/token`` for a short-lived access token and a
+refresh token, and send ``Authorization: Bearer <access token>``. Either
+way the user id and timezone come from the request itself (token claims or
+cookie), so ``login_required`` and ``current_user().id`` cost no queries;
+other attributes load the ``User`` row on first use.
+
+Revoked tokens are rows in ``revoked_tokens``. Each worker keeps a bloom
+filter of the unexpired ones: a token not in the filter is accepted without
+a query, and only the rare filter match (a revoked token or a false
+positive) is confirmed against the table.
+
+Changing the password or deleting the account revokes every token the user
+was issued before that second. ``users.tokens_valid_after`` records the
+cut-off, and the refresh endpoint checks it on the User row it loads anyway.
+Access tokens are checked without a query: the cut-off is also a
+``revoked_tokens`` row of type ``user``, kept for one access token lifetime,
+and each worker holds those rows in memory next to the filter.
+
+Workers pick up each other's revocations within
+``AUTH_REVOCATION_REFRESH_SECONDS`` from a background thread, which
+``stop()`` ends on shutdown. Under ``TESTING`` no thread is started, so it never runs queries behind a test's back; call ``refresh()``.
+
+Configuration:
+
+    JWT_SECRET_KEY                    signing key, shared by every worker
+                                      (defaults to SECRET_KEY)
+    JWT_ACCESS_TOKEN_MINUTES          access token lifetime (default 15)
+    JWT_REFRESH_TOKEN_DAYS            refresh token lifetime (default 30)
+    AUTH_REVOCATION_REFRESH_SECONDS   how often workers reload revocations (default 5)
+    AUTH_REVOCATION_CAPACITY          revocations the filter is sized for (default 100000)
+"""
+
+import calendar
+import hashlib
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, g, jsonify, request, session as cookie_session
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from sqlalchemy import delete, select
+
+# Reload revocations committed up to this long before the newest one seen,
+# in case they committed out of order.
+REVOCATION_OVERLAP = timedelta(seconds=60)
+
+# revoked_tokens.token_type of a row revoking all of a user's earlier tokens
+USER_REVOCATION = 'user'
+
+# Rebuild the filter from scratch (dropping expired tokens) this often.
+REBUILD_SECONDS = 3600
+
+
+class BloomFilter:
+    """Set membership with no false negatives, in a fixed number of bits."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+def epoch(moment):
+    """Unix time of a naive UTC datetime, as in a token's ``iat``."""
+    return calendar.timegm(moment.utctimetuple())
+
+
+class RevocationList:
+    """Revoked token ids for one app: a per-process filter over revoked_tokens."""
+
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+        self.interval = app.config['AUTH_REVOCATION_REFRESH_SECONDS']
+        self.capacity = app.config['AUTH_REVOCATION_CAPACITY']
+        self.filter = BloomFilter(self.capacity)
+        self._high_water = None
+        # user id -> unix time before which the user's tokens are revoked
+        self._users = {}
+        self._rebuilt_at = 0.0
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _engine(self):
+        with self.app.app_context():
+            return self.db.engine
+
+    def rebuild(self):
+        """Reload every unexpired revocation and purge the expired ones."""
+        from src.models import RevokedToken
+
+        now = datetime.utcnow()
+        with self._engine().begin() as connection:
+            connection.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            rows = connection.execute(self._revocations()).all()
+        self.filter = BloomFilter(max(self.capacity, len(rows) * 2))
+        self._users = {}
+        self._high_water = max((revoked_at for *_, revoked_at in rows), default=now)
+        self._add(rows)
+        self._rebuilt_at = time.monotonic()
+
+    def refresh(self):
+        """Add revocations made by other processes since the last load."""
+        from src.models import RevokedToken
+
+        if time.monotonic() - self._rebuilt_at > REBUILD_SECONDS:
+            return self.rebuild()
+        with self._engine().connect() as connection:
+            rows = connection.execute(
+                self._revocations().where(RevokedToken.revoked_at > self._high_water - REVOCATION_OVERLAP)
+            ).all()
+        self._add(rows)
+
+    @staticmethod
+    def _revocations():
+        from src.models import RevokedToken
+        return select(RevokedToken.jti, RevokedToken.token_type, RevokedToken.user_id, RevokedToken.revoked_at)
+
+    def _add(self, rows):
+        for jti, token_type, user_id, revoked_at in rows:
+            if token_type == USER_REVOCATION:
+                self._users[user_id] = max(self._users.get(user_id, 0), epoch(revoked_at))
+            else:
+                self.filter.add(jti)
+            self._high_water = max(self._high_water, revoked_at)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                self.app.logger.exception('Reloading revoked tokens failed')
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads do not survive fork.
+                self._pid = os.getpid()
+                self.rebuild()
+                if not self.app.config.get('TESTING'):
+                    threading.Thread(target=self._run, name='token-revocations', daemon=True).start()
+
+    def stop(self):
+        """End the refresh thread, e.g. before the worker exits or the schema is dropped."""
+        self._stop.set()
+
+    def is_revoked(self, claims):
+        self._ensure_loaded()
+        cutoff = self._users.get(int(claims['sub']))
+        if cutoff is not None and claims['iat'] < cutoff:
+            return True
+        if claims['jti'] not in self.filter:
+            return False
+        from src.models import RevokedToken
+        return self.db.session.get(RevokedToken, claims['jti']) is not None
+
+    def revoke(self, claims):
+        """Record a decoded token as revoked; the caller commits."""
+        from src.models import RevokedToken
+
+        self._ensure_loaded()
+        if self.db.session.get(RevokedToken, claims['jti']) is None:
+            self.db.session.add(RevokedToken(
+                jti=claims['jti'], token_type=claims['type'], user_id=int(claims['sub']),
+                expires_at=datetime.utcfromtimestamp(claims['exp']),
+            ))
+        self.filter.add(claims['jti'])
+
+    def revoke_user(self, user_id, valid_after):
+        """Revoke the user's tokens issued before valid_after (naive UTC); the caller commits."""
+        from src.models import RevokedToken
+
+        self._ensure_loaded()
+        expires_at = valid_after + self.app.config['JWT_ACCESS_TOKEN_EXPIRES']
+        jti = f'{USER_REVOCATION}-{user_id}'
+        row = self.db.session.get(RevokedToken, jti)
+        if row is None:
+            self.db.session.add(RevokedToken(jti=jti, token_type=USER_REVOCATION, user_id=user_id,
+                                             expires_at=expires_at, revoked_at=valid_after))
+        else:
+            row.expires_at, row.revoked_at = expires_at, valid_after
+        self._users[user_id] = epoch(valid_after)
+
+
+class CurrentUser:
+    """The authenticated user as far as most requests need it.
+
+    ``id`` and ``timezone`` come with the request. Any other attribute loads
+    the ``User`` row once, on first use.
+    """
+
+    def __init__(self, user_id, timezone=None):
+        self.id = user_id
+        self._timezone = timezone
+        self._record = None
+
+    @property
+    def record(self):
+        """The User row, loaded on first access (None if it was deleted)."""
+        if self._record is None:
+            from src.models import db, User
+            self._record = db.session.get(User, self.id)
+        return self._record
+
+    @property
+    def timezone(self):
+        return self._timezone if self._timezone is not None else self.record.timezone
+
+    def __getattr__(self, name):
+        return getattr(self.record, name)
+
+    def __repr__(self):
+        return f'<CurrentUser {self.id}>'
+
+
+def _bearer_token():
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' and token.strip() else None
+
+
+def _authenticate():
+    """(CurrentUser or None, claims or None, error message or None) for the request."""
+    token = _bearer_token()
+    if token is None:
+        user_id = cookie_session.get('user_id')
+        if user_id is None:
+            return None, None, 'Authentication required'
+        return CurrentUser(user_id, cookie_session.get('timezone')), None, None
+    try:
+        claims = decode_token(token)
+    except (JWTExtendedException, PyJWTError) as exc:
+        return None, None, f'Invalid token: {exc}'
+    if claims.get('type') != 'access':
+        return None, None, 'Invalid token: an access token is required'
+    if current_app.extensions['token_revocations'].is_revoked(claims):
+        return None, None, 'Token has been revoked'
+    return CurrentUser(int(claims['sub']), claims.get('tz')), claims, None
+
+
+def authenticate():
+    """Authenticate the request once; later calls reuse the result."""
+    if 'auth' not in g:
+        g.auth = _authenticate()
+    return g.auth
+
+
+def current_user():
+    """The request's CurrentUser, or None when it is not authenticated."""
+    return authenticate()[0]
+
+
+def current_user_id():
+    user = current_user()
+    return None if user is None else user.id
+
+
+def issue_tokens(user):
+    """A new access and refresh token pair for a User."""
+    claims = {'tz': user.timezone or 'UTC'}
+    identity = str(user.id)
+    return {
+        'access_token': create_access_token(identity, additional_claims=claims),
+        'refresh_token': create_refresh_token(identity, additional_claims=claims),
+        'token_type': 'Bearer',
+        'expires_in': int(current_app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds()),
+    }
+
+
+def revoke_token(claims):
+    current_app.extensions['token_revocations'].revoke(claims)
+
+
+def revoke_user_tokens(user):
+    """Revoke every token issued to a User before this second; the caller commits."""
+    user.tokens_valid_after = datetime.utcnow().replace(microsecond=0)
+    current_app.extensions['token_revocations'].revoke_user(user.id, user.tokens_valid_after)
+
+
+def issued_before_cutoff(claims, user):
+    """Whether a token predates the User's last password change or deletion."""
+    return user.tokens_valid_after is not None and claims['iat'] < epoch(user.tokens_valid_after)
+
+
+def init_auth(app, db):
+    """Configure JWT signing and the revocation list."""
+    app.config.setdefault('JWT_SECRET_KEY', app.config['SECRET_KEY'])
+    app.config.setdefault('JWT_TOKEN_LOCATION', ['headers'])
+    jwt = JWTManager(app)
+    revocations = RevocationList(app, db)
+    app.extensions['token_revocations'] = revocations
+
+    @jwt.token_in_blocklist_loader
+    def _is_revoked(jwt_header, jwt_payload):
+        return revocations.is_revoked(jwt_payload)
+
+    # Same error shape as the rest of the API.
+    jwt.unauthorized_loader(lambda reason: (jsonify({'error': reason}), 401))
+    jwt.invalid_token_loader(lambda reason: (jsonify({'error': f'Invalid token: {reason}'}), 401))
+    jwt.expired_token_loader(lambda header, payload: (jsonify({'error': 'Token has expired'}), 401))
+    jwt.revoked_token_loader(lambda header, payload: (jsonify({'error': 'Token has been revoked'}), 401))
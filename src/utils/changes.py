@@ -0,0 +1,228 @@
+"""
+Change log for delta sync.
+
+Every insert, update or delete of a student, assignment, grade, submission,
+attendance record, goal or activity through the ORM appends a row to
+``changes`` in the same transaction. The row records the owning user, table,
+row id and whether the row was upserted or deleted. ``GET /api/changes``
+(``src.routes.changes``) compacts a user's changes after a cursor to the
+latest operation per row, and returns the current state of upserted rows and
+the ids of deleted ones.
+
+Rows removed by ``ON DELETE CASCADE`` get no tombstone of their own: a
+deleted student or assignment implies its children are gone. Bulk
+``Query.update()``/``delete()`` bypass the listener and call
+``record_changes()`` themselves. Logged rows also become live events
+(``src.utils.events``).
+
+A job on the ``changes`` queue, run every ``CHANGES_COMPACT_INTERVAL`` in
+each worker, keeps the log small:
+
+* compaction deletes changes superseded by a later one for the same row,
+  which never alters what a feed returns;
+* changes older than ``CHANGES_RETENTION_DAYS``, tombstones included, are
+  dropped.
+
+A cursor carries the time it was issued. One older than the retention window
+may have missed a dropped tombstone, so the feed answers 410 and the client
+reloads its collections.
+
+On PostgreSQL, change ids come from a sequence in insert order, but
+transactions become visible in commit order. A change with an id below a
+cursor can commit after the cursor was issued. Each change therefore records
+its transaction id, and a cursor also carries the oldest transaction still
+in flight when it was issued (``txid_snapshot_xmin``). The next feed re-reads
+the changes below the cursor made by that transaction or later ones. Any
+change that was not yet visible is among them. Rows that were already
+delivered may come again, which is harmless because the client applies the
+current state. SQLite serialises writers, so ids commit in order there and
+cursors have no third part.
+
+Configuration:
+
+    CHANGES_RETENTION_DAYS     days changes and tombstones are kept (default 30)
+    CHANGES_COMPACT_INTERVAL   seconds between compactions per worker (default 3600)
+    CHANGES_PAGE_SIZE          most rows one feed response returns (default 500)
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, exists, func, insert, inspect, select
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.util import identity_key
+
+from src.utils.events import queue_events
+from src.utils.jobs import JobQueue
+
+_NO_SYNC = {'synchronize_session': False}
+
+
+def tracked_models():
+    """{table name: model} of the rows clients sync."""
+    from src.models import Activity, Assignment, Attendance, Goal, Grade, Student, Submission
+
+    return {model.__tablename__: model
+            for model in (Student, Assignment, Grade, Submission, Attendance, Goal, Activity)}
+
+
+def make_cursor(change_id, issued=None, xmin=None):
+    cursor = f'{change_id}.{int(issued if issued is not None else time.time())}'
+    return cursor if xmin is None else f'{cursor}.{xmin}'
+
+
+def parse_cursor(cursor):
+    """(change id, issue time, oldest in-flight txid or None) of a cursor; ValueError if malformed."""
+    parts = cursor.split('.')
+    if len(parts) not in (2, 3):
+        raise ValueError(cursor)
+    xmin = int(parts[2]) if len(parts) == 3 else None
+    return int(parts[0]), int(parts[1]), xmin
+
+
+def snapshot_xmin(connection):
+    """The oldest transaction still in flight, or None where ids commit in order."""
+    if connection.dialect.name != 'postgresql':
+        return None
+    return connection.execute(select(func.txid_snapshot_xmin(func.txid_current_snapshot()))).scalar()
+
+
+def _insert_changes(connection, rows):
+    from src.models import Change
+
+    stmt = insert(Change)
+    if connection.dialect.name == 'postgresql':
+        stmt = stmt.values(xid=func.txid_current())
+    connection.execute(stmt, rows)
+
+
+def _previous(state, attr):
+    """The pre-flush value of a loaded attribute, or None."""
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.dict.get(attr)
+
+
+class _Owners:
+    """Resolves rows to their owning user, preferring objects already in the session."""
+
+    PARENTS = (('user_id', None), ('student_id', 'Student'), ('assignment_id', 'Assignment'))
+
+    def __init__(self, session):
+        self.session = session
+        self.known = {}
+
+    def of(self, obj, deleted=False):
+        """Id of the user owning obj; before the flush for deleted rows."""
+        state = inspect(obj)
+        for attr, parent in self.PARENTS:
+            if attr in state.mapper.attrs:
+                value = _previous(state, attr) if deleted else state.dict.get(attr)
+                if value is None and not deleted and state.identity:
+                    # Expired and never reloaded: read it from the row.
+                    value = self.session.connection().execute(
+                        select(getattr(type(obj), attr)).where(type(obj).id == state.identity[0])
+                    ).scalar()
+                if value is None or parent is None:
+                    return value
+                return self.parent_owner(parent, value)
+        return None
+
+    def parent_owner(self, name, parent_id):
+        import src.models as models
+
+        model = getattr(models, name)
+        key = (name, parent_id)
+        if key not in self.known:
+            parent = self.session.identity_map.get(identity_key(model, parent_id))
+            if parent is not None:
+                self.known[key] = self.of(parent)
+            else:
+                column = 'user_id' if model is models.Student else 'student_id'
+                value = self.session.connection().execute(
+                    select(getattr(model, column)).where(model.id == parent_id)
+                ).scalar()
+                if value is not None and model is models.Assignment:
+                    value = self.parent_owner('Student', value)
+                self.known[key] = value
+        return self.known[key]
+
+
+def record_changes(connection, user_id, entity, ids, operation):
+    """Append changes for rows written outside the ORM unit of work."""
+    now = datetime.utcnow()
+    rows = [dict(user_id=user_id, entity=entity, entity_id=entity_id, operation=operation, changed_at=now)
+            for entity_id in ids]
+    if rows:
+        _insert_changes(connection, rows)
+
+
+@event.listens_for(Session, 'after_flush')
+def _log_changes(session, flush_context):
+    if not has_app_context():
+        return
+    tracked = tuple(tracked_models().values())
+    written = [(obj, 'upsert') for obj in session.new if isinstance(obj, tracked)]
+    written += [(obj, 'upsert') for obj in session.dirty
+                if isinstance(obj, tracked) and obj not in session.deleted
+                and session.is_modified(obj, include_collections=False)]
+    written += [(obj, 'delete') for obj in session.deleted if isinstance(obj, tracked)]
+    if not written:
+        return
+
+    owners = _Owners(session)
+    now = datetime.utcnow()
+    rows = []
+    for obj, operation in written:
+        user_id = owners.of(obj, deleted=operation == 'delete')
+        entity_id = inspect(obj).dict.get('id')
+        if user_id is not None and entity_id is not None:
+            rows.append(dict(user_id=user_id, entity=obj.__tablename__, entity_id=entity_id,
+                             operation=operation, changed_at=now))
+    if rows:
+        _insert_changes(session.connection(), rows)
+        queue_events(session, rows)
+
+
+def compact_changes(batch_size=1000):
+    """Drop superseded changes and those past the retention window, a batch per transaction."""
+    from src.models import db, Change
+
+    session = db.session
+    newer = aliased(Change)
+    superseded = select(Change.id).where(exists().where(
+        newer.user_id == Change.user_id, newer.entity == Change.entity,
+        newer.entity_id == Change.entity_id, newer.id > Change.id,
+    ))
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config['CHANGES_RETENTION_DAYS'])
+    expired = select(Change.id).where(Change.changed_at < cutoff)
+
+    removed = 0
+    for candidates in (superseded, expired):
+        while True:
+            ids = session.execute(candidates.limit(batch_size)).scalars().all()
+            if not ids:
+                break
+            session.execute(delete(Change).where(Change.id.in_(ids)), execution_options=_NO_SYNC)
+            session.commit()
+            removed += len(ids)
+    if removed:
+        current_app.logger.info('Compacted %d changes', removed)
+    return removed
+
+
+def init_changes(app):
+    """Create the changes queue and compact the log periodically in each worker."""
+    jobs = JobQueue(app, 'changes')
+    app.extensions['change_queue'] = jobs
+    last_run = {'pid': None, 'at': 0.0}
+
+    @app.before_request
+    def _compact_periodically():
+        now = time.monotonic()
+        if last_run['pid'] != os.getpid() or now - last_run['at'] >= app.config['CHANGES_COMPACT_INTERVAL']:
+            last_run.update(pid=os.getpid(), at=now)
+            jobs.submit(compact_changes)
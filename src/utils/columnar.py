@@ -0,0 +1,89 @@
+"""
+Compact columnar encoding for list responses.
+
+``?format=columns`` replaces the list of objects with one array per column:
+
+    {
+        "format": "columns",
+        "count": 2,
+        "columns": {"id": [4, 7], "status": [0, 3], "due_date": ["2026-10-01", null]},
+        "enums": {"status": ["assigned", "in_progress", "submitted", "graded"]}
+    }
+
+Key names are sent once, enumerated columns carry small integer codes into the
+shared ``enums`` dictionaries, and presentation-only values (colors, icons,
+formatted strings) are left out for the client to look up from those codes.
+Models list their encodable columns in ``COLUMNS``; ``?fields=`` and
+``?include=`` select columns the same way they select object keys.
+"""
+
+from operator import attrgetter
+
+from flask import jsonify, request
+
+from src.utils.fields import ALL_FIELDS
+
+
+class Column:
+    """One encodable column of a model.
+
+    ``get`` reads the value from an instance and defaults to the attribute of
+    the same name; dates and decimals are left to the JSON provider. ``enum``
+    lists the known values of an enumerated column (unknown values are added
+    to the response's dictionary as they appear), and ``computed`` marks the
+    expensive fields that follow ``?include=``.
+    """
+
+    def __init__(self, name, get=None, enum=None, computed=False):
+        self.name = name
+        self.get = get or attrgetter(name)
+        self.enum = enum
+        self.computed = computed
+
+    def selected(self, fields):
+        if self.computed:
+            return fields.wants(self.name)
+        return fields.keeps(self.name)
+
+    def encode(self, items, enums):
+        get = self.get
+        values = [get(item) for item in items]
+        if self.enum is None:
+            return values
+
+        dictionary = list(self.enum)
+        codes = {value: code for code, value in enumerate(dictionary)}
+        encoded = []
+        for value in values:
+            if value is None:
+                encoded.append(None)
+                continue
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            encoded.append(code)
+        enums[self.name] = dictionary
+        return encoded
+
+
+def encode_columns(items, columns, fields=ALL_FIELDS):
+    """Encode model instances as a columnar payload."""
+    enums = {}
+    data = {
+        column.name: column.encode(items, enums)
+        for column in columns if column.selected(fields)
+    }
+    return {'format': 'columns', 'count': len(items), 'columns': data, 'enums': enums}
+
+
+def wants_columns():
+    """Whether the current request asked for ?format=columns."""
+    return request.args.get('format') == 'columns'
+
+
+def jsonify_list(model, items, fields=ALL_FIELDS):
+    """Serialize a list of model instances in the requested format."""
+    if wants_columns():
+        return jsonify(encode_columns(items, model.COLUMNS, fields))
+    return jsonify([item.to_dict(fields) for item in items])
@@ -0,0 +1,189 @@
+"""
+Attendance compliance counters.
+
+Many states require a number of instructional days (commonly 180) or hours
+(900-1,000) a school year. Rather than summing a year of ``Attendance`` rows
+for every report, each (student, school year) has an ``AttendanceCounter``
+of present, partial and absent days and total hours.
+
+An ``after_flush`` listener turns the attendance rows inserted, changed or
+deleted in a flush into per-counter deltas. It applies them in the same
+transaction, an ``INSERT ... ON CONFLICT DO UPDATE`` per counter that adds
+to the stored totals, so concurrent writers never lose an update. Only writes
+through the ORM unit of work are counted. After bulk ``Query.update()`` /
+``delete()`` or a data import, recompute with ``rebuild_counters()`` or
+``python -m src.utils.compliance``.
+
+Configuration (the endpoint also accepts per-request overrides):
+
+    COMPLIANCE_REQUIRED_DAYS    instructional days a year (default 180)
+    COMPLIANCE_REQUIRED_HOURS   instructional hours a year (default 900)
+"""
+
+import math
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import has_app_context
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from src.utils.attendance_bits import school_year, school_year_of
+
+COUNTED_STATUSES = {'present': 'present_days', 'partial': 'partial_days', 'absent': 'absent_days'}
+COUNTER_COLUMNS = ('present_days', 'partial_days', 'absent_days', 'hours')
+
+_TRACKED = ('student_id', 'date', 'status', 'hours')
+
+
+def _hours(value):
+    return Decimal(str(value)) if value else Decimal(0)
+
+
+def _add(deltas, student_id, day, status, hours, sign):
+    if student_id is None or day is None:
+        return
+    totals = deltas[(student_id, school_year_of(day))]
+    column = COUNTED_STATUSES.get(status)
+    if column:
+        totals[column] += sign
+    totals['hours'] += sign * _hours(hours)
+
+
+def _previous(record, name):
+    history = get_history(record, name)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(record, name)
+
+
+def attendance_deltas(session):
+    """{(student_id, school_year): {column: change}} for the attendance in the flush."""
+    from src.models import Attendance
+
+    deltas = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+    for record in session.new:
+        if isinstance(record, Attendance):
+            _add(deltas, record.student_id, record.date, record.status, record.hours, 1)
+    for record in session.deleted:
+        if isinstance(record, Attendance):
+            _add(deltas, *(_previous(record, name) for name in _TRACKED), -1)
+    for record in session.dirty:
+        if not isinstance(record, Attendance) or record in session.deleted:
+            continue
+        if not any(get_history(record, name).has_changes() for name in _TRACKED):
+            continue
+        _add(deltas, *(_previous(record, name) for name in _TRACKED), -1)
+        _add(deltas, record.student_id, record.date, record.status, record.hours, 1)
+    return {key: totals for key, totals in deltas.items() if any(totals.values())}
+
+
+def apply_deltas(connection, deltas):
+    """Add deltas to the stored counters, creating missing ones."""
+    from src.models import AttendanceCounter
+
+    table = AttendanceCounter.__table__
+    rows = [dict(student_id=student_id, school_year=year, **totals)
+            for (student_id, year), totals in deltas.items()]
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        for row in rows:
+            stmt = upsert(table).values(**row)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.student_id, table.c.school_year],
+                set_={**{name: table.c[name] + stmt.excluded[name] for name in COUNTER_COLUMNS},
+                      'updated_at': datetime.utcnow()},
+            ))
+        return
+    for row in rows:
+        changed = connection.execute(
+            update(table)
+            .where(table.c.student_id == row['student_id'], table.c.school_year == row['school_year'])
+            .values({name: table.c[name] + row[name] for name in COUNTER_COLUMNS}, updated_at=datetime.utcnow())
+        )
+        if not changed.rowcount:
+            connection.execute(insert(table).values(**row))
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_attendance(session, flush_context):
+    if not has_app_context():
+        return
+    deltas = attendance_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def rebuild_counters(session, student_ids=None):
+    """Recompute counters from the attendance rows; the caller commits."""
+    from src.models import Attendance, AttendanceCounter
+
+    stale = delete(AttendanceCounter)
+    rows = select(Attendance.student_id, Attendance.date, Attendance.status, Attendance.hours)
+    if student_ids is not None:
+        stale = stale.where(AttendanceCounter.student_id.in_(student_ids))
+        rows = rows.where(Attendance.student_id.in_(student_ids))
+    session.execute(stale, execution_options={'synchronize_session': False})
+
+    deltas = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+    for student_id, day, status, hours in session.execute(rows):
+        _add(deltas, student_id, day, status, hours, 1)
+    if deltas:
+        session.execute(insert(AttendanceCounter), [
+            dict(student_id=student_id, school_year=year, **totals)
+            for (student_id, year), totals in deltas.items()
+        ])
+    return len(deltas)
+
+
+def _progress(done, required, start, end, today):
+    """Progress toward one target, with the date it will be met at the pace so far."""
+    remaining = max(required - done, 0)
+    elapsed = (min(today, end) - start).days + 1
+    projected = None
+    if remaining and elapsed > 0 and done > 0 and today <= end:
+        projected = today + timedelta(days=math.ceil(remaining / (done / elapsed)))
+    return {
+        'completed': done,
+        'required': required,
+        'remaining': remaining,
+        'percent': round(100 * done / required, 1) if required else 100.0,
+        'met': remaining == 0,
+        'projected_completion': projected,
+        'on_track': remaining == 0 or (projected is not None and projected <= end),
+    }
+
+
+def compliance_report(counter, required_days, required_hours, year=None, today=None):
+    """Progress of a counter (or None, before any attendance) toward the yearly targets."""
+    today = today or date.today()
+    start, end = school_year(year, today)
+    days = counter.instructional_days if counter else 0
+    hours = float(counter.hours) if counter else 0.0
+    return {
+        'school_year': {'start': start, 'end': end},
+        'days': _progress(days, required_days, start, end, today),
+        'hours': _progress(hours, required_hours, start, end, today),
+        'totals': {
+            'present_days': counter.present_days if counter else 0,
+            'partial_days': counter.partial_days if counter else 0,
+            'absent_days': counter.absent_days if counter else 0,
+            'hours': hours,
+        },
+    }
+
+
+if __name__ == '__main__':
+    from src.main import create_app
+    from src.models import db
+
+    with create_app().app_context():
+        count = rebuild_counters(db.session)
+        db.session.commit()
+        print(f'Rebuilt {count} attendance counters')
@@ -0,0 +1,266 @@
+"""
+Database engine configuration.
+
+``engine_options()`` turns environment variables into
+``SQLALCHEMY_ENGINE_OPTIONS``, starting from a preset chosen by
+``FLASK_ENV``. Production uses a bounded pool that gives up on a checkout
+after a few seconds, pre-pings and recycles connections, and applies a
+statement timeout. Every ``DB_*`` variable overrides its preset value:
+
+    DB_POOL_SIZE                      persistent connections per process
+    DB_MAX_OVERFLOW                   extra connections allowed under burst
+    DB_POOL_TIMEOUT                   seconds to wait for a free connection
+    DB_POOL_RECYCLE                   seconds before a connection is replaced
+    DB_POOL_PRE_PING                  test connections on checkout (true/false)
+    DB_CONNECT_TIMEOUT                seconds to wait for the server on connect
+    DB_STATEMENT_TIMEOUT_MS           per-statement limit, 0 for none
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS server-side limit on idle transactions
+    DB_PGBOUNCER                      running behind PgBouncer in transaction mode
+
+SQLite is tuned for single-host deployments by ``src.utils.sqlite``, with
+``SQLITE_*`` overrides resolved by ``sqlite_settings()``:
+
+    SQLITE_JOURNAL_MODE               WAL (default), DELETE, TRUNCATE, ...
+    SQLITE_SYNCHRONOUS                NORMAL (default), FULL, OFF
+    SQLITE_BUSY_TIMEOUT_MS            wait this long for a lock (default 5000)
+    SQLITE_MMAP_SIZE                  bytes of the file read via mmap (default 256 MiB)
+    SQLITE_CACHE_SIZE_KB              page cache per connection (default 64 MiB)
+    SQLITE_TEMP_STORE                 MEMORY (default), FILE, DEFAULT
+    SQLITE_CHECKPOINT_SECONDS         background WAL checkpoint interval (default 300)
+    SQLITE_OPTIMIZE_SECONDS           background PRAGMA optimize interval (default 3600)
+
+Behind PgBouncer in transaction pooling mode, a server connection serves a
+different client on every transaction. So nothing may rely on session
+state. Timeouts are not sent as startup parameters, which PgBouncer
+rejects. Both the statement and the idle-in-transaction timeout are applied
+locally to each transaction (``set_config(..., true)``, i.e. ``SET LOCAL``)
+when it begins, and drivers that prepare statements server-side have that
+turned off.
+
+``init_database(app, db)`` installs the per-transaction timeout and turns
+pool exhaustion and cancelled statements into ``503`` responses instead of
+hangs and stack traces.
+"""
+
+import functools
+import os
+
+from flask import current_app, g, has_request_context, jsonify
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+PRESETS = {
+    'production': {
+        'pool_size': 10,
+        'max_overflow': 5,
+        'pool_timeout': 5,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'connect_timeout': 5,
+        'statement_timeout_ms': 15000,
+        'idle_in_transaction_timeout_ms': 60000,
+    },
+    'development': {
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'pool_recycle': 3600,
+        'pool_pre_ping': True,
+        'connect_timeout': 10,
+        'statement_timeout_ms': 0,
+        'idle_in_transaction_timeout_ms': 0,
+    },
+}
+
+# Analytics views aggregate a student's whole history and get more time.
+ANALYTICS_STATEMENT_TIMEOUT_MS = 60000
+
+# SQLSTATE for a statement cancelled by statement_timeout.
+QUERY_CANCELED = '57014'
+
+
+def _env_int(env, name, default):
+    value = env.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_bool(env, name, default):
+    value = env.get(name)
+    return value.lower() == 'true' if value not in (None, '') else default
+
+
+def database_settings(env_name='production', env=None):
+    """Resolve pool and timeout settings from the preset and DB_* variables."""
+    env = os.environ if env is None else env
+    preset = PRESETS.get(env_name, PRESETS['production'])
+    return {
+        'pool_size': _env_int(env, 'DB_POOL_SIZE', preset['pool_size']),
+        'max_overflow': _env_int(env, 'DB_MAX_OVERFLOW', preset['max_overflow']),
+        'pool_timeout': _env_int(env, 'DB_POOL_TIMEOUT', preset['pool_timeout']),
+        'pool_recycle': _env_int(env, 'DB_POOL_RECYCLE', preset['pool_recycle']),
+        'pool_pre_ping': _env_bool(env, 'DB_POOL_PRE_PING', preset['pool_pre_ping']),
+        'connect_timeout': _env_int(env, 'DB_CONNECT_TIMEOUT', preset['connect_timeout']),
+        'statement_timeout_ms': _env_int(env, 'DB_STATEMENT_TIMEOUT_MS', preset['statement_timeout_ms']),
+        'idle_in_transaction_timeout_ms': _env_int(
+            env, 'DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', preset['idle_in_transaction_timeout_ms']
+        ),
+        'pgbouncer': _env_bool(env, 'DB_PGBOUNCER', False),
+    }
+
+
+SQLITE_CHOICES = {
+    'journal_mode': ('WAL', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'OFF'),
+    'synchronous': ('NORMAL', 'FULL', 'EXTRA', 'OFF'),
+    'temp_store': ('MEMORY', 'FILE', 'DEFAULT'),
+}
+
+
+def _env_choice(env, name, default, choices):
+    value = (env.get(name) or default).upper()
+    if value not in choices:
+        raise ValueError(f'{name} must be one of {", ".join(choices)}, not {value!r}')
+    return value
+
+
+def sqlite_settings(env=None):
+    """Resolve SQLite pragmas and maintenance intervals from SQLITE_* variables."""
+    env = os.environ if env is None else env
+    return {
+        'journal_mode': _env_choice(env, 'SQLITE_JOURNAL_MODE', 'WAL', SQLITE_CHOICES['journal_mode']),
+        'synchronous': _env_choice(env, 'SQLITE_SYNCHRONOUS', 'NORMAL', SQLITE_CHOICES['synchronous']),
+        'busy_timeout_ms': _env_int(env, 'SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'mmap_size': _env_int(env, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size_kb': _env_int(env, 'SQLITE_CACHE_SIZE_KB', 64 * 1024),
+        'temp_store': _env_choice(env, 'SQLITE_TEMP_STORE', 'MEMORY', SQLITE_CHOICES['temp_store']),
+        'checkpoint_seconds': _env_int(env, 'SQLITE_CHECKPOINT_SECONDS', 300),
+        'optimize_seconds': _env_int(env, 'SQLITE_OPTIMIZE_SECONDS', 3600),
+    }
+
+
+def engine_options(database_url, settings):
+    """SQLALCHEMY_ENGINE_OPTIONS for a database URL and resolved settings."""
+    url = make_url(database_url)
+    if url.get_backend_name() != 'postgresql':
+        return {}
+
+    options = {
+        'pool_size': settings['pool_size'],
+        'max_overflow': settings['max_overflow'],
+        'pool_timeout': settings['pool_timeout'],
+        'pool_recycle': settings['pool_recycle'],
+        'pool_pre_ping': settings['pool_pre_ping'],
+        # Reuse the most recently returned connection so surplus ones go
+        # idle long enough to be recycled after a burst.
+        'pool_use_lifo': True,
+    }
+
+    connect_args = {
+        'connect_timeout': settings['connect_timeout'],
+        'application_name': 'homeschool-hub',
+    }
+    driver = url.get_driver_name()
+    if settings['pgbouncer']:
+        # Prepared statements live on one server connection, which the next
+        # transaction may not get.
+        if driver == 'psycopg':
+            connect_args['prepare_threshold'] = None
+        elif driver == 'asyncpg':
+            connect_args['statement_cache_size'] = 0
+            connect_args['prepared_statement_cache_size'] = 0
+
+    startup = {}
+    if not settings['pgbouncer']:
+        if settings['statement_timeout_ms']:
+            startup['statement_timeout'] = str(settings['statement_timeout_ms'])
+        if settings['idle_in_transaction_timeout_ms']:
+            startup['idle_in_transaction_session_timeout'] = str(settings['idle_in_transaction_timeout_ms'])
+    if driver == 'asyncpg':
+        # asyncpg names its connect timeout differently and takes startup
+        # parameters as server_settings instead of libpq options.
+        connect_args['timeout'] = connect_args.pop('connect_timeout')
+        connect_args['server_settings'] = dict(startup, application_name=connect_args.pop('application_name'))
+    elif startup:
+        connect_args['options'] = ' '.join(f'-c {name}={value}' for name, value in startup.items())
+    options['connect_args'] = connect_args
+    return options
+
+
+def statement_timeout(milliseconds):
+    """Give a view a statement timeout other than DB_STATEMENT_TIMEOUT_MS.
+
+    Apply it directly below the route decorator: the timeout is set when the
+    request's transaction begins, so it must be in place before
+    ``login_required`` loads the user.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            g.statement_timeout_ms = milliseconds
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _install_transaction_timeout(app, engine):
+    default_ms = app.config['DB_STATEMENT_TIMEOUT_MS']
+    idle_ms = app.config['DB_IDLE_IN_TRANSACTION_TIMEOUT_MS']
+    pgbouncer = app.config['DB_PGBOUNCER']
+
+    @event.listens_for(engine, 'begin')
+    def _set_local_timeout(conn):
+        timeout_ms = default_ms
+        if has_request_context():
+            timeout_ms = g.get('statement_timeout_ms', default_ms)
+        if pgbouncer:
+            # set_config(..., true) is SET LOCAL; one statement sets both
+            # timeouts in a single round trip.
+            settings = {'statement_timeout': timeout_ms}
+            if idle_ms:
+                settings['idle_in_transaction_session_timeout'] = idle_ms
+            conn.exec_driver_sql('SELECT ' + ', '.join(
+                f"set_config('{name}', '{int(value)}', true)" for name, value in settings.items()
+            ))
+        elif timeout_ms != default_ms:
+            # The default already arrived as a startup parameter, so only
+            # per-view overrides cost a round trip.
+            conn.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout_ms)}')
+
+
+def _pool_exhausted(error):
+    current_app.logger.error('Database pool exhausted: %s', error)
+    response = jsonify({'error': 'The server is busy, please retry shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def _statement_cancelled(error):
+    if getattr(error.orig, 'pgcode', None) != QUERY_CANCELED:
+        raise error
+    current_app.logger.warning('Statement timeout: %s', error.statement)
+    response = jsonify({'error': 'The request took too long to complete'})
+    response.status_code = 503
+    return response
+
+
+def init_database(app, db):
+    """Install per-transaction timeouts and pool error handlers."""
+    app.register_error_handler(PoolTimeoutError, _pool_exhausted)
+    app.register_error_handler(OperationalError, _statement_cancelled)
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'postgresql':
+        _install_transaction_timeout(app, engine)
+
+
+def dispose_engines(app, db, close=False):
+    """Empty the connection pools of every engine.
+
+    In a freshly forked worker, ``close=False`` drops the connections
+    inherited from the parent without sending a terminate message on
+    sockets the parent still owns. On shutdown, ``close=True`` closes them.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
@@ -0,0 +1,246 @@
+"""
+Live per-user events for Server-Sent Events.
+
+``GET /api/events`` (``src.routes.events``) streams notifications, so open
+dashboards refresh when their data changes instead of polling:
+
+    event: assignment.graded
+    data: {"entity": "grades", "id": 42, "operation": "upsert"}
+
+Events come from the change log (``src.utils.changes``). Each row written in
+a flush becomes an event for its owner: ``assignment.graded``,
+``submission.received``, ``attendance.recorded``, or ``<entity>.updated`` /
+``<entity>.deleted``. Clients fetch the rows themselves, e.g. from
+``/api/changes``. Events are delivered only once their transaction commits:
+
+* On PostgreSQL, each flush sends ``pg_notify`` on ``EVENTS_CHANNEL``.
+  Notifications are transactional, so they go out at commit and vanish on
+  rollback. Every worker runs one ``LISTEN`` thread, started with its first
+  stream, that hands them to local subscribers. That covers all workers and
+  hosts.
+* On other databases, events wait in the session until commit and reach the
+  streams of the same process only.
+
+PgBouncer in transaction mode (``DB_PGBOUNCER``) passes ``NOTIFY`` through
+but never delivers to a ``LISTEN``. Behind it, set ``EVENTS_LISTEN_URL`` to
+a direct connection to PostgreSQL for the listener threads. Without one,
+the app logs an error at startup and events fall back to the
+same-process delivery used on other databases.
+
+Each stream holds a worker thread (a greenlet under gevent). A worker
+accepts at most ``EVENTS_MAX_STREAMS`` at once and answers 503 beyond that,
+and clients keep polling. ``gunicorn.conf.py`` lowers the default for sync
+and gthread workers. A stream ends after ``EVENTS_STREAM_SECONDS`` and the
+browser's ``EventSource`` reconnects. A subscriber that falls
+``EVENTS_QUEUE_SIZE`` events behind gets one ``resync`` event instead.
+
+Configuration:
+
+    EVENTS_ENABLED             true/false (default true)
+    EVENTS_MAX_STREAMS         open streams per worker (default 100)
+    EVENTS_STREAM_SECONDS      lifetime of one stream (default 300)
+    EVENTS_HEARTBEAT_SECONDS   keep-alive comment interval (default 15)
+    EVENTS_QUEUE_SIZE          undelivered events kept per stream (default 100)
+    EVENTS_CHANNEL             PostgreSQL NOTIFY channel (default homeschool_events)
+    EVENTS_LISTEN_URL          database URL for LISTEN, bypassing PgBouncer
+                               (default SQLALCHEMY_DATABASE_URI unless DB_PGBOUNCER)
+"""
+
+import json
+import os
+import queue
+import select as select_module
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+# NOTIFY payloads are limited to 8000 bytes; events are sent in chunks.
+NOTIFY_CHUNK = 40
+
+ENTITY_NAMES = {
+    'students': 'student', 'assignments': 'assignment', 'grades': 'grade', 'submissions': 'submission',
+    'attendance': 'attendance', 'goals': 'goal', 'activities': 'activity',
+}
+UPSERT_EVENTS = {
+    'grades': 'assignment.graded',
+    'submissions': 'submission.received',
+    'attendance': 'attendance.recorded',
+}
+
+RESYNC = {'type': 'resync'}
+
+
+def event_type(entity, operation):
+    name = ENTITY_NAMES.get(entity, entity)
+    if operation == 'delete':
+        return f'{name}.deleted'
+    return UPSERT_EVENTS.get(entity, f'{name}.updated')
+
+
+class Subscription:
+    """One stream's queue of undelivered events."""
+
+    def __init__(self, user_id, size):
+        self.user_id = user_id
+        self._queue = queue.Queue(maxsize=size)
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Too far behind: replace the backlog with a single resync.
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            self._queue.put_nowait(RESYNC)
+
+    def get(self, timeout):
+        """The next event, or None after timeout seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """In-process pub/sub of events, keyed by user."""
+
+    def __init__(self, app):
+        self.app = app
+        self.queue_size = app.config['EVENTS_QUEUE_SIZE']
+        self.max_streams = app.config['EVENTS_MAX_STREAMS']
+        self._subscribers = defaultdict(set)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._listener_pid = None
+        self.listen_url = listen_url(app)
+
+    @property
+    def open_streams(self):
+        return self._count
+
+    def subscribe(self, user_id):
+        """A new Subscription, or None when this worker has no stream to spare."""
+        self._ensure_listener()
+        with self._lock:
+            if self._count >= self.max_streams:
+                return None
+            subscription = Subscription(user_id, self.queue_size)
+            self._subscribers[user_id].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, events):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            for item in events:
+                subscription.put(item)
+
+    def _ensure_listener(self):
+        """Start this worker's LISTEN thread on PostgreSQL; threads do not survive fork."""
+        if self.listen_url is None:
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+        dsn = self.listen_url.set(drivername='postgresql').render_as_string(hide_password=False)
+        threading.Thread(target=self._listen, args=(dsn,), name='events-listen', daemon=True).start()
+
+    def _listen(self, dsn):
+        import psycopg2
+        import psycopg2.extensions
+
+        channel = self.app.config['EVENTS_CHANNEL']
+        delay = 1
+        while True:
+            try:
+                connection = psycopg2.connect(dsn)
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{channel}"')
+                delay = 1
+                while True:
+                    if select_module.select([connection], [], [], 30) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        message = json.loads(connection.notifies.pop(0).payload)
+                        self.publish(message['user_id'], message['events'])
+            except Exception:
+                self.app.logger.exception('Event listener lost its connection, retrying in %ss', delay)
+                time.sleep(delay)
+                delay = min(delay * 2, 60)
+
+
+def listen_url(app):
+    """The PostgreSQL URL to LISTEN on, or None when events stay within the process."""
+    configured = app.config.get('EVENTS_LISTEN_URL')
+    if configured:
+        return make_url(configured)
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'postgresql':
+        return None
+    if app.config.get('DB_PGBOUNCER'):
+        app.logger.error('DB_PGBOUNCER is set without EVENTS_LISTEN_URL: PgBouncer does not deliver '
+                         'LISTEN/NOTIFY, so live events only reach streams on the worker that made the change')
+        return None
+    return url
+
+
+def queue_events(session, changes):
+    """Turn change-log rows of a flush into events, delivered when the transaction commits."""
+    if not has_app_context() or 'events' not in current_app.extensions:
+        return
+    by_user = defaultdict(list)
+    for change in changes:
+        by_user[change['user_id']].append({
+            'type': event_type(change['entity'], change['operation']),
+            'entity': change['entity'], 'id': change['entity_id'], 'operation': change['operation'],
+        })
+
+    connection = session.connection()
+    if connection.dialect.name == 'postgresql' and current_app.extensions['events'].listen_url is not None:
+        channel = current_app.config['EVENTS_CHANNEL']
+        for user_id, events in by_user.items():
+            for start in range(0, len(events), NOTIFY_CHUNK):
+                payload = json.dumps({'user_id': user_id, 'events': events[start:start + NOTIFY_CHUNK]})
+                connection.execute(select(func.pg_notify(channel, payload)))
+        return
+    pending = session.info.setdefault('pending_events', defaultdict(list))
+    for user_id, events in by_user.items():
+        pending[user_id].extend(events)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_events(session):
+    pending = session.info.pop('pending_events', None)
+    if pending and has_app_context() and 'events' in current_app.extensions:
+        broker = current_app.extensions['events']
+        for user_id, events in pending.items():
+            broker.publish(user_id, events)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_events(session):
+    session.info.pop('pending_events', None)
+
+
+def init_events(app):
+    """Create the app's event broker from EVENTS_* settings."""
+    if app.config['EVENTS_ENABLED']:
+        app.extensions['events'] = EventBroker(app)
@@ -0,0 +1,66 @@
+"""
+Sparse fieldsets for API responses.
+
+``?fields=id,title`` limits every serialized object to the listed keys.
+``?include=current_gpa`` controls the expensive computed fields (those that
+need extra queries or relationship loads): when ``include`` is present, only
+the computed fields it names are produced, alongside the plain columns.
+Without either parameter every field is returned, as before.
+
+Serializers call ``fields.wants(name)`` before computing an expensive value
+and finish with ``fields.filter(data)``; route handlers use the same checks to
+decide which relationships to eager load.
+"""
+
+from flask import request
+
+
+def _parse_list(value):
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class FieldSelection:
+    """The set of fields a request asked for."""
+
+    def __init__(self, fields=None, include=None):
+        self.fields = fields
+        self.include = include
+
+    @property
+    def is_default(self):
+        return self.fields is None and self.include is None
+
+    def wants(self, name):
+        """Whether an expensive computed field should be produced."""
+        if self.include is not None and name in self.include:
+            return True
+        if self.fields is not None:
+            return name in self.fields
+        return self.include is None
+
+    def wants_any(self, *names):
+        return any(self.wants(name) for name in names)
+
+    def keeps(self, name):
+        """Whether a plain key survives ?fields=."""
+        return self.fields is None or name in self.fields or (self.include is not None and name in self.include)
+
+    def filter(self, data):
+        """Drop keys that were not requested."""
+        if self.fields is None:
+            return data
+        keep = self.fields | (self.include or set())
+        return {key: value for key, value in data.items() if key in keep}
+
+
+ALL_FIELDS = FieldSelection()
+
+
+def requested_fields():
+    """Field selection from the current request's ?fields= and ?include=."""
+    return FieldSelection(
+        fields=_parse_list(request.args.get('fields')),
+        include=_parse_list(request.args.get('include'))
+    )
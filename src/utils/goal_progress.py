@@ -0,0 +1,129 @@
+"""
+Goal progress derived from grades.
+
+A goal whose ``progress_mode`` is ``count`` or ``average`` follows the graded
+assignments of its student in its subject. Progress is either their number,
+or their average percentage, measured against ``target_value``. Each such
+goal stores the running ``graded_count`` and ``percentage_sum`` it needs, so
+listing goals never reads assignments or grades.
+
+A ``before_flush`` listener turns the grades created, re-scored or deleted in
+a flush into (student, subject) deltas. That includes grades removed along
+with their assignment, and assignments moved to another subject or student.
+It adds the deltas to the matching automatic goals, which are then written in
+the same flush. ``seed_goal()`` fills a goal's totals from one aggregate
+query when it is created or its mode, subject or target changes. Bulk
+``Query.update()``/``delete()`` bypass the listener.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+
+def _previous(instance, name):
+    history = get_history(instance, name)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(instance, name)
+
+
+def _key(assignment, previous=False):
+    if previous:
+        return _previous(assignment, 'student_id'), _previous(assignment, 'subject_id')
+    return assignment.student_id, assignment.subject_id
+
+
+def _changed(instance, *names):
+    return any(get_history(instance, name).has_changes() for name in names)
+
+
+def grade_deltas(session, tracked=lambda key: True):
+    """{(student_id, subject_id): [count, percentage_sum]} for the grades in the flush.
+
+    Grades of deleted or moved assignments are only loaded when tracked(key)
+    says some goal follows their old (student, subject).
+    """
+    from src.models import Assignment, Grade
+
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+
+    def add(key, percentage, sign):
+        if percentage is None or key[0] is None or key[1] is None:
+            return
+        deltas[key][0] += sign
+        deltas[key][1] += sign * Decimal(str(percentage))
+
+    def assignment_of(grade):
+        return grade.assignment or session.get(Assignment, grade.assignment_id)
+
+    for grade in session.new:
+        if isinstance(grade, Grade) and grade.assignment_id is not None:
+            add(_key(assignment_of(grade)), grade.percentage, 1)
+    for grade in session.deleted:
+        if isinstance(grade, Grade):
+            add(_key(assignment_of(grade), previous=True), _previous(grade, 'percentage'), -1)
+    for grade in session.dirty:
+        if isinstance(grade, Grade) and grade not in session.deleted and _changed(grade, 'percentage'):
+            assignment = assignment_of(grade)
+            add(_key(assignment, previous=True), _previous(grade, 'percentage'), -1)
+            add(_key(assignment), grade.percentage, 1)
+
+    for assignment in session.deleted:
+        # Its grade goes with it through ON DELETE CASCADE, unseen by the ORM.
+        if isinstance(assignment, Assignment) and tracked(_key(assignment, previous=True)):
+            grade = assignment.grade
+            if grade is not None and grade not in session.deleted:
+                add(_key(assignment, previous=True), _previous(grade, 'percentage'), -1)
+    for assignment in session.dirty:
+        if (isinstance(assignment, Assignment) and assignment not in session.deleted
+                and _changed(assignment, 'student_id', 'subject_id')
+                and (tracked(_key(assignment, previous=True)) or tracked(_key(assignment)))):
+            grade = assignment.grade
+            if grade is None or grade in session.new or grade in session.deleted or _changed(grade, 'percentage'):
+                continue  # Counted by the grade loops above
+            add(_key(assignment, previous=True), grade.percentage, -1)
+            add(_key(assignment), grade.percentage, 1)
+
+    return {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+
+
+@event.listens_for(Session, 'before_flush')
+def _track_goal_progress(session, flush_context, instances):
+    from src.models import Goal
+    from src.models.goal import AUTO_PROGRESS_MODES
+
+    goals = {}
+
+    def auto_goals(key):
+        if key not in goals:
+            student_id, subject_id = key
+            goals[key] = [] if None in key else session.execute(select(Goal).where(
+                Goal.student_id == student_id, Goal.subject_id == subject_id,
+                Goal.progress_mode.in_(AUTO_PROGRESS_MODES),
+            )).scalars().all()
+        return goals[key]
+
+    with session.no_autoflush:
+        deltas = grade_deltas(session, tracked=lambda key: bool(auto_goals(key)))
+        for key, (count, percentage_sum) in deltas.items():
+            for goal in auto_goals(key):
+                goal.apply_grades(count, percentage_sum)
+
+
+def seed_goal(goal):
+    """Fill an automatic goal's totals from the grades that already exist."""
+    from src.models import db, Assignment, Grade
+
+    goal.graded_count, goal.percentage_sum = 0, Decimal(0)
+    if goal.is_automatic and goal.subject_id is not None:
+        goal.graded_count, goal.percentage_sum = db.session.execute(
+            select(func.count(Grade.id), func.coalesce(func.sum(Grade.percentage), 0))
+            .join(Assignment, Assignment.id == Grade.assignment_id)
+            .where(Assignment.student_id == goal.student_id, Assignment.subject_id == goal.subject_id,
+                   Grade.percentage.isnot(None))
+        ).one()
+    goal.refresh_progress()
@@ -0,0 +1,165 @@
+"""
+Liveness and readiness probes.
+
+``/livez`` answers from memory: if the worker can run a view, it is alive.
+
+``/readyz`` reports the last result of a background prober instead of
+touching the database itself. Every ``HEALTH_PROBE_INTERVAL`` seconds, each
+worker checks three things over a dedicated single-connection engine, so
+probes never take a connection from the pool that serves requests:
+
+* the database answers ``SELECT 1``;
+* the request pool is below ``HEALTH_MAX_POOL_SATURATION`` of its size plus
+  overflow;
+* the schema is current: at the Alembic head when ``migrations/`` exists,
+  otherwise every model table is present.
+
+The worker is ready while the last probe passed and is younger than three
+intervals. ``/api/health`` returns the same snapshot in its original shape.
+"""
+
+import os
+import threading
+import time
+
+from flask import current_app, jsonify
+from sqlalchemy import create_engine, inspect, text
+
+from src.utils.metrics import pool_capacity
+
+VERSION = '1.0.0'
+
+
+def pool_saturation(pool):
+    """Checked-out connections over pool capacity, or None without a fixed size."""
+    capacity = pool_capacity(pool)
+    if not capacity:
+        return None
+    return pool.checkedout() / capacity
+
+
+class HealthProber:
+    """Background health checks for one app, cached between runs."""
+
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+        self.interval = app.config['HEALTH_PROBE_INTERVAL']
+        self.max_saturation = app.config['HEALTH_MAX_POOL_SATURATION']
+        self.snapshot = None
+        self._engine = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _probe_engine(self):
+        if self._engine is None:
+            with self.app.app_context():
+                url = self.db.engine.url
+            options = {} if url.get_backend_name() == 'sqlite' else {'pool_size': 1, 'max_overflow': 0}
+            options['connect_args'] = self.app.config['SQLALCHEMY_ENGINE_OPTIONS'].get('connect_args', {})
+            self._engine = create_engine(url, pool_pre_ping=True, **options)
+        return self._engine
+
+    def _schema_state(self, connection):
+        migrate = self.app.extensions.get('migrate')
+        directory = getattr(migrate, 'directory', 'migrations')
+        if os.path.isdir(directory):
+            from alembic.config import Config
+            from alembic.runtime.migration import MigrationContext
+            from alembic.script import ScriptDirectory
+
+            config = Config()
+            config.set_main_option('script_location', directory)
+            heads = set(ScriptDirectory.from_config(config).get_heads())
+            current = set(MigrationContext.configure(connection).get_current_heads())
+            return {'migrations': 'current' if current == heads else 'pending',
+                    'revision': sorted(current)}, current == heads
+
+        present = set(inspect(connection).get_table_names())
+        missing = sorted(set(self.db.metadata.tables) - present)
+        return {'migrations': 'unmanaged', 'missing_tables': missing}, not missing
+
+    def probe(self):
+        """Run every check now and store the result."""
+        started = time.monotonic()
+        snapshot = {'checked_at': time.time(), 'version': VERSION}
+        ready = True
+        try:
+            with self._probe_engine().connect() as connection:
+                connection.execute(text('SELECT 1'))
+                schema, schema_ready = self._schema_state(connection)
+            snapshot['database'] = 'connected'
+            snapshot['schema'] = schema
+            ready = schema_ready
+        except Exception as exc:
+            snapshot['database'] = 'disconnected'
+            snapshot['error'] = str(exc)
+            ready = False
+
+        with self.app.app_context():
+            pool = self.db.engine.pool
+        saturation = pool_saturation(pool)
+        snapshot['pool'] = pool.status()
+        snapshot['pool_saturation'] = None if saturation is None else round(saturation, 3)
+        if saturation is not None and saturation >= self.max_saturation:
+            ready = False
+
+        snapshot['status'] = 'ready' if ready else 'unavailable'
+        snapshot['probe_ms'] = round((time.monotonic() - started) * 1000, 2)
+        snapshot['_monotonic'] = time.monotonic()
+        self.snapshot = snapshot
+        return snapshot
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.probe()
+            except Exception:
+                self.app.logger.exception('Health probe failed')
+
+    def current(self):
+        """The latest snapshot; the first call in a process probes inline and starts the prober."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads and connections do not survive fork.
+                self._pid = os.getpid()
+                self._engine = None
+                self.probe()
+                threading.Thread(target=self._run, name='health-prober', daemon=True).start()
+        snapshot = dict(self.snapshot)
+        if time.monotonic() - snapshot.pop('_monotonic') > 3 * self.interval:
+            snapshot['status'] = 'unavailable'
+            snapshot['error'] = 'health probe is stale'
+        return snapshot
+
+
+def livez():
+    return jsonify({'status': 'alive'})
+
+
+def readyz():
+    snapshot = current_app.extensions['health'].current()
+    return jsonify(snapshot), 200 if snapshot['status'] == 'ready' else 503
+
+
+def health_check():
+    snapshot = current_app.extensions['health'].current()
+    healthy = snapshot['status'] == 'ready'
+    body = {
+        'status': 'healthy' if healthy else 'unhealthy',
+        'database': snapshot['database'],
+        'pool': snapshot['pool'],
+        'version': snapshot['version'],
+    }
+    if 'error' in snapshot:
+        body['error'] = snapshot['error']
+    return jsonify(body), 200 if healthy else 503
+
+
+def init_health(app, db):
+    """Register /livez, /readyz and /api/health backed by a per-process prober."""
+    app.extensions['health'] = HealthProber(app, db)
+    app.add_url_rule('/livez', 'livez', livez)
+    app.add_url_rule('/readyz', 'readyz', readyz)
+    app.add_url_rule('/api/health', 'health_check', health_check)
@@ -0,0 +1,63 @@
+"""
+In-process background jobs.
+
+A ``JobQueue`` runs submitted callables one at a time on a daemon thread of
+the worker that submitted them, each inside an app context, so request
+handlers can return before slow work such as purging a deleted account is
+done. The thread starts with the first job in each process, since threads do
+not survive gunicorn's fork. The number of waiting jobs is published as
+``homeschool_job_queue_depth{queue=...}``.
+
+Jobs are not persisted: work that must survive a restart needs its own
+marker in the database and a way to resume it (see ``src.utils.purge``).
+"""
+
+import os
+import queue
+import threading
+
+from src.utils.metrics import set_queue_depth
+
+
+class JobQueue:
+    """A named FIFO of callables run on one background thread per process."""
+
+    def __init__(self, app, name):
+        self.app = app
+        self.name = name
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, name=f'jobs-{self.name}', daemon=True).start()
+            return self._queue
+
+    def submit(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in the background, after earlier jobs."""
+        jobs = self._ensure_started()
+        jobs.put((func, args, kwargs))
+        set_queue_depth(self.name, jobs.qsize())
+
+    def join(self):
+        """Block until every submitted job has finished."""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def _run(self):
+        jobs = self._queue
+        while True:
+            func, args, kwargs = jobs.get()
+            set_queue_depth(self.name, jobs.qsize())
+            try:
+                with self.app.app_context():
+                    func(*args, **kwargs)
+            except Exception:
+                self.app.logger.exception('Background job %s failed in queue %s',
+                                          getattr(func, '__name__', func), self.name)
+            finally:
+                jobs.task_done()
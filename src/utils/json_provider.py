@@ -0,0 +1,71 @@
+"""
+Fast JSON provider.
+
+Installed as ``app.json``, so ``jsonify``, ``request.get_json`` and the test
+client all go through it. When ``orjson`` is importable it does the encoding
+and decoding; otherwise the stdlib ``json`` module is used with the same
+output rules. Either way ``date``, ``datetime`` and ``time`` values encode as
+ISO 8601 strings and ``Decimal`` as a JSON number, so serializers can hand
+column values over untouched instead of converting each field themselves.
+"""
+
+from datetime import date, time
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(o):
+    # datetime is a date subclass, so this covers it too.
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, with a stdlib fallback."""
+
+    default = staticmethod(_default)
+    use_orjson = orjson is not None
+
+    def _orjson_options(self, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson and not kwargs:
+            try:
+                return orjson.dumps(obj, default=_default, option=self._orjson_options()).decode()
+            except TypeError:
+                # Values orjson refuses (e.g. integers wider than 64 bits)
+                # still encode through the stdlib below.
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            body = orjson.dumps(obj, default=_default, option=self._orjson_options(pretty))
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
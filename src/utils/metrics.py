@@ -0,0 +1,270 @@
+"""
+Prometheus metrics for the API.
+
+Exposes request counts and latency histograms per blueprint endpoint, database
+pool checkout wait and utilization, background job queue depth, cache hit
+ratios, size and evictions at ``/api/metrics`` in the Prometheus text format.
+
+Under gunicorn, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty directory that
+all workers share; each worker then writes its samples to memory-mapped files
+there and the endpoint aggregates them, so a scrape sees every worker rather
+than whichever one answered. The master of a preloaded app zeroes its own pool
+gauges (``clear_pool_gauges``) so only workers' pools are summed.
+
+The endpoint is not public. With ``METRICS_TOKEN`` set, a scrape must send
+``Authorization: Bearer <token>``; otherwise only clients in
+``METRICS_ALLOWED_NETWORKS`` (loopback by default) are served. The check
+reads ``request.remote_addr``, which behind a reverse proxy is the proxy's
+address, so deployments behind one should use the token.
+"""
+
+import hmac
+import ipaddress
+import os
+import time
+
+from flask import Response, current_app, g, jsonify, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_COUNT = Counter(
+    'homeschool_http_requests_total', 'HTTP requests by endpoint, method and status',
+    ['endpoint', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'homeschool_http_request_duration_seconds', 'HTTP request latency by endpoint',
+    ['endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    'homeschool_db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled database connection',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    'homeschool_db_pool_checkout_timeouts_total', 'Connection checkouts that gave up waiting on the pool'
+)
+POOL_CHECKED_OUT = Gauge(
+    'homeschool_db_pool_checked_out', 'Connections currently checked out of the pool',
+    multiprocess_mode='livesum'
+)
+POOL_CONNECTIONS = Gauge(
+    'homeschool_db_pool_connections', 'Open database connections held by the pool, idle or in use',
+    multiprocess_mode='livesum'
+)
+POOL_CAPACITY = Gauge(
+    'homeschool_db_pool_capacity', 'Pool size plus allowed overflow',
+    multiprocess_mode='livesum'
+)
+JOB_QUEUE_DEPTH = Gauge(
+    'homeschool_job_queue_depth', 'Jobs waiting in a background queue',
+    ['queue'], multiprocess_mode='livesum'
+)
+CACHE_REQUESTS = Counter(
+    'homeschool_cache_requests_total', 'Cache lookups by cache and result',
+    ['cache', 'result']
+)
+
+CACHE_EVICTIONS = Counter(
+    'homeschool_cache_evictions_total', 'Cache entries dropped, by cache and reason',
+    ['cache', 'reason']
+)
+CACHE_BYTES = Gauge(
+    'homeschool_cache_bytes', 'Approximate memory held by a cache',
+    ['cache'], multiprocess_mode='livesum'
+)
+CACHE_ENTRIES = Gauge(
+    'homeschool_cache_entries', 'Entries held by a cache',
+    ['cache'], multiprocess_mode='livesum'
+)
+
+
+def record_cache_lookup(cache, hit):
+    """Count a cache hit or miss."""
+    CACHE_REQUESTS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+def record_cache_eviction(cache, reason, count=1):
+    """Count entries dropped from a cache (expired, evicted, invalidated)."""
+    CACHE_EVICTIONS.labels(cache=cache, reason=reason).inc(count)
+
+
+def set_cache_size(cache, entries, size_bytes):
+    """Publish the current entry count and memory use of a cache."""
+    CACHE_ENTRIES.labels(cache=cache).set(entries)
+    CACHE_BYTES.labels(cache=cache).set(size_bytes)
+
+
+def set_queue_depth(queue, depth):
+    """Publish the current depth of a background job queue."""
+    JOB_QUEUE_DEPTH.labels(queue=queue).set(depth)
+
+
+def pool_capacity(pool):
+    """Pool size plus overflow, or None for pools without a fixed size."""
+    size = getattr(pool, 'size', None)
+    if not callable(size):
+        return None
+    max_overflow = getattr(pool, '_max_overflow', 0)
+    return size() + max(max_overflow, 0)
+
+
+class _ProxyCollector:
+    """Re-exposes another registry's metrics inside a scrape registry."""
+
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        return self.source.collect()
+
+
+class _DerivedMetricsCollector:
+    """Adds ratios computed from the aggregated counters at scrape time."""
+
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        hits = {}
+        totals = {}
+        utilization = {}
+        for family in self.source.collect():
+            for sample in family.samples:
+                if sample.name == 'homeschool_cache_requests_total':
+                    cache = sample.labels['cache']
+                    totals[cache] = totals.get(cache, 0) + sample.value
+                    if sample.labels['result'] == 'hit':
+                        hits[cache] = hits.get(cache, 0) + sample.value
+                elif sample.name in ('homeschool_db_pool_checked_out', 'homeschool_db_pool_capacity'):
+                    utilization[sample.name] = utilization.get(sample.name, 0) + sample.value
+
+        ratio = GaugeMetricFamily('homeschool_cache_hit_ratio', 'Cache hits over lookups', labels=['cache'])
+        for cache, total in totals.items():
+            ratio.add_metric([cache], hits.get(cache, 0) / total if total else 0.0)
+        yield ratio
+
+        capacity = utilization.get('homeschool_db_pool_capacity', 0)
+        if capacity:
+            yield GaugeMetricFamily(
+                'homeschool_db_pool_utilization', 'Checked-out connections over pool capacity',
+                value=utilization.get('homeschool_db_pool_checked_out', 0) / capacity
+            )
+
+
+def _registry():
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        source = CollectorRegistry()
+        multiprocess.MultiProcessCollector(source)
+    else:
+        source = REGISTRY
+    registry = CollectorRegistry()
+    registry.register(_ProxyCollector(source))
+    registry.register(_DerivedMetricsCollector(source))
+    return registry
+
+
+def _scrape_allowed():
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        scheme, _, sent = request.headers.get('Authorization', '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(sent.strip().encode(), token.encode())
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in network for network in current_app.config['METRICS_ALLOWED_NETWORKS'])
+
+
+def metrics_view():
+    """Prometheus scrape endpoint."""
+    if not _scrape_allowed():
+        return jsonify({'error': 'Metrics are not available to this client'}), 403
+    return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def parse_networks(value):
+    """ip_network objects from a comma-separated list of CIDRs."""
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(',') if item.strip()]
+
+
+def clear_pool_gauges():
+    """Zero this process's pool gauges, e.g. in a gunicorn master that serves no requests."""
+    for gauge in (POOL_CAPACITY, POOL_CHECKED_OUT, POOL_CONNECTIONS):
+        gauge.set(0)
+
+
+def _timed_connect(pool):
+    connect = pool.connect
+
+    def timed():
+        start = time.perf_counter()
+        try:
+            return connect()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+    pool.connect = timed
+    capacity = pool_capacity(pool)
+    if capacity is not None:
+        POOL_CAPACITY.set(capacity)
+
+
+def instrument_engine(engine):
+    """Track checkout wait, open and checked-out connections for an engine's pool."""
+    _timed_connect(engine.pool)
+
+    @event.listens_for(engine, 'engine_disposed')
+    def _reinstrument(disposed_engine):
+        # dispose() swaps in a fresh pool object, so wrap that one too.
+        POOL_CHECKED_OUT.set(0)
+        _timed_connect(disposed_engine.pool)
+
+    @event.listens_for(engine, 'connect')
+    def _connect(dbapi_connection, connection_record):
+        POOL_CONNECTIONS.inc()
+
+    @event.listens_for(engine, 'close')
+    def _close(dbapi_connection, connection_record):
+        POOL_CONNECTIONS.dec()
+
+    @event.listens_for(engine, 'checkout')
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, 'checkin')
+    def _checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.dec()
+
+
+def _start_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _observe_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    REQUEST_LATENCY.labels(endpoint=endpoint, method=request.method).observe(time.perf_counter() - started)
+    REQUEST_COUNT.labels(endpoint=endpoint, method=request.method, status=response.status_code).inc()
+    return response
+
+
+def init_metrics(app, db):
+    """Register request metrics, pool instrumentation and /api/metrics."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule('/api/metrics', 'metrics', metrics_view)
+    with app.app_context():
+        instrument_engine(db.engine)
@@ -0,0 +1,179 @@
+"""
+Account deletion.
+
+``delete_account()`` marks the user deleted and revokes their tokens, so the
+account can no longer log in or use any device's token, and then removes its data in batches of
+``ACCOUNT_PURGE_BATCH_SIZE`` rows, one short transaction per batch. No
+session ever loads the family's rows and no transaction holds locks on all of
+them. Accounts with up to ``ACCOUNT_PURGE_INLINE_ROWS`` rows are purged
+within the request; larger ones go to the ``purge`` job queue.
+
+Rows are deleted children first rather than left to ``ON DELETE CASCADE``,
+so purging also works on databases created before those constraints.
+Submission files are removed once the batch that referenced them has
+committed.
+
+A purge interrupted by a restart is picked up again by the first request a
+worker serves. The worker running a purge stamps ``users.purge_started_at``
+with every batch. Another worker takes over only once that stamp is
+``RESUME_AFTER`` old, and only if its conditional ``UPDATE`` of the stamp
+wins, so two workers never purge the same account at once.
+
+Configuration:
+
+    ACCOUNT_PURGE_BATCH_SIZE    rows deleted per transaction (default 1000)
+    ACCOUNT_PURGE_INLINE_ROWS   largest account purged within the request (default 2000)
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+
+from src.utils.auth import revoke_user_tokens
+from src.utils.jobs import JobQueue
+
+RESUME_AFTER = timedelta(minutes=10)
+
+_NO_SYNC = {'synchronize_session': False}
+
+
+def account_rows(session, user_id):
+    """Rows belonging to the account's students, the bulk of any purge."""
+    from src.models import Activity, Assignment, Attendance, Goal, Student
+
+    students = select(Student.id).where(Student.user_id == user_id).scalar_subquery()
+    assignments, attendance, goals, activities = (
+        select(func.count()).select_from(model).where(model.student_id.in_(students)).scalar_subquery()
+        for model in (Assignment, Attendance, Goal, Activity)
+    )
+    return session.execute(select(assignments + attendance + goals + activities)).scalar()
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            current_app.logger.warning('Could not remove submission file %s', path)
+
+
+def claim_purge(session, user_id):
+    """Take over a deleted account's purge unless another worker is on it; commits."""
+    from src.models import User
+
+    now = datetime.utcnow()
+    result = session.execute(
+        update(User)
+        .where(User.id == user_id, User.deleted_at.isnot(None),
+               (User.purge_started_at.is_(None)) | (User.purge_started_at < now - RESUME_AFTER))
+        .values(purge_started_at=now),
+        execution_options=_NO_SYNC,
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def _commit_batch(session, user_id):
+    """Commit a batch, keeping the purge claimed."""
+    from src.models import User
+
+    session.execute(update(User).where(User.id == user_id).values(purge_started_at=datetime.utcnow()),
+                    execution_options=_NO_SYNC)
+    session.commit()
+
+
+def _purge_in_batches(session, user_id, model, condition, batch_size):
+    while True:
+        ids = session.execute(select(model.id).where(condition).limit(batch_size)).scalars().all()
+        if not ids:
+            return
+        session.execute(delete(model).where(model.id.in_(ids)), execution_options=_NO_SYNC)
+        _commit_batch(session, user_id)
+
+
+def purge_account(user_id, batch_size=None):
+    """Delete a user and everything they own, a batch per transaction."""
+    from src.models import (
+        db, AcademicPeriod, Activity, Assignment, AssignmentSchedule, Attendance, AttendanceCounter, Change, Goal,
+        Grade, Student, Subject, Submission, User,
+    )
+
+    session = db.session
+    batch_size = batch_size or current_app.config['ACCOUNT_PURGE_BATCH_SIZE']
+    students = select(Student.id).where(Student.user_id == user_id).scalar_subquery()
+
+    while True:
+        ids = session.execute(
+            select(Assignment.id).where(Assignment.student_id.in_(students)).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        paths = session.execute(
+            select(Submission.file_path).where(Submission.assignment_id.in_(ids), Submission.file_path.isnot(None))
+        ).scalars().all()
+        session.execute(delete(Grade).where(Grade.assignment_id.in_(ids)), execution_options=_NO_SYNC)
+        session.execute(delete(Submission).where(Submission.assignment_id.in_(ids)), execution_options=_NO_SYNC)
+        session.execute(delete(Assignment).where(Assignment.id.in_(ids)), execution_options=_NO_SYNC)
+        _commit_batch(session, user_id)
+        _remove_files(paths)
+
+    for model in (AssignmentSchedule, Attendance, AttendanceCounter, Goal, Activity):
+        _purge_in_batches(session, user_id, model, model.student_id.in_(students), batch_size)
+    session.execute(update(Grade).where(Grade.graded_by == user_id).values(graded_by=None),
+                    execution_options=_NO_SYNC)
+    for model in (Change, Student, Subject, AcademicPeriod):
+        _purge_in_batches(session, user_id, model, model.user_id == user_id, batch_size)
+    session.execute(delete(User).where(User.id == user_id), execution_options=_NO_SYNC)
+    session.commit()
+
+    # Bulk deletes bypass the response cache's flush listener.
+    cache = current_app.extensions.get('response_cache')
+    if cache is not None:
+        cache.backend.invalidate_user(user_id)
+    current_app.logger.info('Purged account %s', user_id)
+
+
+def delete_account(user):
+    """Mark a user deleted and purge their data; True when the purge runs in the background."""
+    from src.models import db
+
+    user.deleted_at = user.purge_started_at = datetime.utcnow()
+    revoke_user_tokens(user)
+    db.session.commit()
+    if account_rows(db.session, user.id) <= current_app.config['ACCOUNT_PURGE_INLINE_ROWS']:
+        purge_account(user.id)
+        return False
+    current_app.extensions['purge_queue'].submit(purge_account, user.id)
+    return True
+
+
+def resume_purges():
+    """Finish purges whose worker stopped before completing them."""
+    from src.models import db, User
+
+    stale = datetime.utcnow() - RESUME_AFTER
+    stalled = db.session.execute(
+        select(User.id).where(User.deleted_at.isnot(None),
+                              (User.purge_started_at.is_(None)) | (User.purge_started_at < stale))
+    ).scalars().all()
+    for user_id in stalled:
+        # Another worker may have resumed it since the select
+        if claim_purge(db.session, user_id):
+            purge_account(user_id)
+
+
+def init_purge(app):
+    """Create the purge queue and resume stalled purges once per worker."""
+    jobs = JobQueue(app, 'purge')
+    app.extensions['purge_queue'] = jobs
+    started = {'pid': None}
+
+    @app.before_request
+    def _resume_stalled_purges():
+        if started['pid'] != os.getpid():
+            started['pid'] = os.getpid()
+            jobs.submit(resume_purges)
@@ -0,0 +1,175 @@
+"""
+Read-replica routing.
+
+``DATABASE_REPLICA_URLS`` (comma-separated) adds one engine per replica as
+``replica0``, ``replica1``, ... binds. ``RoutingSession.get_bind`` sends the
+SELECTs of ``GET``/``HEAD`` requests handled by a blueprint to a replica, chosen
+once per request. Flushes, DML, raw SQL and everything outside those requests
+stay on the primary.
+
+Read-your-writes: a request that commits a write stamps the user's session
+cookie. For ``REPLICA_STICKY_SECONDS`` afterwards that user's reads go to the
+primary, so replication lag never hides their own changes. Bearer-token
+requests get no cookie: the stamp comes back in an ``X-Last-Write`` response
+header instead, and a client that echoes it on later requests reads its
+writes the same way.
+
+Failover: before a request first uses a replica, a pooled connection is
+checked out from it. A replica that fails that check, or whose connections
+fail mid-request, is skipped for ``REPLICA_RETRY_SECONDS``. When no replica
+is available, reads go to the primary.
+"""
+
+import random
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request, session as cookie_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+
+from src.utils.auth import authenticate
+
+STICKY_KEY = '_last_write'
+LAST_WRITE_HEADER = 'X-Last-Write'
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries for a list of replica URLs."""
+    return {f'replica{index}': url for index, url in enumerate(urls)}
+
+
+class ReplicaSet:
+    """The replica engines of an app and which of them are currently down."""
+
+    def __init__(self, engines, retry_seconds, logger):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self.logger = logger
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def mark_down(self, engine):
+        now = time.monotonic()
+        with self._lock:
+            if self._down_until.get(engine, 0) > now:
+                return
+            self._down_until[engine] = now + self.retry_seconds
+        self.logger.warning('Replica %s marked down for %ss', engine.url.render_as_string(hide_password=True),
+                            self.retry_seconds)
+
+    def available(self):
+        now = time.monotonic()
+        return [engine for engine in self.engines if self._down_until.get(engine, 0) <= now]
+
+    def choose(self):
+        """A healthy replica engine, or None to use the primary."""
+        candidates = self.available()
+        random.shuffle(candidates)
+        for engine in candidates:
+            try:
+                engine.connect().close()
+            except DBAPIError:
+                self.mark_down(engine)
+                continue
+            return engine
+        return None
+
+
+def last_write():
+    """When the requester last wrote: the cookie stamp, or the header token clients echo."""
+    stamp = cookie_session.get(STICKY_KEY)
+    if stamp is None:
+        stamp = request.headers.get(LAST_WRITE_HEADER, type=float)
+    return stamp
+
+
+def _reads_may_use_replica():
+    if request.method not in ('GET', 'HEAD') or request.blueprint is None:
+        return False
+    last_write_at = last_write()
+    return last_write_at is None or time.time() - last_write_at >= current_app.config['REPLICA_STICKY_SECONDS']
+
+
+class RoutingSession(Session):
+    """Session that sends read-only request traffic to replicas."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None and getattr(clause, 'is_select', False) and not self._flushing:
+            replica = _request_replica()
+            if replica is not None:
+                # Lagging data: the response cache must not keep this response
+                g.read_replica = True
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _request_replica():
+    if not has_request_context():
+        return None
+    replicas = current_app.extensions.get('replicas')
+    if replicas is None or not replicas.engines:
+        return None
+    if 'replica_engine' not in g:
+        g.replica_engine = replicas.choose() if _reads_may_use_replica() else None
+    return g.replica_engine
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _rolled_back(session):
+    session.info.pop('wrote', None)
+
+
+def _stamp_last_write(response):
+    if g.get('db_wrote'):
+        if authenticate()[1] is not None:
+            # Token clients are stateless: no session cookie to set.
+            response.headers[LAST_WRITE_HEADER] = repr(time.time())
+        else:
+            cookie_session[STICKY_KEY] = time.time()
+    return response
+
+
+def init_replicas(app, db):
+    """Register replica engines, failure detection and write stickiness."""
+    with app.app_context():
+        keys = [key for key in db.engines if key and key.startswith('replica')]
+        engines = [db.engines[key] for key in keys]
+    for key in keys:
+        # Replicas mirror the primary's schema. Dropping the empty metadata
+        # Flask-SQLAlchemy made for the bind keeps create_all()/drop_all()
+        # (here and in other apps sharing ``db``) off them.
+        if key in db.metadatas and not db.metadatas[key].tables:
+            del db.metadatas[key]
+    replicas = ReplicaSet(engines, app.config['REPLICA_RETRY_SECONDS'], app.logger)
+    app.extensions['replicas'] = replicas
+    # The write stamp also tells the response cache which entries predate
+    # the user's last write, so it is kept with or without replicas.
+    app.after_request(_stamp_last_write)
+    if not engines:
+        return
+
+    for engine in engines:
+        @event.listens_for(engine, 'handle_error')
+        def _replica_error(context, engine=engine):
+            # Connection failures only; a bad query is not a bad replica.
+            if context.is_disconnect or context.connection is None:
+                replicas.mark_down(engine)
@@ -0,0 +1,307 @@
+"""
+Per-user response cache.
+
+``@cached_response``, applied directly below the route decorator, stores the
+``200`` responses of a read-only view under (user, endpoint, view arguments,
+normalized query string). Later requests replay them, ``ETag`` and
+``304``s included, without running the view or touching the database.
+
+Entries are invalidated precisely rather than left to expire. An
+``after_flush`` listener maps every flushed row to the user who owns it:
+``user_id`` directly, or through its ``student_id`` or ``assignment_id``.
+When the transaction commits, that user's entries are dropped. Only writes
+through the ORM unit of work are seen; bulk ``Query.update()``/``delete()``
+are not.
+
+Another worker process cannot drop this process's entries. So an entry
+older than the requester's last-write stamp (``src.utils.replicas``) is
+treated as a miss, and a cookie session always reads its own writes. Bearer
+clients need not echo their ``X-Last-Write`` stamp, so they bypass an
+in-process cache altogether. Other sessions of the same account may see an
+entry up to ``RESPONSE_CACHE_TTL`` old. With a shared backend every process
+sees invalidations, and token clients are cached too.
+
+Responses whose queries went to a read replica are never stored. Replication
+lag of a second would otherwise be kept for up to ``RESPONSE_CACHE_TTL``
+right after the invalidation.
+
+Configuration:
+
+    RESPONSE_CACHE_ENABLED     true/false (default true)
+    RESPONSE_CACHE_TTL         seconds an entry lives (default 60)
+    RESPONSE_CACHE_MAX_BYTES   memory bound of the in-process cache (default 32 MiB)
+    RESPONSE_CACHE_BACKEND     ``package.module:factory`` returning a CacheBackend
+                               for the app, e.g. one backed by Redis
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from werkzeug.utils import import_string
+
+from src.utils.auth import authenticate, current_user_id
+from src.utils.metrics import record_cache_eviction, record_cache_lookup, set_cache_size
+from src.utils.replicas import last_write
+
+CACHE_NAME = 'responses'
+
+# Bookkeeping per entry beyond its body and headers: key tuple, entry and
+# OrderedDict node.
+ENTRY_OVERHEAD_BYTES = 400
+
+CachedResponse = namedtuple('CachedResponse', 'status headers body created')
+
+
+def entry_size(entry):
+    """Approximate memory held by a cached response."""
+    return len(entry.body) + sum(len(name) + len(value) for name, value in entry.headers) + ENTRY_OVERHEAD_BYTES
+
+
+class CacheBackend:
+    """Storage for cached responses.
+
+    Keys are tuples whose first item is the owning user id. A shared
+    implementation must keep generations and entries where every worker
+    sees them.
+    """
+
+    # Whether every worker sees the same entries and invalidations.
+    shared = True
+
+    def get(self, key):
+        """The entry stored under key, or None when missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key, entry, ttl):
+        raise NotImplementedError
+
+    def generation(self, user_id):
+        """A value that changes whenever the user's entries are invalidated."""
+        raise NotImplementedError
+
+    def invalidate_user(self, user_id):
+        """Drop every entry of a user and move them to a new generation."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU with per-entry TTL, bounded by the bytes it holds."""
+
+    shared = False
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        # One response may not take more than an eighth of the cache.
+        self.max_entry_bytes = max_bytes // 8
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry, expires, size = self._entries.pop(key)
+        self.bytes -= size
+        user_keys = self._by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._by_user[key[0]]
+
+    def _publish(self):
+        set_cache_size(CACHE_NAME, len(self._entries), self.bytes)
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires, size = item
+            if expires <= time.monotonic():
+                self._remove(key)
+                self._publish()
+                record_cache_eviction(CACHE_NAME, 'expired')
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, ttl):
+        size = entry_size(entry)
+        if size > self.max_entry_bytes:
+            return
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (entry, time.monotonic() + ttl, size)
+            self._by_user.setdefault(key[0], set()).add(key)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+            self._publish()
+        if evicted:
+            record_cache_eviction(CACHE_NAME, 'size', evicted)
+
+    def generation(self, user_id):
+        return self._generations.get(user_id, 0)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            keys = list(self._by_user.get(user_id, ()))
+            for key in keys:
+                self._remove(key)
+            self._publish()
+        if keys:
+            record_cache_eviction(CACHE_NAME, 'invalidated', len(keys))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self.bytes = 0
+            self._publish()
+
+
+class ResponseCache:
+    """Keys, lookups and stores for one app."""
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+
+    def key(self, user_id):
+        query = tuple(sorted((name, tuple(values)) for name, values in request.args.lists() if any(values)))
+        view_args = tuple(sorted((request.view_args or {}).items()))
+        return (user_id, self.backend.generation(user_id), request.endpoint, view_args, query)
+
+    def lookup(self, key, last_write=None):
+        entry = self.backend.get(key)
+        if entry is not None and last_write is not None and entry.created <= last_write:
+            entry = None
+        record_cache_lookup(CACHE_NAME, entry is not None)
+        return entry
+
+    def store(self, key, response, created):
+        if response.status_code != 200 or response.is_streamed:
+            return
+        headers = [(name, value) for name, value in response.headers.items() if name.lower() != 'set-cookie']
+        self.backend.set(key, CachedResponse(response.status_code, headers, response.get_data(), created), self.ttl)
+
+
+def cached_response(view):
+    """Serve a read-only view from the per-user response cache."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = current_app.extensions.get('response_cache')
+        user_id = current_user_id()
+        if cache is None or user_id is None or request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+        if not cache.backend.shared and authenticate()[1] is not None:
+            # A token client's own write in another worker would go unseen.
+            return view(*args, **kwargs)
+
+        key = cache.key(user_id)
+        entry = cache.lookup(key, last_write())
+        if entry is not None:
+            response = current_app.response_class(entry.body, status=entry.status, headers=entry.headers)
+            response.headers['X-Cache'] = 'hit'
+            return response.make_conditional(request)
+
+        # Stamped before the view runs: a write committed meanwhile makes the
+        # entry stale for its writer.
+        created = time.time()
+        response = current_app.make_response(view(*args, **kwargs))
+        if not g.get('read_replica'):
+            cache.store(key, response, created)
+        response.headers['X-Cache'] = 'miss'
+        return response
+    return wrapper
+
+
+def _values(state, attr):
+    """Current and pre-flush values of a loaded attribute."""
+    values = set(state.attrs[attr].history.deleted or ())
+    values.add(state.dict.get(attr))
+    values.discard(None)
+    return values
+
+
+def owning_users(session, objects):
+    """Ids of the users whose data includes any of the given rows."""
+    from src.models import Assignment, Student, User
+
+    users, students, assignments = set(), set(), set()
+    for obj in objects:
+        state = inspect(obj)
+        if isinstance(obj, User):
+            users.add(state.identity[0] if state.identity else obj.id)
+        for attr, ids in (('user_id', users), ('student_id', students), ('assignment_id', assignments)):
+            if attr not in state.mapper.attrs:
+                continue
+            values = _values(state, attr)
+            if not values and state.identity:
+                # Expired and never reloaded: read the owner from the row.
+                column = getattr(type(obj), attr)
+                values = set(session.connection().execute(
+                    select(column).where(type(obj).id == state.identity[0])
+                ).scalars())
+            ids.update(values)
+
+    connection = session.connection()
+    if assignments:
+        students.update(connection.execute(
+            select(Assignment.student_id).where(Assignment.id.in_(assignments))
+        ).scalars())
+    if students:
+        users.update(connection.execute(
+            select(Student.user_id).where(Student.id.in_(students))
+        ).scalars())
+    return users
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    if not has_app_context() or 'response_cache' not in current_app.extensions:
+        return
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    if changed:
+        session.info.setdefault('response_cache_users', set()).update(owning_users(session, changed))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    users = session.info.pop('response_cache_users', None)
+    if users and has_app_context() and 'response_cache' in current_app.extensions:
+        backend = current_app.extensions['response_cache'].backend
+        for user_id in users:
+            backend.invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('response_cache_users', None)
+
+
+def init_response_cache(app):
+    """Create the app's response cache from RESPONSE_CACHE_* settings."""
+    if not app.config['RESPONSE_CACHE_ENABLED']:
+        return
+    factory = app.config['RESPONSE_CACHE_BACKEND']
+    if factory:
+        backend = import_string(factory)(app)
+    else:
+        backend = MemoryBackend(app.config['RESPONSE_CACHE_MAX_BYTES'])
+    app.extensions['response_cache'] = ResponseCache(backend, app.config['RESPONSE_CACHE_TTL'])
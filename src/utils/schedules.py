@@ -0,0 +1,122 @@
+"""
+Recurring assignments.
+
+An ``AssignmentSchedule`` is an assignment template with an RRULE
+recurrence. Concrete ``Assignment`` rows exist only for occurrences up to
+the schedule's ``materialized_through`` date, kept ``SCHEDULE_HORIZON_DAYS``
+(default 14) ahead of today, so lists and dashboards never see months of
+future rows. The window rolls forward:
+
+* when a schedule is created or its rule changes, within the request;
+* once a day in each worker, by a job on the ``schedules`` queue that
+  catches up every active schedule behind the horizon.
+
+Assignments are unique per (schedule, due date), so workers racing over the
+same window insert each occurrence once.
+
+Views covering dates past a schedule's window (a calendar months ahead, or a
+dashboard while the daily job is behind) expand the remaining occurrences
+on the fly with ``pending_occurrences()`` instead of reading rows.
+"""
+
+import os
+from datetime import date, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, exc, or_, select
+
+from src.utils.changes import record_changes
+from src.utils.jobs import JobQueue
+
+
+def horizon(today=None):
+    """The last day that should have concrete assignment rows."""
+    return (today or date.today()) + timedelta(days=current_app.config['SCHEDULE_HORIZON_DAYS'])
+
+
+def materialize(schedule, through):
+    """Add Assignment rows for the schedule's occurrences up to through; the caller commits."""
+    from src.models import db, Assignment
+
+    if schedule.materialized_through is not None and schedule.materialized_through >= through:
+        return 0
+    days = schedule.pending_occurrences(schedule.start_date, through)
+    existing = set()
+    if days:
+        existing = set(db.session.execute(
+            select(Assignment.due_date).where(
+                Assignment.schedule_id == schedule.id, Assignment.due_date.between(days[0], days[-1])
+            )
+        ).scalars())
+    created = [schedule.build_assignment(day) for day in days if day not in existing]
+    db.session.add_all(created)
+    schedule.materialized_through = through
+    return len(created)
+
+
+def schedules_behind(through):
+    """Active schedules whose window ends before through."""
+    from src.models import AssignmentSchedule
+
+    return select(AssignmentSchedule).where(
+        AssignmentSchedule.active.is_(True),
+        AssignmentSchedule.start_date <= through,
+        or_(AssignmentSchedule.materialized_through.is_(None),
+            AssignmentSchedule.materialized_through < through),
+    )
+
+
+def materialize_due_schedules():
+    """Roll every active schedule's window forward to the horizon, one commit each."""
+    from src.models import db
+
+    through = horizon()
+    created = 0
+    for schedule in db.session.execute(schedules_behind(through)).scalars().all():
+        try:
+            created += materialize(schedule, through)
+            db.session.commit()
+        except exc.IntegrityError:
+            # Another worker materialized the same occurrences first.
+            db.session.rollback()
+    if created:
+        current_app.logger.info('Materialized %d scheduled assignments through %s', created, through)
+    return created
+
+
+def reset_future(schedule, today=None):
+    """Drop untouched future occurrences so a changed schedule can recreate them.
+
+    Occurrences already started, submitted or graded are kept; rematerializing
+    skips their dates.
+    """
+    from src.models import db, Assignment, Student
+
+    today = today or date.today()
+    ids = db.session.execute(
+        select(Assignment.id).where(
+            Assignment.schedule_id == schedule.id, Assignment.due_date >= today,
+            Assignment.status == 'assigned',
+        )
+    ).scalars().all()
+    if ids:
+        db.session.execute(delete(Assignment).where(Assignment.id.in_(ids)),
+                           execution_options={'synchronize_session': False})
+        # A bulk delete is invisible to the change log's flush listener.
+        owner = db.session.execute(select(Student.user_id).where(Student.id == schedule.student_id)).scalar()
+        record_changes(db.session.connection(), owner, Assignment.__tablename__, ids, 'delete')
+    schedule.materialized_through = today - timedelta(days=1)
+
+
+def init_schedules(app):
+    """Create the schedules queue and roll windows forward once a day per worker."""
+    jobs = JobQueue(app, 'schedules')
+    app.extensions['schedule_queue'] = jobs
+    last_run = {'pid': None, 'day': None}
+
+    @app.before_request
+    def _materialize_daily():
+        today = date.today()
+        if last_run['pid'] != os.getpid() or last_run['day'] != today:
+            last_run.update(pid=os.getpid(), day=today)
+            jobs.submit(materialize_due_schedules)
@@ -0,0 +1,135 @@
+"""
+Request-level SQL instrumentation.
+
+Hooks SQLAlchemy's cursor events to record, for every request, how many
+statements ran, how long they spent in the database and which statement
+shapes repeated. Each response gets a ``Server-Timing`` header and a
+structured ``sql_stats`` log line; in development a warning is logged when
+one statement shape runs more often than ``SQL_REPEATED_STATEMENT_THRESHOLD``
+times in a single request, which is the usual signature of an N+1 lazy load.
+"""
+
+import json
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\bIN\s*\((?:[^()]*?)\)', re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_POSTCOMPILE = re.compile(r'\(__\[POSTCOMPILE_\w+\]\)')
+
+_listeners_installed = False
+
+
+def fingerprint(statement):
+    """Normalize a SQL statement so repeated shapes compare equal."""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _POSTCOMPILE.sub('(?)', statement)
+    statement = _IN_LIST.sub('IN (?)', statement)
+    statement = _STRING_LITERAL.sub('?', statement)
+    return _NUMBER_LITERAL.sub('?', statement)
+
+
+class RequestSQLStats:
+    """SQL statistics for a single request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement, elapsed):
+        self.query_count += 1
+        self.db_time += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement shapes that ran more than threshold times."""
+        return [(shape, count) for shape, count in self.fingerprints.most_common() if count > threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_stats' in g:
+        conn.info.setdefault('sql_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or 'sql_stats' not in g:
+        return
+    starts = conn.info.get('sql_query_start')
+    if not starts:
+        return
+    g.sql_stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def _handle_error(exception_context):
+    # A failed statement gets no after_cursor_execute; drop its start time so
+    # the connection's next statement is not timed against it.
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('sql_query_start'):
+        conn.info['sql_query_start'].pop()
+
+
+def _start_request():
+    g.sql_stats = RequestSQLStats()
+
+
+def _finish_request(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    db_ms = stats.db_time * 1000
+    config = current_app.config
+
+    if config.get('SQL_SERVER_TIMING', True):
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.2f};desc="{stats.query_count} queries", app;dur={total_ms:.2f}'
+        )
+
+    threshold = config.get('SQL_REPEATED_STATEMENT_THRESHOLD', 5)
+    repeated = stats.repeated(threshold)
+
+    current_app.logger.info('sql_stats %s', json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'queries': stats.query_count,
+        'db_ms': round(db_ms, 2),
+        'total_ms': round(total_ms, 2),
+        'repeated_statements': len(repeated),
+    }))
+
+    if repeated and (current_app.debug or config.get('ENV_NAME') == 'development'):
+        for shape, count in repeated:
+            current_app.logger.warning(
+                'Possible N+1 on %s %s: statement ran %d times (threshold %d): %s',
+                request.method, request.path, count, threshold, shape[:300]
+            )
+
+    return response
+
+
+def init_sql_instrumentation(app):
+    """Attach per-request SQL instrumentation to the app."""
+    global _listeners_installed
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+    if not _listeners_installed:
+        # Listen on the Engine class so every engine the app creates is covered.
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _listeners_installed = True
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
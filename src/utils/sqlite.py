@@ -0,0 +1,214 @@
+"""
+SQLite profile for single-host deployments.
+
+With SQLite's defaults (rollback journal, ``synchronous=FULL``, no busy
+timeout) a write from one gunicorn worker makes a concurrent write from
+another fail with ``database is locked``. ``init_sqlite(app, db)`` fixes
+that for SQLite URLs:
+
+* Every connection gets the ``SQLITE_*`` pragmas from ``sqlite_settings()``:
+  WAL, so readers never wait on the writer; ``synchronous=NORMAL``, which
+  WAL makes crash-safe; a busy timeout; and a larger page cache, mmap and
+  in-memory temp tables. Foreign keys are enforced, so ``ON DELETE
+  CASCADE`` works as it does on PostgreSQL.
+* Writers queue for a single writer lock before their first flush or
+  bulk UPDATE/DELETE and hold it until the transaction ends. Threads of a
+  worker wait on a ``threading.Lock``, workers on an ``flock()`` of
+  ``<database>-writer.lock``.
+  A writer that waits longer than the busy timeout gets the same ``503``
+  as an exhausted connection pool.
+* A background thread in each worker runs a passive WAL checkpoint every
+  ``SQLITE_CHECKPOINT_SECONDS`` and ``PRAGMA optimize`` every
+  ``SQLITE_OPTIMIZE_SECONDS``.
+"""
+
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from src.utils.database import sqlite_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads of one process are still serialized
+    fcntl = None
+
+# Writer lock of each tuned engine, looked up from session events.
+_writers = weakref.WeakKeyDictionary()
+
+
+def connection_pragmas(settings):
+    """PRAGMA statements run on every new connection."""
+    return [
+        f"PRAGMA journal_mode = {settings['journal_mode']}",
+        f"PRAGMA synchronous = {settings['synchronous']}",
+        f"PRAGMA busy_timeout = {int(settings['busy_timeout_ms'])}",
+        f"PRAGMA mmap_size = {int(settings['mmap_size'])}",
+        # Negative sizes are in KiB rather than pages.
+        f"PRAGMA cache_size = -{int(settings['cache_size_kb'])}",
+        f"PRAGMA temp_store = {settings['temp_store']}",
+        # Enforce foreign keys so ON DELETE CASCADE applies, as on PostgreSQL.
+        "PRAGMA foreign_keys = ON",
+    ]
+
+
+def install_pragmas(engine, settings):
+    """Run connection_pragmas() on every connection the engine opens."""
+    pragmas = connection_pragmas(settings)
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+class WriterLock:
+    """One writing transaction at a time across threads and processes."""
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self._pid = None
+        self._thread_lock = None
+        self._fd = None
+
+    def _for_this_process(self):
+        # A forked worker must not share the parent's lock or open file:
+        # flock() treats every process using one file description as a
+        # single owner.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread_lock = threading.Lock()
+            self._fd = None
+
+    def acquire(self):
+        self._for_this_process()
+        deadline = time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise PoolTimeoutError('Timed out waiting for the SQLite writer lock')
+        if self.path is None or fcntl is None:
+            return
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            while True:
+                try:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise PoolTimeoutError('Timed out waiting for the SQLite writer lock')
+                    time.sleep(0.002)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        if self.path is not None and fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+def _acquire_writer(session):
+    if 'sqlite_writer' in session.info:
+        return
+    writer = _writers.get(session.get_bind())
+    if writer is not None:
+        writer.acquire()
+        session.info['sqlite_writer'] = writer
+
+
+@event.listens_for(Session, 'before_flush')
+def _before_flush(session, flush_context, instances):
+    _acquire_writer(session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _before_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _acquire_writer(orm_execute_state.session)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _release_writer(session, transaction):
+    if transaction.parent is None and 'sqlite_writer' in session.info:
+        session.info.pop('sqlite_writer').release()
+
+
+class Maintenance(threading.Thread):
+    """Periodic WAL checkpoints and ``PRAGMA optimize`` for one engine."""
+
+    def __init__(self, engine, writer, settings, logger):
+        super().__init__(name='sqlite-maintenance', daemon=True)
+        self.engine = engine
+        self.writer = writer
+        self.checkpoint_seconds = settings['checkpoint_seconds']
+        self.optimize_seconds = settings['optimize_seconds']
+        self.logger = logger
+        self.stopped = threading.Event()
+
+    def checkpoint(self):
+        """Copy committed WAL pages into the database without blocking anyone."""
+        with self.engine.connect() as conn:
+            busy, log_pages, checkpointed = conn.exec_driver_sql('PRAGMA wal_checkpoint(PASSIVE)').one()
+        return {'busy': bool(busy), 'log_pages': log_pages, 'checkpointed': checkpointed}
+
+    def optimize(self):
+        """Refresh planner statistics that have drifted; may write, so it takes the writer lock."""
+        self.writer.acquire()
+        try:
+            with self.engine.connect() as conn:
+                conn.exec_driver_sql('PRAGMA optimize')
+                conn.commit()
+        finally:
+            self.writer.release()
+
+    def run(self):
+        last_optimize = time.monotonic()
+        while not self.stopped.wait(self.checkpoint_seconds):
+            try:
+                self.checkpoint()
+                if time.monotonic() - last_optimize >= self.optimize_seconds:
+                    self.optimize()
+                    last_optimize = time.monotonic()
+            except Exception:
+                self.logger.exception('SQLite maintenance failed')
+
+
+def init_sqlite(app, db):
+    """Tune SQLite engines and start maintenance in each worker process."""
+    with app.app_context():
+        engine = db.engine
+        engines = [e for e in db.engines.values() if e.dialect.name == 'sqlite']
+    if engine.dialect.name != 'sqlite':
+        return
+
+    settings = sqlite_settings()
+    for sqlite_engine in engines:
+        install_pragmas(sqlite_engine, settings)
+
+    database = engine.url.database
+    lock_path = f'{database}-writer.lock' if database and database != ':memory:' else None
+    writer = WriterLock(lock_path, settings['busy_timeout_ms'] / 1000)
+    _writers[engine] = writer
+    app.extensions['sqlite'] = {'settings': settings, 'writer': writer, 'maintenance': None}
+
+    if not settings['checkpoint_seconds']:
+        return
+    started = {'pid': None}
+
+    @app.before_request
+    def _start_maintenance():
+        # Threads do not survive fork, so each worker starts its own.
+        if started['pid'] != os.getpid():
+            started['pid'] = os.getpid()
+            maintenance = Maintenance(engine, writer, settings, app.logger)
+            maintenance.start()
+            app.extensions['sqlite']['maintenance'] = maintenance
@@ -0,0 +1,210 @@
+"""
+Static asset serving from an in-memory manifest.
+
+At startup ``StaticManifest.build()`` reads every file under the static
+folder once. For each it records the content type, a content-hash ETag,
+and gzip and brotli variants when they are smaller. Requests are then
+answered from a dictionary, with no filesystem probes:
+
+* Files whose names already carry a content hash (``index-3f9a2c1b.js``
+  from the frontend build) are served ``Cache-Control: public, max-age=...,
+  immutable``. Every other file is also reachable under a fingerprinted
+  alias, ``favicon.<hash>.ico`` (see ``asset_url()``), with the same
+  headers.
+* Unhashed URLs, including ``index.html`` and the SPA fallback for unknown
+  paths, are served ``no-cache``. Browsers revalidate them with the ETag
+  and usually get a ``304``.
+* The encoding is picked from ``Accept-Encoding`` (br, then gzip), with
+  ``Vary: Accept-Encoding``.
+
+Compressing at startup costs a little per worker. Build steps can instead
+write the variants next to the files, which the manifest then loads as is:
+
+    python -m src.utils.static_assets src/static
+
+Files changed after startup are only picked up on restart.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Build output already named by content: a hex hash (index-3f9a2c1b.js,
+# main.3f9a2c1b.css), or Vite's 8-character base64url hash with a digit in it
+# under assets/ (assets/index-BfPx1Ktn.js). Anything else, such as a
+# hand-maintained assets/logo.png, gets a fingerprinted alias instead.
+HASHED_NAME = re.compile(
+    r'[.-][0-9a-fA-F]{8,}\.[^./]+$'
+    r'|(^|/)assets/([^/]+/)*[^/]*[.-](?=[A-Za-z_]*[0-9])[A-Za-z0-9_]{8}\.[^./]+$'
+)
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml',
+                      'image/svg+xml', 'application/wasm', 'application/manifest+json')
+MIN_COMPRESS_BYTES = 1024
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+
+def _compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _is_hashed(name):
+    return HASHED_NAME.search(name) is not None
+
+
+class Asset:
+    """One static file: its bytes per encoding and its validators."""
+
+    __slots__ = ('path', 'content_type', 'etag', 'variants', 'fingerprint')
+
+    def __init__(self, path, content_type, data, variants):
+        self.path = path
+        self.content_type = content_type
+        self.fingerprint = hashlib.sha256(data).hexdigest()[:12]
+        self.etag = self.fingerprint
+        self.variants = dict(variants, identity=data)
+
+    def negotiate(self, accept_encodings):
+        """The smallest encoding the client accepts: br, then gzip, then none."""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+
+class StaticManifest:
+    """URL path -> Asset for every file in a static folder."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.assets = {}
+        self.urls = {}
+
+    @classmethod
+    def build(cls, folder):
+        manifest = cls(folder)
+        if folder is None or not os.path.isdir(folder):
+            return manifest
+        for root, _, files in os.walk(folder):
+            for name in files:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                full_path = os.path.join(root, name)
+                rel = os.path.relpath(full_path, folder).replace(os.sep, '/')
+                manifest.add(rel, full_path)
+        return manifest
+
+    def add(self, rel, full_path):
+        with open(full_path, 'rb') as fh:
+            data = fh.read()
+        content_type = mimetypes.guess_type(rel)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        asset = Asset(rel, content_type, data, _variants(full_path, data, content_type))
+        if _is_hashed(rel):
+            self.assets[rel] = (asset, IMMUTABLE)
+            self.urls[rel] = rel
+        else:
+            stem, dot, ext = rel.rpartition('.')
+            alias = f'{stem}.{asset.fingerprint}.{ext}' if dot else f'{rel}.{asset.fingerprint}'
+            self.assets[rel] = (asset, REVALIDATE)
+            self.assets[alias] = (asset, IMMUTABLE)
+            self.urls[rel] = alias
+
+    def lookup(self, path):
+        """(asset, cache-control) for a URL path, falling back to index.html."""
+        found = self.assets.get(path) if path else None
+        return found or self.assets.get('index.html')
+
+
+def _variants(full_path, data, content_type):
+    """Compressed encodings worth serving: prebuilt siblings, else compressed now."""
+    variants = {}
+    if not _compressible(content_type) or len(data) < MIN_COMPRESS_BYTES:
+        return variants
+    for encoding, suffix, compress in (
+        ('gzip', '.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0)),
+        ('br', '.br', brotli.compress if brotli else None),
+    ):
+        sibling = full_path + suffix
+        if os.path.exists(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(full_path):
+            with open(sibling, 'rb') as fh:
+                compressed = fh.read()
+        elif compress is not None:
+            compressed = compress(data)
+        else:
+            continue
+        # Not worth a separate variant unless it saves a tenth.
+        if len(compressed) < len(data) * 0.9:
+            variants[encoding] = compressed
+    return variants
+
+
+def asset_url(path):
+    """The cache-forever URL of a static file, for templates and responses."""
+    manifest = current_app.extensions['static_manifest']
+    return '/' + manifest.urls.get(path, path)
+
+
+def serve(path):
+    manifest = current_app.extensions['static_manifest']
+    if manifest.folder is None:
+        return "Static folder not configured", 404
+    found = manifest.lookup(path)
+    if found is None:
+        return "index.html not found", 404
+    asset, cache_control = found
+    encoding = asset.negotiate(request.accept_encodings)
+    response = current_app.response_class(asset.variants[encoding], content_type=asset.content_type)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    response.set_etag(asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}')
+    return response.make_conditional(request)
+
+
+def init_static(app):
+    """Build the static manifest and route the SPA catch-all to it."""
+    app.extensions['static_manifest'] = StaticManifest.build(app.static_folder)
+    app.add_template_global(asset_url)
+    app.add_url_rule('/', 'serve', serve, defaults={'path': ''})
+    app.add_url_rule('/<path:path>', 'serve', serve)
+
+
+def precompress(folder):
+    """Write .gz and .br variants next to every compressible file (build time)."""
+    written = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.endswith(('.gz', '.br')):
+                continue
+            full_path = os.path.join(root, name)
+            content_type = mimetypes.guess_type(name)[0] or ''
+            with open(full_path, 'rb') as fh:
+                data = fh.read()
+            if not _compressible(content_type) or len(data) < MIN_COMPRESS_BYTES:
+                continue
+            outputs = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                outputs['.br'] = brotli.compress(data)
+            for suffix, compressed in outputs.items():
+                with open(full_path + suffix, 'wb') as fh:
+                    fh.write(compressed)
+                written += 1
+    return written
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+    print(f'Wrote {precompress(target)} compressed variants under {target}')
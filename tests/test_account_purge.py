@@ -0,0 +1,130 @@
+"""Account deletion: batched purges, database cascades and the job queue."""
+
+import threading
+from datetime import datetime, timedelta
+
+from src.models import db, Assignment, Attendance, Grade, Student, Submission, User
+from src.utils.jobs import JobQueue
+from src.utils.purge import RESUME_AFTER, claim_purge, purge_account, resume_purges
+from tests.conftest import TEST_PASSWORD, seed_family
+
+
+def doomed_family(app, username, tmp_path):
+    """A family to delete, with one submission file on disk."""
+    with app.app_context():
+        user = seed_family(username, students=2, assignments_per_student=6, attendance_days=5)
+        submission = Submission.query.join(Assignment).join(Student).filter(Student.user_id == user.id).first()
+        path = tmp_path / f'{username}.pdf'
+        path.write_bytes(b'%PDF')
+        submission.file_path = str(path)
+        db.session.commit()
+        return user.id, path
+
+
+def login(app, username):
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': username, 'password': TEST_PASSWORD})
+    assert response.status_code == 200
+    return client
+
+
+def remaining_rows(app, user_id):
+    with app.app_context():
+        students = [s.id for s in Student.query.filter_by(user_id=user_id)]
+        return (
+            db.session.get(User, user_id) is not None,
+            Assignment.query.filter(Assignment.student_id.in_(students)).count(),
+            Attendance.query.filter(Attendance.student_id.in_(students)).count(),
+            len(students),
+        )
+
+
+def test_small_account_is_purged_inline(app, tmp_path):
+    user_id, path = doomed_family(app, 'inline', tmp_path)
+    client = login(app, 'inline')
+
+    response = client.delete(f'/api/users/{user_id}')
+    assert response.status_code == 200
+    assert remaining_rows(app, user_id) == (False, 0, 0, 0)
+    assert not path.exists()
+    assert app.test_client().post('/api/auth/login', json={
+        'username': 'inline', 'password': TEST_PASSWORD}).status_code == 401
+
+
+def test_large_account_is_purged_in_background_batches(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'ACCOUNT_PURGE_INLINE_ROWS', 0)
+    monkeypatch.setitem(app.config, 'ACCOUNT_PURGE_BATCH_SIZE', 4)
+    user_id, path = doomed_family(app, 'background', tmp_path)
+    client = login(app, 'background')
+
+    response = client.delete(f'/api/users/{user_id}')
+    assert response.status_code == 202
+    assert response.get_json()['purge'] == 'scheduled'
+    # Marked deleted at once, before the purge finishes.
+    assert app.test_client().post('/api/auth/login', json={
+        'username': 'background', 'password': TEST_PASSWORD}).status_code == 401
+
+    app.extensions['purge_queue'].join()
+    assert remaining_rows(app, user_id) == (False, 0, 0, 0)
+    assert not path.exists()
+
+
+def test_stalled_purges_are_resumed_by_one_worker(app, tmp_path):
+    running, _ = doomed_family(app, 'running', tmp_path)
+    stalled, _ = doomed_family(app, 'stalled', tmp_path)
+    with app.app_context():
+        long_ago = datetime.utcnow() - RESUME_AFTER - timedelta(minutes=1)
+        db.session.get(User, running).deleted_at = long_ago
+        db.session.get(User, running).purge_started_at = datetime.utcnow()
+        db.session.get(User, stalled).deleted_at = db.session.get(User, stalled).purge_started_at = long_ago
+        db.session.commit()
+
+        # A purge still making progress is left to its worker
+        assert not claim_purge(db.session, running)
+        resume_purges()
+    assert remaining_rows(app, running)[0] is True
+    assert remaining_rows(app, stalled) == (False, 0, 0, 0)
+
+    with app.app_context():
+        db.session.get(User, running).purge_started_at = long_ago
+        db.session.commit()
+        assert claim_purge(db.session, running)
+        assert not claim_purge(db.session, running)  # Already taken
+        purge_account(running)
+
+
+def test_orm_delete_leaves_children_to_the_database(app, family, query_recorder):
+    with app.app_context():
+        assignment = Assignment(student_id=family['student_id'], subject_id=family['subject_id'],
+                                title='Cascade me')
+        db.session.add(assignment)
+        db.session.flush()
+        grade = Grade(assignment_id=assignment.id)
+        grade.set_grade(9, 10, family['user_id'])
+        db.session.add_all([grade, Submission(assignment_id=assignment.id, file_name='x.pdf')])
+        db.session.commit()
+        assignment_id = assignment.id
+        db.session.expunge_all()
+
+        assignment = db.session.get(Assignment, assignment_id)
+        with query_recorder:
+            db.session.delete(assignment)
+            db.session.commit()
+        statements = ' '.join(statement for statement, _ in query_recorder.statements)
+        assert 'FROM grades' not in statements and 'FROM submissions' not in statements
+        assert Grade.query.filter_by(assignment_id=assignment_id).count() == 0
+        assert Submission.query.filter_by(assignment_id=assignment_id).count() == 0
+
+
+def test_job_queue_survives_failing_jobs(app):
+    jobs = JobQueue(app, 'test')
+    done = []
+
+    def fail():
+        raise RuntimeError('boom')
+
+    jobs.submit(fail)
+    jobs.submit(lambda: done.append(threading.current_thread().name))
+    jobs.join()
+    assert done == ['jobs-test']
+
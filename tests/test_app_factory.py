@@ -0,0 +1,61 @@
+"""create_app factory and gunicorn configuration."""
+
+import importlib.util
+import os
+import runpy
+from types import SimpleNamespace
+
+from src.main import create_app
+
+GUNICORN_CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+
+def test_factory_builds_independent_apps(app):
+    other = create_app({'TESTING': True, 'METRICS_ENABLED': False})
+    assert other is not app
+    assert other.config['TESTING'] is True
+    assert 'metrics' not in other.view_functions
+    assert 'student.get_students' in other.view_functions
+
+
+def clear_env(monkeypatch, name):
+    """Unset name for this test, restoring the original even if the config sets it meanwhile."""
+    monkeypatch.setenv(name, '')
+    monkeypatch.delenv(name)
+
+
+def test_gunicorn_worker_models(monkeypatch):
+    monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR', raising=False)
+    # The config defaults EVENTS_MAX_STREAMS per worker class with os.environ.setdefault
+    clear_env(monkeypatch, 'EVENTS_MAX_STREAMS')
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'sync')
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    config = runpy.run_path(GUNICORN_CONF)
+    assert config['worker_class'] == 'sync'
+    assert config['workers'] == 3
+    assert config['threads'] == 1
+    assert config['preload_app'] is True
+    assert config['max_requests_jitter'] > 0
+    assert os.environ['EVENTS_MAX_STREAMS'] == '0'
+    clear_env(monkeypatch, 'EVENTS_MAX_STREAMS')
+
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'gthread')
+    monkeypatch.setenv('GUNICORN_THREADS', '8')
+    config = runpy.run_path(GUNICORN_CONF)
+    assert config['worker_class'] == 'gthread'
+    assert config['threads'] == 8
+    assert os.environ['EVENTS_MAX_STREAMS'] == '4'
+
+
+def test_missing_gevent_is_logged(monkeypatch):
+    monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR', raising=False)
+    clear_env(monkeypatch, 'EVENTS_MAX_STREAMS')
+    monkeypatch.setenv('GUNICORN_WORKER_CLASS', 'gevent')
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name: None if name == 'gevent' else find_spec(name))
+    config = runpy.run_path(GUNICORN_CONF)
+    assert config['worker_class'] == 'gthread'
+
+    logged = []
+    config['on_starting'](SimpleNamespace(log=SimpleNamespace(warning=logged.append)))
+    assert len(logged) == 1 and 'gevent is not installed' in logged[0]
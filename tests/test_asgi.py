@@ -0,0 +1,109 @@
+"""The ASGI entry point: async read path and WSGI pass-through."""
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import event
+
+from src.asgi import AsyncReadApp, async_database_url, create_async_read_engine
+from tests.conftest import TEST_PASSWORD
+
+
+@pytest.fixture
+def asgi_app(app):
+    asgi = AsyncReadApp(app, create_async_read_engine(app))
+    yield asgi
+    asyncio.run(asgi.engine.dispose())
+
+
+async def call(asgi, method, path, cookie=None, body=None, query=b''):
+    headers = [(b'host', b'localhost')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    if body is not None:
+        body = json.dumps(body).encode()
+        headers += [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query,
+        'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 5000), 'server': ('localhost', 80),
+    }
+    messages = [{'type': 'http.request', 'body': body or b'', 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi(scope, receive, send)
+    start = sent[0]
+    headers = {name.decode(): value.decode() for name, value in start['headers']}
+    payload = b''.join(message.get('body', b'') for message in sent[1:])
+    return start['status'], headers, payload
+
+
+async def login(asgi, username='primary'):
+    status, headers, _ = await call(
+        asgi, 'POST', '/api/auth/login', body={'username': username, 'password': TEST_PASSWORD}
+    )
+    assert status == 200
+    return headers['set-cookie'].split(';', 1)[0]
+
+
+def test_async_driver_urls():
+    assert async_database_url('sqlite:////tmp/app.db') == 'sqlite+aiosqlite:////tmp/app.db'
+    assert async_database_url('postgresql://u:p@db/hub') == 'postgresql+asyncpg://u:p@db/hub'
+    assert async_database_url('postgresql+psycopg2://u:p@db/hub') == 'postgresql+asyncpg://u:p@db/hub'
+
+
+def test_async_path_matches_wsgi_responses(asgi_app, client, family):
+    paths = ['/api/students', f"/api/students/{family['student_id']}/dashboard", '/api/assignments/dashboard']
+
+    async def scenario():
+        cookie = await login(asgi_app)
+        return [await call(asgi_app, 'GET', path, cookie) for path in paths]
+
+    for path, (status, headers, body) in zip(paths, asyncio.run(scenario())):
+        expected = client.get(path)
+        assert status == 200
+        assert json.loads(body) == expected.get_json()
+        assert headers['etag'] == expected.headers['ETag']
+
+
+def test_async_path_enforces_login_and_ownership(asgi_app, family):
+    async def scenario():
+        anonymous = await call(asgi_app, 'GET', '/api/students')
+        cookie = await login(asgi_app, 'neighbour')
+        foreign = await call(asgi_app, 'GET', f"/api/students/{family['student_id']}/dashboard", cookie)
+        return anonymous, foreign
+
+    anonymous, foreign = asyncio.run(scenario())
+    assert anonymous[0] == 401
+    assert foreign[0] == 404
+
+
+def test_concurrent_requests_keep_their_own_user(asgi_app, query_recorder):
+    async def sign_in():
+        return [await login(asgi_app, 'primary'), await login(asgi_app, 'neighbour')]
+
+    async def scenario(cookies):
+        responses = await asyncio.gather(*[
+            call(asgi_app, 'GET', '/api/students', cookies[n % 2]) for n in range(20)
+        ])
+        return [{student['last_name'] for student in json.loads(body)} for _, _, body in responses]
+
+    cookies = asyncio.run(sign_in())
+    async_statements = []
+    event.listen(asgi_app.engine.sync_engine, 'before_cursor_execute',
+                 lambda *args: async_statements.append(args[2]))
+    with query_recorder:
+        owners = asyncio.run(scenario(cookies))
+    assert owners == [{'Primary'}, {'Neighbour'}] * 10
+    # Every query went through the async engine.
+    assert query_recorder.count == 0
+    assert async_statements
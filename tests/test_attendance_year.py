@@ -0,0 +1,58 @@
+"""Packed school-year attendance matches the per-record endpoint."""
+
+import base64
+from datetime import date, timedelta
+
+from src.models import Student
+from src.utils.attendance_bits import pack_attendance, unpack_statuses
+from tests.conftest import seed_family
+
+
+def test_year_matches_records(client, family):
+    student_id = family['student_id']
+    response = client.get(f'/api/students/{student_id}/attendance/year')
+    assert response.status_code == 200
+    assert len(response.get_data()) < 1024
+    body = response.get_json()
+
+    start, days = date.fromisoformat(body['start']), body['days']
+    end = start + timedelta(days=days - 1)
+    assert days in (365, 366) and start.day == 1
+    assert body['codes'] == [None, 'present', 'absent', 'partial']
+
+    statuses = unpack_statuses(base64.b64decode(body['statuses']), days)
+    hours = base64.b64decode(body['hours'])
+    records = client.get(f'/api/students/{student_id}/attendance?start_date={start}&end_date={end}').get_json()
+    expected = {record['date']: record for record in records}
+    assert records
+    for index in range(days):
+        record = expected.get(str(start + timedelta(days=index)))
+        assert statuses[index] == (record and record['status'])
+        assert hours[index] / 10 == (float(record['hours']) if record else 0)
+
+
+def test_other_years_and_conditional_requests(client, family):
+    path = f"/api/students/{family['student_id']}/attendance/year"
+    body = client.get(f'{path}?year=2001').get_json()
+    assert body['start'] == '2001-08-01' and body['days'] == 365
+    assert set(base64.b64decode(body['statuses'])) == {0}
+
+    etag = client.get(path).headers['ETag']
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_packing():
+    start = date(2024, 1, 1)
+    rows = [(start, 'present', 6), (start + timedelta(days=5), 'partial', 2.5),
+            (start + timedelta(days=7), 'absent', None), (start + timedelta(days=9), 'present', 40)]
+    statuses, hours = pack_attendance(rows, start, 10)
+    assert len(statuses) == 3 and len(hours) == 10
+    assert unpack_statuses(statuses, 10) == ['present', None, None, None, None, 'partial', None, 'absent', None, 'present']
+    assert list(hours) == [60, 0, 0, 0, 0, 25, 0, 0, 0, 255]
+
+
+def test_other_families_are_hidden(client, app):
+    with app.app_context():
+        user = seed_family('attendance-neighbour', students=1, assignments_per_student=0, attendance_days=1)
+        student_id = Student.query.filter_by(user_id=user.id).one().id
+    assert client.get(f'/api/students/{student_id}/attendance/year').status_code == 404
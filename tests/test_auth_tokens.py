@@ -0,0 +1,169 @@
+"""Bearer token authentication, revocation and the lazily loaded current user."""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models import db, RevokedToken
+from src.utils import auth
+from src.utils.auth import BloomFilter, CurrentUser
+from tests.conftest import TEST_PASSWORD, seed_family
+
+
+@pytest.fixture
+def tokens(app):
+    response = app.test_client().post('/api/auth/token',
+                                      json={'username': 'primary', 'password': TEST_PASSWORD})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+@pytest.fixture
+def a_second_later(monkeypatch):
+    """Revocations made in the test land in a later second than its tokens' ``iat``."""
+    class Later(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime.utcnow() + timedelta(seconds=2)
+    monkeypatch.setattr(auth, 'datetime', Later)
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_token_authenticates_without_a_user_query(app, tokens, query_recorder, monkeypatch):
+    monkeypatch.delitem(app.extensions, 'response_cache')
+    client = app.test_client()
+    headers = bearer(tokens['access_token'])
+    client.get('/api/students', headers=headers)  # loads the revocation filter
+
+    with query_recorder:
+        response = client.get('/api/students', headers=headers)
+    assert response.status_code == 200
+    assert 'Set-Cookie' not in response.headers
+    assert not any('FROM users' in statement for statement, _ in query_recorder.statements)
+    assert not any('revoked_tokens' in statement for statement, _ in query_recorder.statements)
+
+
+def test_claims_carry_id_and_timezone(app, tokens, family):
+    with app.test_request_context(headers=bearer(tokens['access_token'])):
+        from src.utils.auth import current_user
+        user = current_user()
+        assert user.id == family['user_id']
+        assert user.timezone == 'UTC'
+        assert user._record is None
+        assert user.username == 'primary'
+
+
+def test_invalid_and_refresh_tokens_are_rejected(app, tokens):
+    client = app.test_client()
+    assert client.get('/api/students', headers=bearer('not-a-token')).status_code == 401
+    response = client.get('/api/students', headers=bearer(tokens['refresh_token']))
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Invalid token: an access token is required'
+
+
+def test_logout_revokes_both_tokens(app, tokens):
+    client = app.test_client()
+    headers = bearer(tokens['access_token'])
+    response = client.post('/api/auth/logout', headers=headers,
+                           json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+
+    revoked = client.get('/api/students', headers=headers)
+    assert revoked.status_code == 401
+    assert revoked.get_json()['error'] == 'Token has been revoked'
+    refreshed = client.post('/api/auth/token/refresh', headers=bearer(tokens['refresh_token']))
+    assert refreshed.status_code == 401
+
+    with app.app_context():
+        assert db.session.query(RevokedToken).count() >= 2
+
+
+def test_refresh_rotates_the_refresh_token(app, tokens):
+    client = app.test_client()
+    response = client.post('/api/auth/token/refresh', headers=bearer(tokens['refresh_token']))
+    assert response.status_code == 200
+    rotated = response.get_json()
+    assert client.get('/api/students', headers=bearer(rotated['access_token'])).status_code == 200
+    reused = client.post('/api/auth/token/refresh', headers=bearer(tokens['refresh_token']))
+    assert reused.status_code == 401
+
+
+def test_revocations_reach_other_processes(app, tokens):
+    # A second worker's list only learns of the revocation by refreshing.
+    from src.utils.auth import RevocationList
+    other = RevocationList(app, db)
+    other.rebuild()
+    with app.test_request_context(headers=bearer(tokens['access_token'])):
+        from flask_jwt_extended import decode_token
+        claims = decode_token(tokens['access_token'])
+    assert claims['jti'] not in other.filter
+
+    app.test_client().post('/api/auth/logout', headers=bearer(tokens['access_token']))
+    other.refresh()
+    assert claims['jti'] in other.filter
+
+
+def test_tests_run_no_refresh_thread(app, tokens):
+    app.test_client().get('/api/students', headers=bearer(tokens['access_token']))
+    assert not any(thread.name == 'token-revocations' for thread in threading.enumerate())
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f'jti-{n}' for n in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f'other-{n}' in bloom for n in range(10000))
+    assert false_positives < 300
+
+
+def test_current_user_loads_the_row_once(app, family, query_recorder):
+    with app.app_context(), query_recorder:
+        user = CurrentUser(family['user_id'], 'UTC')
+        assert user.id == family['user_id'] and user.timezone == 'UTC'
+        assert query_recorder.count == 0
+        assert user.username == 'primary'
+        assert user.email
+        assert query_recorder.count == 1
+
+
+def test_password_change_revokes_earlier_tokens(app, a_second_later):
+    with app.app_context():
+        seed_family('rotator', students=0)
+    client = app.test_client()
+    old = client.post('/api/auth/token', json={'username': 'rotator', 'password': TEST_PASSWORD}).get_json()
+
+    response = client.post('/api/auth/change-password', headers=bearer(old['access_token']),
+                           json={'current_password': TEST_PASSWORD, 'new_password': 'n3w-secret'})
+    assert response.status_code == 200 and 'tokens' in response.get_json()
+
+    assert client.get('/api/students', headers=bearer(old['access_token'])).status_code == 401
+    # Past the in-memory window, the refresh endpoint still checks the User row
+    app.extensions['token_revocations']._users.clear()
+    refreshed = client.post('/api/auth/token/refresh', headers=bearer(old['refresh_token']))
+    assert refreshed.status_code == 401
+
+
+def test_account_deletion_revokes_other_devices(app, a_second_later):
+    with app.app_context():
+        user = seed_family('leaver', students=0)
+        user_id = user.id
+    client = app.test_client()
+    phone, laptop = (client.post('/api/auth/token', json={'username': 'leaver', 'password': TEST_PASSWORD})
+                     .get_json()['access_token'] for _ in range(2))
+
+    assert client.delete(f'/api/users/{user_id}', headers=bearer(phone)).status_code == 200
+    assert client.get('/api/auth/me', headers=bearer(laptop)).status_code == 401
+
+    # Another worker learns of it on its next refresh
+    from src.utils.auth import RevocationList
+    other = RevocationList(app, db)
+    other.rebuild()
+    with app.test_request_context():
+        from flask_jwt_extended import decode_token
+        assert other.is_revoked(decode_token(laptop))
@@ -0,0 +1,61 @@
+"""Calendar range endpoint."""
+
+from collections import Counter
+from datetime import date, timedelta
+
+
+def window():
+    today = date.today()
+    return today - timedelta(days=30), today + timedelta(days=62)
+
+
+def test_buckets_match_client_side_grouping(client):
+    start, end = window()
+    response = client.get(f'/api/calendar?start={start}&end={end}')
+    assert response.status_code == 200
+    days = {day['date']: day for day in response.get_json()['days']}
+
+    expected = Counter()
+    minutes = Counter()
+    for assignment in client.get('/api/assignments').get_json():
+        if assignment['due_date'] and str(start) <= assignment['due_date'] <= str(end):
+            expected[assignment['due_date'], assignment['status']] += 1
+            minutes[assignment['due_date']] += assignment['estimated_duration'] or 0
+
+    actual = Counter({(day, status): count for day, bucket in days.items()
+                      for status, count in bucket['assignments']['by_status'].items()})
+    assert actual == expected
+    assert all(days[day]['assignments']['estimated_minutes'] == total for day, total in minutes.items())
+    assert list(days) == sorted(days)
+
+
+def test_attendance_and_goals_are_slim(client, family):
+    start, end = window()
+    days = client.get(f'/api/calendar?start={start}&end={end}&student_id={family["student_id"]}').get_json()['days']
+
+    attendance = [entry for day in days for entry in day['attendance']]
+    assert attendance and all(set(entry) == {'student_id', 'status'} for entry in attendance)
+    assert {entry['student_id'] for entry in attendance} == {family['student_id']}
+
+    goals = [entry for day in days for entry in day['goals']]
+    assert [goal['title'] for goal in goals] == ['Read 20 books']
+    assert set(goals[0]) == {'id', 'student_id', 'title', 'status'}
+
+
+def test_defaults_to_the_current_month(client):
+    body = client.get('/api/calendar').get_json()
+    today = date.today()
+    assert body['start'] == str(today.replace(day=1))
+    assert body['end'][:7] == str(today)[:7]
+
+
+def test_invalid_ranges_are_rejected(client):
+    assert client.get('/api/calendar?start=yesterday').status_code == 400
+    assert client.get('/api/calendar?start=2024-02-10&end=2024-02-01').status_code == 400
+    assert client.get('/api/calendar?start=2024-01-01&end=2024-12-31').status_code == 400
+
+
+def test_other_families_are_excluded(client):
+    start, end = window()
+    body = client.get(f'/api/calendar?start={start}&end={end}&student_id=999999').get_json()
+    assert body['days'] == []
@@ -0,0 +1,146 @@
+"""Change log and the /api/changes delta feed."""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models import db, Assignment, Change, Student
+from src.utils.changes import compact_changes, make_cursor, parse_cursor
+from tests.conftest import TEST_PASSWORD, seed_family
+
+
+@pytest.fixture(scope='module')
+def syncer(app):
+    with app.app_context():
+        user = seed_family('syncer', students=1, assignments_per_student=0, attendance_days=0)
+        return {'user_id': user.id, 'student_id': Student.query.filter_by(user_id=user.id).one().id}
+
+
+@pytest.fixture
+def device(app, syncer):
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'syncer', 'password': TEST_PASSWORD})
+    return client
+
+
+def start(client):
+    body = client.get('/api/changes').get_json()
+    assert body['upserted'] == {} and body['deleted'] == {}
+    return body['cursor']
+
+
+def new_assignment(client, syncer, title='Spelling'):
+    response = client.post('/api/assignments', json={'student_id': syncer['student_id'], 'title': title})
+    return response.get_json()['assignment']['id']
+
+
+def test_feed_compacts_to_latest_state(device, client, syncer):
+    cursor = start(device)
+    kept = new_assignment(device, syncer)
+    device.put(f'/api/assignments/{kept}', json={'title': 'Spelling list 2'})
+    device.put(f'/api/assignments/{kept}', json={'title': 'Spelling list 3'})
+    device.post(f'/api/assignments/{kept}/grade', json={'points_earned': 95})
+    dropped = new_assignment(device, syncer, 'Scratch')
+    device.delete(f'/api/assignments/{dropped}')
+
+    body = device.get(f'/api/changes?since={cursor}').get_json()
+    assert [row['title'] for row in body['upserted']['assignments']] == ['Spelling list 3']
+    assert [row['assignment_id'] for row in body['upserted']['grades']] == [kept]
+    assert body['deleted'] == {'assignments': [dropped]}
+    assert body['has_more'] is False
+
+    # Nothing new after the returned cursor, and other families see none of it
+    later = device.get(f"/api/changes?since={body['cursor']}").get_json()
+    assert later['upserted'] == {} and later['deleted'] == {}
+    other = client.get(f'/api/changes?since={cursor}').get_json()
+    assert 'assignments' not in other['upserted'] or all(
+        row['student_id'] != syncer['student_id'] for row in other['upserted']['assignments'])
+
+
+def test_pages_follow_the_cursor(device, syncer):
+    cursor = start(device)
+    ids = [new_assignment(device, syncer, f'Page {n}') for n in range(3)]
+    seen = []
+    while True:
+        body = device.get(f'/api/changes?since={cursor}&limit=2').get_json()
+        seen += [row['id'] for row in body['upserted'].get('assignments', [])]
+        cursor = body['cursor']
+        if not body['has_more']:
+            break
+    assert seen == ids
+
+
+def test_bad_and_expired_cursors(app, device):
+    assert device.get('/api/changes?since=nonsense').status_code == 400
+    expired = make_cursor(0, time.time() - (app.config['CHANGES_RETENTION_DAYS'] + 1) * 86400)
+    assert device.get(f'/api/changes?since={expired}').status_code == 410
+
+
+def test_late_commits_below_the_cursor_are_reread(app, device, syncer):
+    # On PostgreSQL a change can commit after a cursor past its id was issued
+    with app.app_context():
+        ahead = db.session.execute(db.select(db.func.max(Change.id))).scalar() + 10
+    assignment_id = new_assignment(device, syncer, 'Late')
+    with app.app_context():
+        change = Change.query.filter_by(entity='assignments', entity_id=assignment_id).one()
+        assert change.id <= ahead
+        change.xid = 1000
+        db.session.commit()
+
+    body = device.get(f'/api/changes?since={make_cursor(ahead, xmin=1000)}').get_json()
+    assert [row['id'] for row in body['upserted']['assignments']] == [assignment_id]
+    assert parse_cursor(body['cursor'])[0] == ahead
+    # Committed before the cursor's oldest open transaction: already delivered
+    body = device.get(f'/api/changes?since={make_cursor(ahead, xmin=1001)}').get_json()
+    assert body['upserted'] == {}
+    # Cursors from SQLite and older releases have no third part
+    assert parse_cursor(make_cursor(ahead, 0)) == (ahead, 0, None)
+
+
+def test_subject_deletes_log_the_rows_they_unlink(device, syncer):
+    subject_id = device.post('/api/subjects', json={'name': 'Latin'}).get_json()['subject']['id']
+    goal_id = device.post('/api/goals', json={
+        'student_id': syncer['student_id'], 'subject_id': subject_id, 'title': 'Declensions'}).get_json()['goal']['id']
+    cursor = start(device)
+    assert device.delete(f'/api/subjects/{subject_id}').status_code == 200
+
+    body = device.get(f'/api/changes?since={cursor}').get_json()
+    assert [(row['id'], row['subject_id']) for row in body['upserted']['goals']] == [(goal_id, None)]
+
+
+def test_compaction_keeps_feed_results(app, device, syncer):
+    cursor = start(device)
+    assignment_id = new_assignment(device, syncer)
+    for n in range(3):
+        device.put(f'/api/assignments/{assignment_id}', json={'title': f'Edit {n}'})
+    before = device.get(f'/api/changes?since={cursor}').get_json()
+
+    with app.app_context():
+        stale = Change(user_id=syncer['user_id'], entity='goals', entity_id=0, operation='delete',
+                       changed_at=datetime.utcnow() - timedelta(days=app.config['CHANGES_RETENTION_DAYS'] + 1))
+        db.session.add(stale)
+        db.session.commit()
+        compact_changes()
+        rows = Change.query.filter_by(user_id=syncer['user_id'], entity='assignments',
+                                      entity_id=assignment_id).all()
+        assert len(rows) == 1
+        assert Change.query.filter_by(user_id=syncer['user_id'], entity='goals', entity_id=0).count() == 0
+
+    after = device.get(f'/api/changes?since={cursor}').get_json()
+    assert after['upserted'] == before['upserted'] and after['deleted'] == before['deleted']
+
+
+def test_bulk_schedule_resets_leave_tombstones(app, device, syncer):
+    schedule = device.post('/api/assignments/schedules', json={
+        'student_id': syncer['student_id'], 'title': 'Reading', 'rrule': 'FREQ=DAILY'}).get_json()
+    schedule_id = schedule['schedule']['id']
+    with app.app_context():
+        daily = {a.id for a in Assignment.query.filter_by(schedule_id=schedule_id)}
+    cursor = start(device)
+    device.put(f'/api/assignments/schedules/{schedule_id}', json={'rrule': 'FREQ=WEEKLY'})
+    body = device.get(f'/api/changes?since={cursor}').get_json()
+    weekly = {row['id'] for row in body['upserted']['assignments']}
+    assert len(weekly) == app.config['SCHEDULE_HORIZON_DAYS'] // 7 + 1
+    # Each daily occurrence is deleted, or its reused id now holds a weekly one
+    assert daily <= weekly | set(body['deleted']['assignments'])
@@ -0,0 +1,75 @@
+"""?format=columns list encoding."""
+
+import pytest
+
+LIST_ROUTES = [
+    '/api/assignments',
+    '/api/students/{student_id}/assignments',
+    '/api/subjects/{subject_id}/assignments',
+    '/api/students/{student_id}/attendance',
+    '/api/students/{student_id}/goals',
+    '/api/students/{student_id}/activities',
+]
+
+
+def decode(payload):
+    """Rebuild row objects from a columnar payload."""
+    columns = payload['columns']
+    enums = payload['enums']
+    rows = []
+    for index in range(payload['count']):
+        row = {}
+        for name, values in columns.items():
+            value = values[index]
+            if name in enums and value is not None:
+                value = enums[name][value]
+            row[name] = value
+        rows.append(row)
+    return rows
+
+
+@pytest.mark.parametrize('path', LIST_ROUTES)
+def test_columns_match_objects(client, family, path):
+    path = path.format(**family)
+    objects = client.get(path).get_json()
+    response = client.get(path, query_string={'format': 'columns'})
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['format'] == 'columns'
+    rows = decode(payload)
+    assert len(rows) == len(objects) > 0
+    for row, obj in zip(rows, objects):
+        for name, value in row.items():
+            assert value == obj[name], name
+    if len(rows) >= 10:
+        # The enum dictionaries are a fixed cost that larger lists amortize.
+        assert len(response.get_data()) < len(client.get(path).get_data()) / 2
+
+
+def test_presentation_fields_are_left_out(client, family):
+    payload = client.get(f"/api/students/{family['student_id']}/attendance?format=columns").get_json()
+    assert 'status_color' not in payload['columns']
+    assert 'status_icon' not in payload['columns']
+    assert 'hours_formatted' not in payload['columns']
+    assert payload['enums']['status'][:3] == ['present', 'absent', 'partial']
+    assert set(payload['columns']['status']) <= {0, 2}
+
+
+def test_columns_honour_fields_and_include(client):
+    payload = client.get('/api/assignments?format=columns&fields=id,status&include=grade_letter').get_json()
+    assert set(payload['columns']) == {'id', 'status', 'grade_letter'}
+    assert set(payload['enums']) == {'status', 'grade_letter'}
+
+
+def test_unknown_enum_values_extend_the_dictionary():
+    from src.utils.columnar import Column, encode_columns
+
+    class Row:
+        def __init__(self, status):
+            self.status = status
+
+    payload = encode_columns([Row('present'), Row('excused'), Row(None), Row('excused')],
+                             [Column('status', enum=('present', 'absent'))])
+    assert payload['enums']['status'] == ['present', 'absent', 'excused']
+    assert payload['columns']['status'] == [0, 2, None, 2]
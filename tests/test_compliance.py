@@ -0,0 +1,104 @@
+"""Attendance counters follow every write; the compliance report reads only them."""
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src.models import db, AttendanceCounter, Student
+from src.utils.attendance_bits import school_year_of
+from src.utils.compliance import compliance_report, rebuild_counters
+from tests.conftest import TEST_PASSWORD, seed_family
+
+
+@pytest.fixture(scope='module')
+def pupil(app):
+    with app.app_context():
+        user = seed_family('compliance', students=1, assignments_per_student=0, attendance_days=10)
+        return Student.query.filter_by(user_id=user.id).one().id
+
+
+@pytest.fixture
+def owner(app, pupil):
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'compliance', 'password': TEST_PASSWORD})
+    return client
+
+
+def counters(app, student_id):
+    with app.app_context():
+        return {counter.school_year: (counter.present_days, counter.partial_days, counter.absent_days,
+                                      float(counter.hours))
+                for counter in AttendanceCounter.query.filter_by(student_id=student_id)}
+
+
+def this_year(app):
+    with app.app_context():
+        return school_year_of(date.today())
+
+
+def rebuilt(app, student_id):
+    with app.app_context():
+        rebuild_counters(db.session, [student_id])
+        db.session.commit()
+    return counters(app, student_id)
+
+
+def test_writes_keep_counters_exact(app, owner, pupil):
+    assert counters(app, pupil) == rebuilt(app, pupil)
+    year = this_year(app)
+    before = counters(app, pupil)[year]
+
+    new_day = str(date.today() - timedelta(days=40))
+    assert owner.put(f'/api/students/{pupil}/attendance/{new_day}', json={'hours': 4.5}).status_code == 201
+    assert owner.put(f'/api/students/{pupil}/attendance/{new_day}',
+                     json={'status': 'absent', 'hours': 0}).status_code == 200
+    today = str(date.today())
+    assert owner.put(f'/api/students/{pupil}/attendance/{today}',
+                     json={'status': 'partial', 'hours': 2}).status_code == 200
+
+    live = counters(app, pupil)
+    assert live == rebuilt(app, pupil)
+    with app.app_context():
+        assert live[year][2] == before[2] + (school_year_of(date.fromisoformat(new_day)) == year)
+
+    assert owner.delete(f'/api/students/{pupil}/attendance/{new_day}').status_code == 200
+    assert owner.delete(f'/api/students/{pupil}/attendance/{new_day}').status_code == 404
+    assert counters(app, pupil) == rebuilt(app, pupil)
+
+
+def test_attendance_validation(owner, client, pupil):
+    path = f'/api/students/{pupil}/attendance'
+    assert owner.put(f'{path}/2026-13-01', json={}).status_code == 400
+    assert owner.put(f'{path}/{date.today()}', json={'status': 'sick'}).status_code == 400
+    assert owner.put(f'{path}/{date.today()}', json={'hours': 30}).status_code == 400
+    assert client.put(f'{path}/{date.today()}', json={}).status_code == 404
+
+
+def test_report_reads_one_counter(app, owner, pupil, query_recorder):
+    with query_recorder:
+        body = owner.get(f'/api/students/{pupil}/compliance?required_days=10&required_hours=1000').get_json()
+    assert query_recorder.count <= 3
+    assert not any('FROM attendance ' in statement for statement, _ in query_recorder.statements)
+
+    present, partial, absent, hours = counters(app, pupil)[this_year(app)]
+    assert body['days']['completed'] == present + partial and body['days']['required'] == 10
+    assert body['days']['met'] is (present + partial >= 10)
+    assert body['hours']['completed'] == hours and body['hours']['remaining'] == 1000 - hours
+    assert body['totals'] == {'present_days': present, 'partial_days': partial, 'absent_days': absent, 'hours': hours}
+
+    empty = owner.get(f'/api/students/{pupil}/compliance?year=2001').get_json()
+    assert empty['school_year'] == {'start': '2001-08-01', 'end': '2002-07-31'}
+    assert empty['days']['completed'] == 0 and empty['days']['projected_completion'] is None
+
+
+def test_projection(app):
+    counter = SimpleNamespace(instructional_days=40, present_days=38, partial_days=2, absent_days=1, hours=150)
+    with app.app_context():
+        report = compliance_report(counter, 180, 900, today=date(2026, 9, 30))
+    # 40 days and 150 hours in the 61 days since August 1st
+    assert report['days']['projected_completion'] == date(2026, 9, 30) + timedelta(days=214)
+    assert report['days']['on_track'] is True
+    assert report['hours']['projected_completion'] == date(2027, 8, 1)
+    assert report['hours']['on_track'] is False
+    assert report['hours']['percent'] == 16.7
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models import db, Assignment, Student, Submission, User
+from tests.conftest import TEST_PASSWORD
+
+
+@pytest.fixture
+def neighbour(app):
+    """Client and a student id for the second family, which tests may modify."""
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'neighbour', 'password': TEST_PASSWORD})
+    with app.app_context():
+        user = User.query.filter_by(username='neighbour').one()
+        student = Student.query.filter_by(user_id=user.id).order_by(Student.id).first()
+        assignment = Assignment.query.filter_by(student_id=student.id).order_by(Assignment.id).first()
+        return client, student.id, assignment.id
+
+
+def test_matching_etag_short_circuits_to_304(app, client, family, query_recorder, monkeypatch):
+    # Without the response cache, which would answer without any query.
+    monkeypatch.delitem(app.extensions, 'response_cache')
+    first = client.get('/api/assignments')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    with query_recorder:
+        second = client.get('/api/assignments', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+    assert second.get_data() == b''
+    # Only the version query: the user id comes from the session.
+    assert query_recorder.count == 1
+
+
+def test_etag_changes_when_scope_rows_change(neighbour):
+    client, student_id, assignment_id = neighbour
+    path = f'/api/students/{student_id}/assignments'
+    etag = client.get(path).headers['ETag']
+
+    response = client.put(f'/api/assignments/{assignment_id}', json={'priority': 'high'})
+    assert response.status_code == 200
+
+    refreshed = client.get(path, headers={'If-None-Match': etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers['ETag'] != etag
+
+
+def test_etag_changes_when_rows_are_deleted(app, neighbour):
+    client, student_id, _ = neighbour
+    path = '/api/assignments/dashboard'
+    etag = client.get(path).headers['ETag']
+
+    with app.app_context():
+        assignment = Assignment(student_id=student_id, title='Temporary')
+        db.session.add(assignment)
+        db.session.commit()
+        after_insert = client.get(path).headers['ETag']
+        db.session.delete(assignment)
+        db.session.commit()
+
+    after_delete = client.get(path).headers['ETag']
+    assert len({etag, after_insert}) == 2
+    assert after_delete != after_insert
+
+
+def test_etag_changes_when_a_submission_is_edited(app, neighbour):
+    client, _, assignment_id = neighbour
+    path = f'/api/assignments/{assignment_id}/submissions'
+    with app.app_context():
+        submission = Submission(assignment_id=assignment_id, file_name='essay.txt')
+        db.session.add(submission)
+        db.session.commit()
+        etag = client.get(path).headers['ETag']
+
+        # Same row count and creation time; only updated_at moves.
+        submission.status = 'reviewed'
+        submission.updated_at = datetime.utcnow() + timedelta(seconds=1)
+        db.session.commit()
+        refreshed = client.get(path, headers={'If-None-Match': etag})
+        db.session.delete(submission)
+        db.session.commit()
+
+    assert refreshed.status_code == 200
+    assert refreshed.headers['ETag'] != etag
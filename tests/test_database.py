@@ -0,0 +1,86 @@
+"""Engine options, pool presets and database error handling."""
+
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+from src.utils.database import _install_transaction_timeout, database_settings, engine_options
+
+PG_URL = 'postgresql://user:secret@db:5432/homeschool_hub'
+
+
+def test_sqlite_keeps_defaults():
+    assert engine_options('sqlite:///app.db', database_settings('production', env={})) == {}
+
+
+def test_production_preset():
+    options = engine_options(PG_URL, database_settings('production', env={}))
+    assert options['pool_size'] == 10
+    assert options['max_overflow'] == 5
+    assert options['pool_timeout'] == 5
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args']['options'] == (
+        '-c statement_timeout=15000 -c idle_in_transaction_session_timeout=60000'
+    )
+
+
+def test_environment_overrides_preset():
+    settings = database_settings('production', env={
+        'DB_POOL_SIZE': '3', 'DB_POOL_PRE_PING': 'false', 'DB_STATEMENT_TIMEOUT_MS': '0',
+        'DB_IDLE_IN_TRANSACTION_TIMEOUT_MS': '0',
+    })
+    options = engine_options(PG_URL, settings)
+    assert options['pool_size'] == 3
+    assert options['pool_pre_ping'] is False
+    assert 'options' not in options['connect_args']
+
+
+def test_pgbouncer_mode_sends_no_startup_parameters():
+    settings = database_settings('production', env={'DB_PGBOUNCER': 'true'})
+    assert 'options' not in engine_options(PG_URL, settings)['connect_args']
+
+    psycopg = engine_options('postgresql+psycopg://u:p@bouncer/db', settings)
+    assert psycopg['connect_args']['prepare_threshold'] is None
+
+    asyncpg = engine_options('postgresql+asyncpg://u:p@bouncer/db', settings)
+    assert asyncpg['connect_args']['statement_cache_size'] == 0
+    assert asyncpg['connect_args']['prepared_statement_cache_size'] == 0
+    assert 'options' not in asyncpg['connect_args']
+
+
+def test_pgbouncer_mode_sets_both_timeouts_per_transaction():
+    engine = create_engine('sqlite://')
+    event.listen(engine, 'connect', lambda dbapi_connection, record: dbapi_connection.create_function(
+        'set_config', 3, lambda name, value, is_local: value))
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+    app = SimpleNamespace(config={
+        'DB_STATEMENT_TIMEOUT_MS': 15000, 'DB_IDLE_IN_TRANSACTION_TIMEOUT_MS': 60000, 'DB_PGBOUNCER': True})
+    _install_transaction_timeout(app, engine)
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql('SELECT 1')
+    assert statements[0] == ("SELECT set_config('statement_timeout', '15000', true), "
+                             "set_config('idle_in_transaction_session_timeout', '60000', true)")
+
+
+def test_pool_exhaustion_returns_503(app):
+    with app.test_request_context('/api/students'):
+        response = app.handle_user_exception(PoolTimeoutError('QueuePool limit reached'))
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_cancelled_statement_returns_503(app):
+    class QueryCanceled(Exception):
+        pgcode = '57014'
+
+    error = OperationalError('SELECT pg_sleep(60)', {}, QueryCanceled())
+    with app.test_request_context('/api/students'):
+        response = app.handle_user_exception(error)
+    assert response.status_code == 503
+
+
+def test_health_reports_pool(client):
+    assert 'pool' in client.get('/api/health').get_json()
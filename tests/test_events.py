@@ -0,0 +1,118 @@
+"""Live events published on commit and streamed from /api/events."""
+
+import json
+from datetime import date
+
+import pytest
+from flask import Flask
+
+from src.models import db, Assignment, Student, Submission
+from src.utils.events import RESYNC, Subscription, listen_url
+from tests.conftest import TEST_PASSWORD, seed_family
+
+
+@pytest.fixture(scope='module')
+def household(app):
+    with app.app_context():
+        user = seed_family('listener', students=1, assignments_per_student=1, attendance_days=0)
+        student = Student.query.filter_by(user_id=user.id).one()
+        return {'user_id': user.id, 'student_id': student.id,
+                'assignment_id': Assignment.query.filter_by(student_id=student.id).one().id}
+
+
+@pytest.fixture
+def parent(app, household):
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'listener', 'password': TEST_PASSWORD})
+    return client
+
+
+@pytest.fixture
+def short_streams(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'EVENTS_STREAM_SECONDS', 0.5)
+    monkeypatch.setitem(app.config, 'EVENTS_HEARTBEAT_SECONDS', 0.1)
+
+
+def read_events(response):
+    """(event, data) of each SSE frame until the stream ends; comments are skipped."""
+    text = b''.join(response.response).decode()
+    events = []
+    for frame in text.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_committed_writes_reach_the_owners_stream(app, parent, client, household, short_streams):
+    mine = parent.get('/api/events')
+    theirs = client.get('/api/events')
+    assert mine.status_code == 200 and mine.mimetype == 'text/event-stream'
+    assert mine.headers['Cache-Control'] == 'no-cache'
+
+    assignment_id = household['assignment_id']
+    assert parent.post(f'/api/assignments/{assignment_id}/grade', json={'points_earned': 88}).status_code == 200
+    with app.app_context():
+        db.session.add(Submission(assignment_id=assignment_id, file_name='essay.txt'))
+        db.session.commit()
+    parent.put(f"/api/students/{household['student_id']}/attendance/{date.today()}", json={'hours': 5})
+
+    events = read_events(mine)
+    assert {'assignment.graded', 'submission.received', 'attendance.recorded'} <= {name for name, _ in events}
+    graded = next(data for name, data in events if name == 'assignment.graded')
+    assert graded['entity'] == 'grades' and graded['operation'] == 'upsert'
+    assert read_events(theirs) == []
+
+
+def test_rolled_back_writes_publish_nothing(app, household):
+    broker = app.extensions['events']
+    with app.app_context():
+        subscription = broker.subscribe(household['user_id'])
+        try:
+            db.session.get(Assignment, household['assignment_id']).title = 'Draft'
+            db.session.flush()
+            db.session.rollback()
+            assert subscription.get(timeout=0) is None
+
+            db.session.get(Assignment, household['assignment_id']).title = 'Final'
+            db.session.commit()
+            assert subscription.get(timeout=0) == {
+                'type': 'assignment.updated', 'entity': 'assignments',
+                'id': household['assignment_id'], 'operation': 'upsert'}
+        finally:
+            broker.unsubscribe(subscription)
+
+
+def test_slow_subscribers_get_a_resync():
+    subscription = Subscription(user_id=1, size=2)
+    for n in range(3):
+        subscription.put({'type': 'goal.updated', 'id': n})
+    assert subscription.get(timeout=0) == RESYNC
+    assert subscription.get(timeout=0) is None
+
+
+def test_streams_over_the_limit_are_refused(app, parent, monkeypatch):
+    monkeypatch.setattr(app.extensions['events'], 'max_streams', 0)
+    response = parent.get('/api/events')
+    assert response.status_code == 503 and 'Retry-After' in response.headers
+
+
+def test_closed_streams_unsubscribe(app, parent):
+    broker = app.extensions['events']
+    before = broker.open_streams
+    response = parent.get('/api/events')
+    assert broker.open_streams == before + 1
+    response.close()
+    assert broker.open_streams == before
+
+
+def test_pgbouncer_needs_a_direct_listen_url(caplog):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='postgresql://app@pgbouncer:6432/school', DB_PGBOUNCER=True)
+    assert listen_url(app) is None
+    assert 'EVENTS_LISTEN_URL' in caplog.text
+
+    app.config['EVENTS_LISTEN_URL'] = 'postgresql://app@db:5432/school'
+    assert listen_url(app).host == 'db'
+    app.config.update(EVENTS_LISTEN_URL=None, DB_PGBOUNCER=False)
+    assert listen_url(app).host == 'pgbouncer'
@@ -0,0 +1,29 @@
+def test_fields_limit_keys(client):
+    response = client.get('/api/assignments?fields=id,title')
+    assert response.status_code == 200
+    assert all(set(row) == {'id', 'title'} for row in response.get_json())
+
+
+def test_include_limits_computed_fields(client, family, query_recorder):
+    with query_recorder:
+        response = client.get('/api/students?include=current_gpa')
+    students = response.get_json()
+    assert all('current_gpa' in s and 'attendance_rate' not in s and 'first_name' in s for s in students)
+    # ETag version, students, one batched GPA query.
+    assert query_recorder.count == 3
+
+
+def test_skipped_fields_skip_eager_loads(client, query_recorder):
+    with query_recorder:
+        client.get('/api/assignments?fields=id,title,due_date')
+    loaded = ' '.join(statement for statement, _ in query_recorder.statements)
+    assert 'AS grades_id' not in loaded
+    assert 'AS submissions_id' not in loaded
+
+
+def test_preloaded_stats_match_per_row_computation(app, client):
+    batched = {s['id']: s for s in client.get('/api/students').get_json()}
+    for student_id, student in batched.items():
+        single = client.get(f'/api/students/{student_id}').get_json()
+        assert single['current_gpa'] == student['current_gpa']
+        assert single['attendance_rate'] == student['attendance_rate']
@@ -0,0 +1,178 @@
+"""Goal endpoints and progress that follows subject grades incrementally."""
+
+import pytest
+
+from src.models import db, Assignment, Goal, Student, Subject
+from src.utils.goal_progress import seed_goal
+from tests.conftest import TEST_PASSWORD, seed_family
+
+
+@pytest.fixture(scope='module')
+def learner(app):
+    with app.app_context():
+        user = seed_family('goals', students=1, subjects=2, assignments_per_student=0, attendance_days=0)
+        student = Student.query.filter_by(user_id=user.id).one()
+        subjects = Subject.query.filter_by(user_id=user.id).order_by(Subject.id).all()
+        return {'student_id': student.id, 'subject_id': subjects[0].id, 'other_subject_id': subjects[1].id}
+
+
+@pytest.fixture
+def parent(app, learner):
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'goals', 'password': TEST_PASSWORD})
+    yield client
+    with app.app_context():
+        Assignment.query.filter_by(student_id=learner['student_id']).delete()
+        Goal.query.filter_by(student_id=learner['student_id']).delete()
+        db.session.commit()
+
+
+def graded(client, learner, points, subject_key='subject_id'):
+    """Create an assignment in the subject and grade it points out of 100."""
+    response = client.post('/api/assignments', json={
+        'student_id': learner['student_id'], 'subject_id': learner[subject_key], 'title': 'Worksheet'})
+    assignment_id = response.get_json()['assignment']['id']
+    assert client.post(f'/api/assignments/{assignment_id}/grade', json={'points_earned': points}).status_code == 200
+    return assignment_id
+
+
+def goal(client, goal_id):
+    return client.get(f'/api/goals/{goal_id}').get_json()
+
+
+def totals_match_a_recount(app, goal_id):
+    with app.app_context():
+        stored = db.session.get(Goal, goal_id)
+        kept = (stored.graded_count, float(stored.percentage_sum), stored.progress_percentage)
+        seed_goal(stored)
+        recount = (stored.graded_count, float(stored.percentage_sum), stored.progress_percentage)
+        db.session.rollback()
+    return kept == recount
+
+
+def test_manual_goal_crud(parent, client, learner):
+    response = parent.post('/api/goals', json={
+        'student_id': learner['student_id'], 'title': 'Learn cursive', 'goal_type': 'skill',
+        'target_date': '2027-06-01'})
+    assert response.status_code == 201
+    created = response.get_json()['goal']
+    assert created['progress_mode'] == 'manual' and created['progress_percentage'] == 0
+
+    updated = parent.put(f"/api/goals/{created['id']}", json={'progress_percentage': 100}).get_json()
+    assert updated['progress_percentage'] == 100 and updated['status'] == 'completed'
+
+    listed = parent.get(f"/api/goals?student_id={learner['student_id']}&status=completed").get_json()
+    assert [item['id'] for item in listed] == [created['id']]
+    assert client.get(f"/api/goals/{created['id']}").status_code == 404
+    assert all(item['student_id'] != learner['student_id'] for item in client.get('/api/goals').get_json())
+
+    assert parent.delete(f"/api/goals/{created['id']}").status_code == 200
+    assert parent.get(f"/api/goals/{created['id']}").status_code == 404
+
+
+@pytest.mark.parametrize('body', [
+    {'progress_mode': 'count', 'target_value': 3},
+    {'progress_mode': 'count', 'subject_id': 'own'},
+    {'progress_mode': 'average', 'subject_id': 'own', 'target_value': 120},
+    {'progress_mode': 'sometimes'},
+    {'goal_type': 'spiritual'},
+])
+def test_invalid_goals_are_rejected(parent, learner, body):
+    body = dict(body, student_id=learner['student_id'], title='Bad')
+    if body.get('subject_id') == 'own':
+        body['subject_id'] = learner['subject_id']
+    assert parent.post('/api/goals', json=body).status_code == 400
+
+
+def test_count_goal_follows_grade_events(app, parent, learner):
+    first = graded(parent, learner, 70)
+    goal_id = parent.post('/api/goals', json={
+        'student_id': learner['student_id'], 'subject_id': learner['subject_id'], 'title': 'Five worksheets',
+        'progress_mode': 'count', 'target_value': 5}).get_json()['goal']['id']
+    assert goal(parent, goal_id)['graded_count'] == 1  # Seeded from the existing grade
+    assert goal(parent, goal_id)['progress_percentage'] == 20
+
+    graded(parent, learner, 90)
+    graded(parent, learner, 80, subject_key='other_subject_id')
+    assert goal(parent, goal_id)['progress_percentage'] == 40
+
+    # A manual override is refused while progress is automatic
+    assert parent.put(f'/api/goals/{goal_id}', json={'progress_percentage': 90}).status_code == 400
+
+    assert parent.delete(f'/api/assignments/{first}').status_code == 200
+    assert goal(parent, goal_id)['graded_count'] == 1
+    for points in (60, 70, 80, 90):
+        graded(parent, learner, points)
+    body = goal(parent, goal_id)
+    assert body['progress_percentage'] == 100 and body['status'] == 'completed'
+    assert totals_match_a_recount(app, goal_id)
+
+
+def test_average_goal_follows_regrades_and_moves(app, parent, learner):
+    low = graded(parent, learner, 60)
+    graded(parent, learner, 80)
+    goal_id = parent.post('/api/goals', json={
+        'student_id': learner['student_id'], 'subject_id': learner['subject_id'], 'title': 'Average a B',
+        'progress_mode': 'average', 'target_value': 85}).get_json()['goal']['id']
+    assert goal(parent, goal_id)['grade_average'] == 70.0
+    assert goal(parent, goal_id)['progress_percentage'] == 82
+
+    assert parent.put(f'/api/assignments/{low}/grade', json={'points_earned': 90}).status_code == 200
+    assert goal(parent, goal_id)['grade_average'] == 85.0
+    assert goal(parent, goal_id)['progress_percentage'] == 100
+
+    with app.app_context():
+        db.session.get(Assignment, low).subject_id = learner['other_subject_id']
+        db.session.commit()
+    assert goal(parent, goal_id)['grade_average'] == 80.0
+    assert parent.delete(f'/api/assignments/{low}/grade').status_code == 200
+    assert totals_match_a_recount(app, goal_id)
+
+    # Switching to a count target recounts once
+    body = parent.put(f'/api/goals/{goal_id}', json={'progress_mode': 'count', 'target_value': 4}).get_json()
+    assert body['graded_count'] == 1 and body['progress_percentage'] == 25
+
+
+def test_average_goal_completes_on_enough_grades_and_reopens(parent, learner):
+    goal_id = parent.post('/api/goals', json={
+        'student_id': learner['student_id'], 'subject_id': learner['subject_id'], 'title': 'Average an A',
+        'progress_mode': 'average', 'target_value': 90}).get_json()['goal']['id']
+    graded(parent, learner, 95)
+    graded(parent, learner, 92)
+    body = goal(parent, goal_id)
+    assert body['progress_percentage'] == 100 and body['status'] == 'active'  # Too few grades yet
+
+    graded(parent, learner, 93)
+    assert goal(parent, goal_id)['status'] == 'completed'
+    graded(parent, learner, 60)
+    body = goal(parent, goal_id)
+    assert body['progress_percentage'] == 94 and body['status'] == 'active'
+
+
+def test_count_goal_reopens_when_grades_are_removed(parent, learner):
+    goal_id = parent.post('/api/goals', json={
+        'student_id': learner['student_id'], 'subject_id': learner['subject_id'], 'title': 'Two worksheets',
+        'progress_mode': 'count', 'target_value': 2}).get_json()['goal']['id']
+    first = graded(parent, learner, 70)
+    graded(parent, learner, 80)
+    assert goal(parent, goal_id)['status'] == 'completed'
+    assert parent.delete(f'/api/assignments/{first}/grade').status_code == 200
+    body = goal(parent, goal_id)
+    assert body['progress_percentage'] == 50 and body['status'] == 'active'
+
+    # A paused goal stays paused whatever its grades do
+    parent.put(f'/api/goals/{goal_id}', json={'status': 'paused'})
+    graded(parent, learner, 90)
+    assert goal(parent, goal_id)['status'] == 'paused'
+
+
+def test_listing_goals_reads_no_grades(parent, learner, query_recorder):
+    graded(parent, learner, 75)
+    parent.post('/api/goals', json={
+        'student_id': learner['student_id'], 'subject_id': learner['subject_id'], 'title': 'Keep going',
+        'progress_mode': 'count', 'target_value': 10})
+    with query_recorder:
+        goals = parent.get('/api/goals').get_json()
+    assert goals[0]['progress_percentage'] == 10
+    statements = ' '.join(statement for statement, _ in query_recorder.statements)
+    assert 'FROM grades' not in statements and 'FROM assignments' not in statements
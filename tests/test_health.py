@@ -0,0 +1,66 @@
+"""Liveness, readiness and the background health prober."""
+
+import os
+import tempfile
+import time
+
+from src.main import create_app
+from src.models import db
+from src.utils.health import HealthProber
+
+
+def test_livez_does_no_io(app, query_recorder):
+    client = app.test_client()
+    with query_recorder:
+        response = client.get('/livez')
+    assert response.status_code == 200
+    assert query_recorder.count == 0
+
+
+def test_readyz_reports_cached_probe_without_using_the_pool(app, query_recorder):
+    client = app.test_client()
+    with query_recorder:
+        first = client.get('/readyz')
+        second = client.get('/readyz')
+    assert first.status_code == 200
+    body = first.get_json()
+    assert body['status'] == 'ready'
+    assert body['database'] == 'connected'
+    assert body['schema'] == {'migrations': 'unmanaged', 'missing_tables': []}
+    assert second.get_json()['checked_at'] == body['checked_at']
+    assert query_recorder.count == 0
+
+
+def test_health_keeps_its_shape(client):
+    body = client.get('/api/health').get_json()
+    assert body['status'] == 'healthy'
+    assert body['database'] == 'connected'
+    assert 'pool' in body
+
+
+def test_saturated_pool_is_not_ready(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'HEALTH_MAX_POOL_SATURATION', 0.0)
+    prober = HealthProber(app, db)
+    assert prober.probe()['status'] == 'unavailable'
+
+
+def test_stale_probe_is_not_ready(app):
+    prober = HealthProber(app, db)
+    prober.current()
+    prober.snapshot['_monotonic'] = time.monotonic() - 4 * prober.interval
+    snapshot = prober.current()
+    assert snapshot['status'] == 'unavailable'
+    assert snapshot['error'] == 'health probe is stale'
+
+
+def test_unreachable_database_is_not_ready():
+    with tempfile.TemporaryDirectory() as directory:
+        missing = os.path.join(directory, 'missing', 'app.db')
+        broken = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{missing}',
+                             'METRICS_ENABLED': False})
+        client = broken.test_client()
+        assert client.get('/livez').status_code == 200
+        ready = client.get('/readyz')
+        assert ready.status_code == 503
+        assert ready.get_json()['database'] == 'disconnected'
+        assert client.get('/api/health').status_code == 503
@@ -0,0 +1,73 @@
+"""FastJSONProvider and compiled column serializers."""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from src.models import Attendance, User
+from src.utils.json_provider import FastJSONProvider, orjson
+from src.utils.serializers import column_serializer
+
+BACKENDS = [False] + ([True] if orjson is not None else [])
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda use_orjson: 'orjson' if use_orjson else 'stdlib')
+def provider(app, request):
+    class Provider(FastJSONProvider):
+        use_orjson = request.param
+
+    return Provider(app)
+
+
+def test_native_types(provider):
+    payload = {
+        'b': date(2026, 9, 1),
+        'a': datetime(2026, 9, 1, 8, 30, 15, 250),
+        'c': Decimal('87.50'),
+    }
+    assert json.loads(provider.dumps(payload)) == {
+        'a': '2026-09-01T08:30:15.000250', 'b': '2026-09-01', 'c': 87.5
+    }
+    assert provider.dumps(payload).index('"a"') < provider.dumps(payload).index('"b"')
+
+
+def test_round_trip_and_fallback(provider):
+    assert provider.loads(provider.dumps({'n': 2 ** 70, 'emoji': '✅'})) == {'n': 2 ** 70, 'emoji': '✅'}
+    assert provider.loads(b'{"x": [1, 2]}') == {'x': [1, 2]}
+
+
+def test_response(app, provider):
+    with app.test_request_context():
+        response = provider.response([{'when': date(2026, 1, 2)}])
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == [{'when': '2026-01-02'}]
+
+
+def test_column_serializer():
+    serialize = column_serializer(User, ('id', 'username'))
+    user = User(id=3, username='kim', email='kim@example.com', preferences=None)
+    assert serialize(user) == {'id': 3, 'username': 'kim'}
+    with pytest.raises(ValueError):
+        column_serializer(User, ('id', 'nickname'))
+
+
+def test_to_dict_lists_only_public_columns():
+    user = User(id=3, username='kim', email='kim@example.com', deleted_at=datetime(2026, 1, 1))
+    assert not {'password_hash', 'deleted_at'} & set(user.to_dict())
+    assert Attendance(id=1, student_id=2, date=date(2026, 9, 1), status='absent').to_dict()['hours'] == 0.0
+
+
+def test_to_dict_leaves_encoding_to_the_provider():
+    record = Attendance(id=1, student_id=2, date=date(2026, 9, 1), status='present', hours=Decimal('4.5'))
+    data = record.to_dict()
+    assert data['date'] == date(2026, 9, 1)
+    assert data['hours'] == Decimal('4.5')
+    assert data['status_icon'] == '✅'
+
+
+def test_api_uses_provider(app, client, family):
+    assert isinstance(app.json, FastJSONProvider)
+    grade = client.get(f"/api/assignments/{family['assignment_id']}/grade").get_json()
+    assert isinstance(grade['percentage'], float)
@@ -0,0 +1,33 @@
+def test_metrics_expose_route_latency_and_pool_stats(app, client):
+    client.get('/api/students')
+    body = client.get('/api/metrics').get_data(as_text=True)
+
+    assert 'homeschool_http_request_duration_seconds_bucket{endpoint="student.get_students"' in body
+    assert 'homeschool_http_requests_total{endpoint="student.get_students",method="GET",status="200"}' in body
+    assert 'homeschool_db_pool_checkout_wait_seconds_count' in body
+    assert 'homeschool_db_pool_utilization' in body
+
+
+def test_cache_hit_ratio_is_derived_from_lookups(client):
+    from src.utils.metrics import record_cache_lookup
+
+    record_cache_lookup('test-cache', True)
+    record_cache_lookup('test-cache', True)
+    record_cache_lookup('test-cache', False)
+    body = client.get('/api/metrics').get_data(as_text=True)
+
+    ratio = [line for line in body.splitlines() if line.startswith('homeschool_cache_hit_ratio{cache="test-cache"}')]
+    assert ratio and abs(float(ratio[0].split()[-1]) - 2 / 3) < 1e-6
+
+
+def test_metrics_are_not_public(app, client, monkeypatch):
+    public = client.get('/api/metrics', environ_overrides={'REMOTE_ADDR': '203.0.113.7'})
+    assert public.status_code == 403
+    # Private addresses too: behind a proxy, every public client has one
+    proxied = client.get('/api/metrics', environ_overrides={'REMOTE_ADDR': '10.0.0.5'})
+    assert proxied.status_code == 403
+
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', 'scrape-secret')
+    assert client.get('/api/metrics').status_code == 403
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer scrape-secret'}).status_code == 200
@@ -0,0 +1,147 @@
+"""
+Query-count and query-plan regression suite.
+
+Every GET route on the API blueprints is driven against the seeded database.
+A route fails when it issues more statements than its budget (an N+1 creeping
+in) or when one of its SELECTs falls back to a full table scan (an index
+going unused). Budgets are ceilings for the seed in conftest.py; lower them
+when a route gets cheaper.
+"""
+
+import re
+import time
+
+import pytest
+
+from src.models import db, Assignment, Student
+from src.routes.assignment import assignment_bp
+from src.routes.calendar import calendar_bp
+from src.routes.goal import goal_bp
+from src.routes.changes import changes_bp
+from src.routes.events import events_bp
+from src.routes.student import student_bp
+from src.routes.subject import subject_bp
+from src.routes.user import user_bp
+
+BLUEPRINTS = [user_bp, student_bp, assignment_bp, subject_bp, calendar_bp, goal_bp, changes_bp, events_bp]
+
+# (path, max statements, tables that may legitimately be scanned in full)
+ROUTE_BUDGETS = {
+    'user.get_current_user_info': ('/api/auth/me', 1, ()),
+    'user.get_users': ('/api/users', 1, ('users',)),
+    'user.get_user': ('/api/users/{user_id}', 1, ()),
+    'student.get_students': ('/api/students', 5, ()),
+    'student.get_student': ('/api/students/{student_id}', 5, ()),
+    'student.get_student_dashboard': ('/api/students/{student_id}/dashboard', 10, ()),
+    'student.get_student_assignments': ('/api/students/{student_id}/assignments', 6, ()),
+    'student.get_student_attendance': ('/api/students/{student_id}/attendance', 4, ()),
+    'student.get_student_attendance_year': ('/api/students/{student_id}/attendance/year', 4, ()),
+    'student.get_student_compliance': ('/api/students/{student_id}/compliance', 3, ()),
+    'student.get_student_goals': ('/api/students/{student_id}/goals', 4, ()),
+    'student.get_student_activities': ('/api/students/{student_id}/activities', 4, ()),
+    'student.get_student_grades': ('/api/students/{student_id}/grades', 4, ()),
+    'student.get_student_progress': ('/api/students/{student_id}/progress', 8, ()),
+    'assignment.get_assignments': ('/api/assignments', 5, ()),
+    'assignment.get_assignment': ('/api/assignments/{assignment_id}', 5, ()),
+    'assignment.get_assignment_grade': ('/api/assignments/{assignment_id}/grade', 4, ()),
+    'assignment.get_assignment_submissions': ('/api/assignments/{assignment_id}/submissions', 4, ()),
+    'assignment.get_assignments_dashboard': ('/api/assignments/dashboard', 15, ()),
+    'subject.get_subjects': ('/api/subjects', 4, ()),
+    'subject.get_subject': ('/api/subjects/{subject_id}', 4, ()),
+    'subject.get_subject_assignments': ('/api/subjects/{subject_id}/assignments', 5, ()),
+    'subject.get_subject_analytics': ('/api/subjects/{subject_id}/analytics', 6, ()),
+    'assignment.get_assignment_schedules': ('/api/assignments/schedules', 1, ()),
+    'calendar.get_calendar': ('/api/calendar', 3, ()),
+    'goal.get_goals': ('/api/goals', 2, ()),
+    'goal.get_goal': ('/api/goals/{goal_id}', 1, ()),
+    'changes.get_changes': ('/api/changes?since=0.{now}', 15, ()),
+    'events.stream_events': ('/api/events', 1, ()),
+}
+
+# "SCAN students" or, before SQLite 3.36, "SCAN TABLE students"; not when
+# followed by "USING ... INDEX". The lookahead spans the rest of the line so
+# backtracking into "TABLE" or a shorter name cannot dodge it.
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?![\w ]*USING)')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+@pytest.mark.parametrize('detail, table', [
+    ('SCAN students', 'students'),
+    ('SCAN TABLE students', 'students'),  # SQLite before 3.36
+    ('SCAN students USING INDEX ix_students_user_id', None),
+    ('SCAN TABLE students USING COVERING INDEX ix_students_user_id', None),
+    ('SEARCH students USING INDEX ix_students_user_id (user_id=?)', None),
+])
+def test_sqlite_full_scan_pattern(detail, table):
+    match = SQLITE_FULL_SCAN.match(detail)
+    assert (match.group(1) if match else None) == table
+
+
+def explain_full_scans(statement, parameters):
+    """Return the tables a SELECT reads without using an index."""
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+        details = [row[-1] for row in rows]
+        pattern = SQLITE_FULL_SCAN
+    elif dialect == 'postgresql':
+        # Tiny seeded tables make sequential scans the cheapest plan; disable
+        # them so a Seq Scan only appears when no index can serve the query.
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        rows = connection.exec_driver_sql(f'EXPLAIN {statement}', parameters).fetchall()
+        details = [row[0] for row in rows]
+        pattern = POSTGRES_FULL_SCAN
+    else:
+        pytest.skip(f'No plan inspection for {dialect}')
+
+    tables = set()
+    for detail in details:
+        match = pattern.search(detail.strip())
+        if match:
+            tables.add(match.group(1))
+    return tables
+
+
+def blueprint_get_endpoints(app):
+    """All GET endpoints registered by the API blueprints."""
+    names = {bp.name for bp in BLUEPRINTS}
+    return {
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if 'GET' in rule.methods and rule.endpoint.split('.')[0] in names
+    }
+
+
+def test_every_get_route_has_a_budget(app):
+    missing = blueprint_get_endpoints(app) - set(ROUTE_BUDGETS)
+    assert not missing, f'Add query budgets for: {sorted(missing)}'
+
+
+@pytest.mark.parametrize('endpoint', sorted(ROUTE_BUDGETS))
+def test_route_query_budget_and_plans(app, client, family, query_recorder, endpoint):
+    path, budget, allowed_scans = ROUTE_BUDGETS[endpoint]
+
+    with query_recorder:
+        response = client.get(path.format(now=int(time.time()), **family))
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert query_recorder.count <= budget, (
+        f'{endpoint} issued {query_recorder.count} statements (budget {budget}):\n'
+        + '\n'.join(statement for statement, _ in query_recorder.statements)
+    )
+
+    with app.app_context():
+        for statement, parameters in query_recorder.statements:
+            if not statement.lstrip().upper().startswith('SELECT'):
+                continue
+            scanned = explain_full_scans(statement, parameters) - set(allowed_scans)
+            assert not scanned, f'{endpoint} scans {sorted(scanned)} without an index:\n{statement}'
+        db.session.rollback()
+
+
+def test_dashboard_counts_assignments_of_every_student(app, client, family):
+    with app.app_context():
+        expected = Assignment.query.join(Student).filter(Student.user_id == family['user_id']).count()
+        assert Student.query.filter_by(user_id=family['user_id']).count() > 1
+    stats = client.get('/api/assignments/dashboard').get_json()['stats']
+    assert stats['total_assignments'] == expected
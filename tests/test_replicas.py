@@ -0,0 +1,128 @@
+"""Read-replica routing, read-your-writes stickiness and failover."""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import date
+
+import pytest
+
+from src.main import create_app
+from src.models import db, Student, User
+from tests.conftest import TEST_PASSWORD
+
+
+@pytest.fixture
+def databases():
+    """A seeded primary and a copy of it standing in as the replica.
+
+    The replica's student is renamed so responses show which database
+    served them.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        primary = os.path.join(directory, 'primary.db')
+        replica = os.path.join(directory, 'replica.db')
+        setup = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+                            'METRICS_ENABLED': False})
+        with setup.app_context():
+            db.create_all()
+            user = User(username='replicated', email='replicated@example.com', first_name='Parent', last_name='Copy')
+            user.set_password(TEST_PASSWORD)
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Student(user_id=user.id, first_name='Primary', last_name='Copy',
+                                   date_of_birth=date(2015, 1, 1), grade_level='3'))
+            db.session.commit()
+            db.session.remove()
+            db.engine.dispose()
+        shutil.copy(primary, replica)
+        with sqlite3.connect(replica) as connection:
+            connection.execute("UPDATE students SET first_name = 'Replica'")
+        yield f'sqlite:///{primary}', f'sqlite:///{replica}', directory
+
+
+def build_app(primary, replicas, **config):
+    app = create_app(dict({
+        'TESTING': True, 'SQLALCHEMY_DATABASE_URI': primary, 'DATABASE_REPLICA_URLS': replicas,
+        'METRICS_ENABLED': False, 'RESPONSE_CACHE_ENABLED': False,
+    }, **config))
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': 'replicated', 'password': TEST_PASSWORD})
+    assert response.status_code == 200
+    return app, client
+
+
+def student_names(client):
+    response = client.get('/api/students')
+    assert response.status_code == 200
+    return [student['first_name'] for student in response.get_json()]
+
+
+def test_get_requests_read_from_replica(databases):
+    primary, replica, _ = databases
+    app, client = build_app(primary, [replica], REPLICA_STICKY_SECONDS=0)
+    assert student_names(client) == ['Replica']
+
+    # Health checks and other non-blueprint endpoints stay on the primary.
+    with app.app_context():
+        assert db.session.get_bind(clause=db.select(Student)) is db.engine
+
+
+def test_reads_stick_to_primary_after_a_write(databases):
+    primary, replica, _ = databases
+    app, client = build_app(primary, [replica], REPLICA_STICKY_SECONDS=60)
+    response = client.post('/api/students', json={
+        'first_name': 'New', 'last_name': 'Kid', 'date_of_birth': '2016-02-02', 'grade_level': '2'
+    })
+    assert response.status_code == 201
+
+    # The write is not on the replica, but the writer still sees it.
+    assert sorted(student_names(client)) == ['New', 'Primary']
+
+    app.config['REPLICA_STICKY_SECONDS'] = 0
+    assert student_names(client) == ['Replica']
+
+
+def test_token_writes_are_stamped_in_a_header(databases):
+    primary, replica, _ = databases
+    app, _ = build_app(primary, [replica], REPLICA_STICKY_SECONDS=60)
+    client = app.test_client(use_cookies=False)
+    tokens = client.post('/api/auth/token', json={'username': 'replicated', 'password': TEST_PASSWORD}).get_json()
+    auth = {'Authorization': f"Bearer {tokens['access_token']}"}
+    response = client.post('/api/students', headers=auth, json={
+        'first_name': 'New', 'last_name': 'Kid', 'date_of_birth': '2016-02-02', 'grade_level': '2'
+    })
+    assert response.status_code == 201
+    assert 'Set-Cookie' not in response.headers
+    stamp = response.headers['X-Last-Write']
+
+    def names(headers):
+        return sorted(student['first_name'] for student in client.get('/api/students', headers=headers).get_json())
+
+    # Echoing the stamp keeps the token client's reads on the primary
+    assert names(dict(auth, **{'X-Last-Write': stamp})) == ['New', 'Primary']
+    assert names(auth) == ['Replica']
+
+
+def test_replica_reads_are_not_cached(databases):
+    primary, replica, _ = databases
+    app, client = build_app(primary, [replica], REPLICA_STICKY_SECONDS=0, RESPONSE_CACHE_ENABLED=True)
+    assert student_names(client) == ['Replica']
+    response = client.get('/api/students')
+    assert response.headers['X-Cache'] == 'miss'
+
+
+def test_unreachable_replica_falls_back_to_primary(databases):
+    primary, _, directory = databases
+    missing = f"sqlite:///{os.path.join(directory, 'missing', 'replica.db')}"
+    app, client = build_app(primary, [missing], REPLICA_STICKY_SECONDS=0)
+    assert student_names(client) == ['Primary']
+
+    replicas = app.extensions['replicas']
+    assert replicas.available() == []
+    assert student_names(client) == ['Primary']
+
+
+def test_no_replicas_configured(app):
+    assert app.extensions['replicas'].engines == []
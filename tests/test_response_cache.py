@@ -0,0 +1,137 @@
+"""Per-user response cache: hits, invalidation by writes and the memory bound."""
+
+import time
+
+import pytest
+
+from src.models import db, Assignment, Grade, Student, User
+from src.utils.replicas import STICKY_KEY
+from src.utils.response_cache import CachedResponse, MemoryBackend, entry_size
+from tests.conftest import TEST_PASSWORD
+
+
+@pytest.fixture
+def neighbour(app):
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'neighbour', 'password': TEST_PASSWORD})
+    with app.app_context():
+        user = User.query.filter_by(username='neighbour').one()
+        student = Student.query.filter_by(user_id=user.id).order_by(Student.id).first()
+        return client, user.id, student.id
+
+
+def cached_users(app):
+    return {key[0] for key in app.extensions['response_cache'].backend._entries}
+
+
+def test_repeat_request_is_served_from_cache(client, query_recorder):
+    first = client.get('/api/assignments/dashboard')
+    assert first.headers['X-Cache'] == 'miss'
+
+    with query_recorder:
+        second = client.get('/api/assignments/dashboard')
+    assert second.headers['X-Cache'] == 'hit'
+    assert query_recorder.count == 0
+    assert second.get_json() == first.get_json()
+    assert second.headers['ETag'] == first.headers['ETag']
+
+    revalidated = client.get('/api/assignments/dashboard', headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_query_arguments_are_normalized(client):
+    client.get('/api/assignments?status=graded&subject_id=1')
+    assert client.get('/api/assignments?subject_id=1&status=graded').headers['X-Cache'] == 'hit'
+    assert client.get('/api/assignments?status=assigned&subject_id=1').headers['X-Cache'] == 'miss'
+
+
+def test_write_invalidates_only_the_owner(app, client, neighbour, family):
+    neighbour_client, neighbour_id, student_id = neighbour
+    client.get('/api/students')
+    path = f'/api/students/{student_id}/dashboard'
+    before = neighbour_client.get(path).get_json()
+    assert cached_users(app) == {family['user_id'], neighbour_id}
+
+    response = neighbour_client.post('/api/assignments', json={
+        'student_id': student_id, 'subject_id': before['recent_assignments'][0]['subject_id'],
+        'title': 'Cache buster', 'due_date': '2099-01-01',
+    })
+    assert response.status_code == 201
+    assert cached_users(app) == {family['user_id']}
+
+    after = neighbour_client.get(path)
+    assert after.headers['X-Cache'] == 'miss'
+    assert after.get_json()['recent_assignments'][0]['title'] == 'Cache buster'
+
+    with app.app_context():
+        db.session.delete(db.session.get(Assignment, response.get_json()['assignment']['id']))
+        db.session.commit()
+
+
+def test_grade_changes_map_to_the_owning_user(app, neighbour):
+    neighbour_client, neighbour_id, student_id = neighbour
+    neighbour_client.get('/api/assignments/dashboard')
+    assert neighbour_id in cached_users(app)
+
+    with app.app_context():
+        grade = Grade.query.join(Assignment).filter(Assignment.student_id == student_id).first()
+        grade.feedback = 'Updated outside a request'
+        db.session.commit()
+    assert neighbour_id not in cached_users(app)
+
+
+def test_entries_older_than_the_users_last_write_are_skipped(client):
+    client.get('/api/students')
+    # Another worker committed a write for this user after the entry was stored.
+    with client.session_transaction() as session:
+        session[STICKY_KEY] = time.time()
+    assert client.get('/api/students').headers['X-Cache'] == 'miss'
+
+
+def test_token_requests_bypass_the_in_process_cache(app, monkeypatch):
+    client = app.test_client()
+    token = client.post('/api/auth/token', json={'username': 'primary', 'password': TEST_PASSWORD}
+                        ).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    for _ in range(2):
+        response = client.get('/api/students', headers=headers)
+        assert response.status_code == 200 and 'X-Cache' not in response.headers
+
+    # A shared backend sees every worker's invalidations, so tokens are cached there.
+    monkeypatch.setattr(MemoryBackend, 'shared', True)
+    client.get('/api/students', headers=headers)
+    assert client.get('/api/students', headers=headers).headers['X-Cache'] == 'hit'
+
+
+def entry(body_bytes):
+    return CachedResponse(200, [('Content-Type', 'application/json')], b'x' * body_bytes, time.time())
+
+
+def test_memory_backend_evicts_least_recently_used_by_size():
+    size = entry_size(entry(1000))
+    backend = MemoryBackend(max_bytes=size * 8)
+    for n in range(8):
+        backend.set((1, 0, 'view', n), entry(1000), ttl=60)
+    backend.get((1, 0, 'view', 0))
+    backend.set((2, 0, 'view', 'new'), entry(1000), ttl=60)
+    assert len(backend) == 8
+    assert backend.bytes <= backend.max_bytes
+    assert backend.get((1, 0, 'view', 0)) is not None
+    assert backend.get((1, 0, 'view', 1)) is None
+
+    # Responses over an eighth of the bound are not cached at all.
+    backend.set((1, 0, 'view', 'large'), entry(size * 2), ttl=60)
+    assert backend.get((1, 0, 'view', 'large')) is None
+
+
+def test_memory_backend_expires_and_invalidates():
+    backend = MemoryBackend(max_bytes=1024 * 1024)
+    backend.set((1, 0, 'view', ()), entry(10), ttl=0)
+    assert backend.get((1, 0, 'view', ())) is None
+
+    backend.set((1, 0, 'view', ()), entry(10), ttl=60)
+    backend.set((2, 0, 'view', ()), entry(10), ttl=60)
+    backend.invalidate_user(1)
+    assert backend.generation(1) == 1
+    assert backend.get((1, 0, 'view', ())) is None
+    assert backend.get((2, 0, 'view', ())) is not None
@@ -0,0 +1,123 @@
+"""Recurring assignment schedules: rolling materialization and on-the-fly expansion."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from src.models import db, Assignment, AssignmentSchedule, Student
+from src.utils.schedules import materialize_due_schedules
+from tests.conftest import TEST_PASSWORD, seed_family
+
+DAILY = 'FREQ=DAILY'
+
+
+@pytest.fixture(scope='module')
+def scheduler(app):
+    """A family of its own, so schedules do not change other tests' data."""
+    with app.app_context():
+        user = seed_family('scheduler', students=1, subjects=1, assignments_per_student=0, attendance_days=0)
+        student_id = Student.query.filter_by(user_id=user.id).one().id
+    return student_id
+
+
+@pytest.fixture
+def sched_client(app, scheduler):
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'scheduler', 'password': TEST_PASSWORD})
+    yield client
+    with app.app_context():
+        Assignment.query.filter_by(student_id=scheduler).delete()
+        AssignmentSchedule.query.filter_by(student_id=scheduler).delete()
+        db.session.commit()
+
+
+def create(client, student_id, rule=DAILY, **extra):
+    response = client.post('/api/assignments/schedules', json=dict(
+        student_id=student_id, title='Math lesson', rrule=rule, estimated_duration=45, **extra))
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def occurrence_dates(app, schedule_id):
+    with app.app_context():
+        return sorted(a.due_date for a in Assignment.query.filter_by(schedule_id=schedule_id))
+
+
+def test_creation_materializes_only_the_horizon(app, sched_client, scheduler):
+    body = create(sched_client, scheduler)
+    horizon = app.config['SCHEDULE_HORIZON_DAYS']
+    assert body['assignments_created'] == horizon + 1
+    today = date.today()
+    assert occurrence_dates(app, body['schedule']['id']) == [today + timedelta(days=n) for n in range(horizon + 1)]
+
+    # Weekly rules only produce their weekdays.
+    weekly = create(sched_client, scheduler, rule='FREQ=WEEKLY;BYDAY=MO')
+    assert all(day.weekday() == 0 for day in occurrence_dates(app, weekly['schedule']['id']))
+
+
+def test_past_start_dates_are_not_backfilled(app, sched_client, scheduler):
+    body = create(sched_client, scheduler, start_date=str(date.today() - timedelta(days=30)))
+    assert occurrence_dates(app, body['schedule']['id'])[0] == date.today()
+
+
+def test_window_rolls_forward_without_duplicates(app, sched_client, scheduler, monkeypatch):
+    schedule_id = create(sched_client, scheduler)['schedule']['id']
+    monkeypatch.setitem(app.config, 'SCHEDULE_HORIZON_DAYS', app.config['SCHEDULE_HORIZON_DAYS'] + 5)
+    with app.app_context():
+        materialize_due_schedules()
+        materialize_due_schedules()
+    days = occurrence_dates(app, schedule_id)
+    assert len(days) == len(set(days)) == app.config['SCHEDULE_HORIZON_DAYS'] + 1
+
+
+def test_calendar_expands_occurrences_past_the_window(sched_client, scheduler):
+    create(sched_client, scheduler)
+    start, end = date.today() + timedelta(days=40), date.today() + timedelta(days=46)
+    days = sched_client.get(f'/api/calendar?start={start}&end={end}').get_json()['days']
+    assert [day['date'] for day in days] == [str(start + timedelta(days=n)) for n in range(7)]
+    assert all(day['assignments'] == {'total': 1, 'by_status': {'assigned': 1}, 'estimated_minutes': 45}
+               for day in days)
+
+
+def test_dashboard_shows_occurrences_not_yet_materialized(app, sched_client, scheduler, monkeypatch):
+    monkeypatch.setitem(app.config, 'SCHEDULE_HORIZON_DAYS', 2)
+    create(sched_client, scheduler)
+    body = sched_client.get('/api/assignments/dashboard').get_json()
+    assert body['stats']['due_soon_count'] == 3
+    assert [item['due_date'] for item in body['scheduled']] == [
+        str(date.today() + timedelta(days=n)) for n in range(3, 8)
+    ]
+    assert all(item['scheduled'] and item['id'] is None for item in body['scheduled'])
+
+
+def test_rule_change_keeps_started_work(app, sched_client, scheduler):
+    schedule_id = create(sched_client, scheduler)['schedule']['id']
+    started_day = date.today() + timedelta(days=1)
+    with app.app_context():
+        started = Assignment.query.filter_by(schedule_id=schedule_id, due_date=started_day).one()
+        started.status = 'in_progress'
+        db.session.commit()
+
+    response = sched_client.put(f'/api/assignments/schedules/{schedule_id}', json={'rrule': 'FREQ=WEEKLY'})
+    assert response.status_code == 200
+    days = occurrence_dates(app, schedule_id)
+    assert started_day in days
+    assert all(day == started_day or (day - date.today()).days % 7 == 0 for day in days)
+
+    assert sched_client.delete(f'/api/assignments/schedules/{schedule_id}').status_code == 200
+    with app.app_context():
+        remaining = Assignment.query.filter_by(student_id=scheduler, due_date=started_day).all()
+        assert [(a.status, a.schedule_id) for a in remaining] == [('in_progress', None)]
+
+
+@pytest.mark.parametrize('rule', ['FREQ=HOURLY', 'not a rule', 'FREQ=DAILY\nRRULE:FREQ=WEEKLY'])
+def test_invalid_rules_are_rejected(sched_client, scheduler, rule):
+    response = sched_client.post('/api/assignments/schedules', json={
+        'student_id': scheduler, 'title': 'Bad', 'rrule': rule})
+    assert response.status_code == 400
+
+
+def test_schedules_are_private(client, scheduler):
+    assert client.post('/api/assignments/schedules', json={
+        'student_id': scheduler, 'title': 'Not mine', 'rrule': DAILY}).status_code == 404
+    assert all(s['student_id'] != scheduler for s in client.get('/api/assignments/schedules').get_json())
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.models import db
+from src.utils.sql_instrumentation import fingerprint
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    first = fingerprint("SELECT * FROM grades\n WHERE grades.assignment_id = 12 AND status IN ('a', 'b')")
+    second = fingerprint("SELECT * FROM grades WHERE grades.assignment_id = 97 AND status IN ('c')")
+    assert first == second == 'SELECT * FROM grades WHERE grades.assignment_id = ? AND status IN (?)'
+
+
+def test_server_timing_reports_query_count(client):
+    response = client.get('/api/students')
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('db;dur=')
+    assert 'queries"' in timing and 'app;dur=' in timing
+
+
+def test_repeated_statements_warn_in_development(app, client, family, caplog):
+    # The dashboard eager-loads grades once per assignment list, four times in all.
+    app.config.update(ENV_NAME='development', SQL_REPEATED_STATEMENT_THRESHOLD=2)
+    try:
+        with caplog.at_level('WARNING', logger=app.logger.name):
+            client.get('/api/assignments/dashboard')
+    finally:
+        app.config.update(ENV_NAME='production', SQL_REPEATED_STATEMENT_THRESHOLD=5)
+    assert any('Possible N+1' in record.getMessage() for record in caplog.records)
+
+
+def test_failed_statements_leave_no_start_time(app):
+    with app.test_request_context():
+        app.preprocess_request()
+        connection = db.session.connection()
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM no_such_table'))
+        assert not connection.info.get('sql_query_start')
+        db.session.rollback()
@@ -0,0 +1,98 @@
+"""SQLite pragmas, the single-writer lock and background maintenance."""
+
+import threading
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.models import db, Subject, User
+from src.utils.database import sqlite_settings
+from src.utils.sqlite import Maintenance, WriterLock
+
+
+@pytest.fixture
+def sqlite_app(app):
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            pytest.skip('SQLite profile only')
+    return app
+
+
+def test_connections_use_tuned_pragmas(sqlite_app):
+    with sqlite_app.app_context():
+        pragma = lambda name: db.session.execute(db.text(f'PRAGMA {name}')).scalar()  # noqa: E731
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1
+        assert pragma('busy_timeout') == 5000
+        assert pragma('temp_store') == 2
+        assert pragma('cache_size') == -64 * 1024
+        assert pragma('foreign_keys') == 1
+
+
+def test_invalid_pragma_value_is_rejected():
+    with pytest.raises(ValueError):
+        sqlite_settings(env={'SQLITE_SYNCHRONOUS': 'NORMAL; DROP TABLE users'})
+
+
+def test_writer_lock_is_held_until_commit(sqlite_app):
+    writer = sqlite_app.extensions['sqlite']['writer']
+    with sqlite_app.app_context():
+        user = User.query.filter_by(username='neighbour').one()
+        db.session.add(Subject(user_id=user.id, name='Latin', color='#000000'))
+        db.session.flush()
+        assert writer._thread_lock.locked()
+        db.session.rollback()
+        assert not writer._thread_lock.locked()
+
+
+def test_concurrent_writers_are_serialized(sqlite_app):
+    with sqlite_app.app_context():
+        user_id = User.query.filter_by(username='neighbour').one().id
+    errors = []
+
+    def write(n):
+        with sqlite_app.app_context():
+            try:
+                for i in range(20):
+                    db.session.add(Subject(user_id=user_id, name=f'Writer {n}-{i}', color='#000000'))
+                    db.session.commit()
+            except Exception as exc:
+                errors.append(exc)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with sqlite_app.app_context():
+        assert Subject.query.filter(Subject.name.like('Writer %')).count() == 80
+        Subject.query.filter(Subject.name.like('Writer %')).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def test_writer_lock_times_out(tmp_path):
+    holder = WriterLock(str(tmp_path / 'db-writer.lock'), timeout=0.05)
+    holder.acquire()
+    outcome = []
+
+    def wait():
+        try:
+            holder.acquire()
+        except PoolTimeoutError as exc:
+            outcome.append(exc)
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    waiter.join()
+    holder.release()
+    assert len(outcome) == 1
+
+
+def test_maintenance_checkpoints_and_optimizes(sqlite_app):
+    extension = sqlite_app.extensions['sqlite']
+    with sqlite_app.app_context():
+        maintenance = Maintenance(db.engine, extension['writer'], extension['settings'], sqlite_app.logger)
+    assert maintenance.checkpoint()['busy'] is False
+    maintenance.optimize()
+    assert not extension['writer']._thread_lock.locked()
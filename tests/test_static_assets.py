@@ -0,0 +1,112 @@
+"""Static assets served from the in-memory manifest."""
+
+import gzip
+import os
+
+import pytest
+
+from src.utils import static_assets
+from src.utils.static_assets import StaticManifest, precompress
+
+INDEX = b'<!doctype html><title>Homeschool Hub</title>' + b'<div>app</div>' * 200
+SCRIPT = b'console.log("hashed bundle");' * 100
+
+
+@pytest.fixture
+def static_app(app, tmp_path, monkeypatch):
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'index.html').write_bytes(INDEX)
+    (tmp_path / 'assets' / 'index-3f9a2c1b.js').write_bytes(SCRIPT)
+    (tmp_path / 'favicon.ico').write_bytes(b'\x00\x00\x01\x00' * 8)
+    monkeypatch.setitem(app.extensions, 'static_manifest', StaticManifest.build(str(tmp_path)))
+    return app
+
+
+def test_hashed_assets_are_immutable(static_app):
+    response = static_app.test_client().get('/assets/index-3f9a2c1b.js')
+    assert response.status_code == 200
+    assert response.data == SCRIPT
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert 'javascript' in response.content_type
+
+
+def test_unhashed_files_revalidate_and_have_fingerprinted_aliases(static_app):
+    client = static_app.test_client()
+    response = client.get('/favicon.ico')
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    with static_app.test_request_context():
+        url = static_assets.asset_url('favicon.ico')
+    assert url != '/favicon.ico' and url.endswith('.ico')
+    aliased = client.get(url)
+    assert aliased.data == response.data
+    assert aliased.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+@pytest.mark.parametrize('name, hashed', [
+    ('assets/index-3f9a2c1b.js', True),
+    ('main.3f9a2c1b.css', True),
+    ('assets/index-BfPx1Ktn.js', True),
+    ('assets/fonts/inter-Dz4Ta_9c.woff2', True),
+    ('assets/logo.png', False),
+    ('assets/background-original.png', False),
+    ('favicon.ico', False),
+])
+def test_only_names_with_a_hash_are_hashed(name, hashed):
+    assert static_assets._is_hashed(name) is hashed
+
+
+def test_encoding_is_negotiated(static_app):
+    client = static_app.test_client()
+    plain = client.get('/')
+    assert plain.data == INDEX
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    gzipped = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzipped.data) == INDEX
+    assert gzipped.headers['ETag'] != plain.headers['ETag']
+
+    if static_assets.brotli is not None:
+        brotlied = client.get('/', headers={'Accept-Encoding': 'gzip, br'})
+        assert brotlied.headers['Content-Encoding'] == 'br'
+        assert static_assets.brotli.decompress(brotlied.data) == INDEX
+
+
+def test_spa_routes_fall_back_to_index_and_revalidate(static_app):
+    client = static_app.test_client()
+    first = client.get('/students/3')
+    assert first.data == INDEX
+    assert first.headers['Cache-Control'] == 'no-cache'
+    again = client.get('/students/3', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_requests_do_not_touch_the_filesystem(static_app, monkeypatch):
+    def forbidden(*args, **kwargs):
+        raise AssertionError('filesystem probed during a request')
+
+    monkeypatch.setattr(os.path, 'exists', forbidden)
+    monkeypatch.setattr(os.path, 'isfile', forbidden)
+    monkeypatch.setattr(os, 'stat', forbidden)
+    client = static_app.test_client()
+    for path in ('/', '/favicon.ico', '/assets/index-3f9a2c1b.js', '/students'):
+        assert client.get(path).status_code == 200
+
+
+def test_missing_index_is_reported(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.extensions, 'static_manifest', StaticManifest.build(str(tmp_path)))
+    response = app.test_client().get('/anything')
+    assert response.status_code == 404
+    assert response.data == b'index.html not found'
+
+
+def test_prebuilt_variants_are_loaded(tmp_path):
+    (tmp_path / 'index.html').write_bytes(INDEX)
+    assert precompress(str(tmp_path)) >= 1
+    (tmp_path / 'index.html.gz').write_bytes(gzip.compress(b'prebuilt'))
+    manifest = StaticManifest.build(str(tmp_path))
+    asset, _ = manifest.lookup('index.html')
+    assert gzip.decompress(asset.variants['gzip']) == b'prebuilt'
+    assert 'index.html.gz' not in manifest.assets